@@ -1,36 +1,48 @@
 # app.py
+import asyncio
+import gzip
+import json
 import logging
 import math
+import multiprocessing as mp
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FTimeout
-from datetime import datetime, timezone
-from typing import Dict, List, Literal, Optional, Tuple
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Literal, Optional, Tuple
 from uuid import uuid4
 
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 # --- tambahkan di app.py (atau bikin router terpisah) ---
 from pydantic import BaseModel
 
-from .database import SessionLocal
-from .engine.alns import ALNSConfig, alns_optimize
-from .engine.construct import greedy_construct
-from .engine.data import Node, TimeMatrix, load_nodes_csv, load_time_matrix_csv
+from .database import async_driver_missing, dispose_async_engine, engine
+from .dataset import DATASETS
+from .encoding import JSON_MEDIA, compact_result, encode, negotiate
+from .engine.alns import ALNSConfig, ALNSTelemetry, alns_optimize, routes_objective
+from .engine.bounds import makespan_lower_bound
+from .engine.budget import ConvergenceMonitor, plan_time_budget
+from .engine.construct import CONSTRUCTORS
+from .engine.context import CancelToken, RunContext
+from .engine.data import Node, TimeMatrix
 from .engine.evaluation import (
-    capacity_trace_and_violations,
-    load_profile_liters,
+    evaluate_route,
     makespan_minutes,  #  baru
-    route_time_minutes,
 )
 from .engine.improve import improve_routes
+from .engine.portfolio import construct_portfolio
 from .engine.utils import (
     build_groups_from_expanded_ids,
     ensure_all_routes_capacity,
     ensure_groups_single_vehicle,
 )
-from .models import JobStepStatus, JobVehicleRun
+from .http_cache import accepts_gzip, etag_matches, make_etag, not_modified
+from .persistence import ResultWriter, result_rows
 from .routers import (
     routes_assign,
     routes_catalog,
@@ -38,8 +50,19 @@ from .routers import (
     routes_history,
     routes_status,
 )
-from .schemas import OptimizeRequest, OptimizeResponse, RouteResult
+from .schemas import (
+    BatchScenario,
+    BatchScenarioResult,
+    OptimizeBatchRequest,
+    OptimizeBatchResponse,
+    OptimizeJobOut,
+    OptimizeRequest,
+    OptimizeResponse,
+    RouteResult,
+)
 from .settings import settings
+from .solver_jobs import QueueFull, SolveJob, SolveJobManager, SolverScheduler
+from .solver_pool import ProcessSolverPool, SolverTimeout, SolverWorkerError
 
 app = FastAPI(
     title="Meta-VRP API",
@@ -59,12 +82,32 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("meta-vrp")
 
-# Eksekutor untuk hard-timeout endpoint & per-step
-EXECUTOR = ThreadPoolExecutor(max_workers=1)
-STEP_EXEC = ThreadPoolExecutor(max_workers=1)
+# Scheduler solver: antrian prioritas (interactive > batch) ber-batas,
+# SOLVER_MAX_WORKERS solve paralel (state engine per-run, lihat RunContext).
+SCHEDULER = SolverScheduler(
+    workers=settings.SOLVER_MAX_WORKERS,
+    max_queue={
+        "interactive": settings.SOLVER_QUEUE_MAX_INTERACTIVE,
+        "batch": settings.SOLVER_QUEUE_MAX_BATCH,
+    },
+    base_time_sec=settings.TIME_LIMIT_SEC,
+    min_time_frac=settings.SOLVER_MIN_TIME_FRAC,
+)
+# Eksekutor per-step (hard-timeout tiap tahap engine). None di proses worker
+# pool: step jalan inline, deadline ditegakkan timeout + recycle milik pool.
+STEP_EXEC: Optional[ThreadPoolExecutor] = ThreadPoolExecutor(
+    max_workers=settings.SOLVER_MAX_WORKERS
+)
+# pool terpisah utk portfolio konstruksi / ALNS paralel (dipanggil dari STEP_EXEC)
+CONSTRUCT_EXEC = ThreadPoolExecutor(max_workers=settings.CONSTRUCT_WORKERS)
 
 
 def run_step(fn, timeout_sec: float, name: str):
+    if STEP_EXEC is None:
+        # di worker pool, thread step yang timeout tidak bisa dihentikan dan
+        # akan terus memakan CPU job berikutnya; biarkan pool yang membunuh
+        # proses ini kalau lewat batas
+        return fn()
     fut = STEP_EXEC.submit(fn)
     try:
         return fut.result(timeout=timeout_sec)
@@ -159,165 +202,27 @@ def expand_split_delivery(
     return new_nodes, tm2, expanded_selected
 
 
-# === helper: belah satu rute menjadi K rute berbasis beban === # --- helper: belah satu rute menjadi K rute berbasis beban (VERSI GROUP-AWARE - FIX Error '.get()') ---
+@dataclass
+class SolveInstance:
+    """Instance ter-expand (split delivery) + index; dipakai ulang antar skenario."""
 
+    selected_raw: List[str]
+    selected_expanded: List[str]
+    nodes: Dict[str, Node]
+    tm: TimeMatrix
+    groups: Dict[str, List[str]]
+    depot_id: str
+    refill_ids: List[str]
+    vehicle_capacity: float
+    dataset_version: Optional[str] = None
+    load_sec: float = 0.0
+    validate_sec: float = 0.0
 
-def split_route_into_k_by_load(
-    route: List[str],
-    nodes: Dict[str, Node],
-    vehicle_capacity: float,  # <-- Tidak dipakai di logic ini, tapi biarkan
-    k: int,
-    depot_id: str,
-    groups: Dict[str, List[str]],  # <-- groups data
-    part_to_group: Dict[str, str],  # <-- part mapping data
-) -> List[List[str]]:
-    if k <= 1 or len(route) <= 2:
-        return [route[:]]  # Tidak perlu split
-
-    # Cari indeks semua node park di rute
-    parks_idx = []
-    for i in range(1, len(route) - 1):
-        node = nodes.get(route[i])
-        if node and node.type == "park":
-            parks_idx.append(i)
-
-    if len(parks_idx) < k - 1:
-        # Jumlah park lebih sedikit dari jumlah potongan yg dibutuhkan
-        return [route[:]]
-
-    total_demand = sum(
-        nodes[route[i]].demand_liters for i in parks_idx if route[i] in nodes
-    )
-    if total_demand <= 0:
-        return [route[:]]
-
-    target = total_demand / k
-    cuts = []
-    acc = 0.0
-    next_target = target
-
-    # Cari titik potong yang aman (tidak memisah grup)
-    last_valid_idx_before_target = -1
-
-    for i in parks_idx:
-        current_node_id = route[i]
-        node_obj = nodes.get(current_node_id)
-        if not node_obj:
-            continue  # Skip if node data missing
-
-        # --- PENGECEKAN GROUP-AWARE ---
-        is_safe_cut_point = True
-        if i + 1 < len(route) - 1:  # Pastikan ada node setelah ini
-            next_node_id = route[i + 1]
-            # Hanya cek jika node BERIKUTNYA adalah 'park' juga
-            next_node_obj = nodes.get(next_node_id)
-            if next_node_obj and next_node_obj.type == "park":
-                current_group = part_to_group.get(current_node_id)
-                next_group = part_to_group.get(next_node_id)
-                # Potongan TIDAK aman jika node ini dan node park berikutnya
-                # berasal dari grup split yang sama
-                if current_group and next_group and current_group == next_group:
-                    is_safe_cut_point = False
-        # --- AKHIR PENGECEKAN ---
-
-        # Akumulasi demand
-        acc += node_obj.demand_liters
-
-        # Catat indeks aman terakhir SEBELUM target tercapai
-        if acc < next_target - 1e-9 and is_safe_cut_point:
-            last_valid_idx_before_target = i
-
-        # Jika target tercapai atau terlewati
-        if acc >= next_target - 1e-9:
-            cut_point_found = False
-            # Apakah titik SEKARANG (i) aman untuk dipotong?
-            if is_safe_cut_point:
-                cuts.append(i)  # Potong di sini
-                cut_point_found = True
-            # Jika tidak aman, coba potong di titik aman terakhir SEBELUM target
-            elif last_valid_idx_before_target != -1:
-                # Pastikan titik potong sebelumnya belum dipakai
-                if not cuts or cuts[-1] != last_valid_idx_before_target:
-                    cuts.append(last_valid_idx_before_target)
-                    cut_point_found = True
-            # Jika tidak ada titik aman (jarang), lewati target ini
-
-            # Hanya reset 'last_valid_idx_before_target' jika potongan ditemukan
-            if cut_point_found:
-                last_valid_idx_before_target = -1
-                # Set target berikutnya
-                next_target += target
-
-            # Berhenti jika sudah cukup potongan
-            if len(cuts) >= k - 1:
-                break
-
-    # --- Sanitasi (PERBAIKAN ERROR .get()) ---
-    def sanitize(seg: List[str]) -> List[str]:
-        # 1) remove consecutive duplicates
-        cleaned = [seg[0]]
-        for nid in seg[1:]:
-            if nid != cleaned[-1]:
-                cleaned.append(nid)
-
-        # 2) drop refill right before depot (FIXED)
-        if len(cleaned) >= 3 and cleaned[-1] == depot_id:
-            node_before_depot = nodes.get(cleaned[-2])  # Pakai .get() di DICT nodes
-            if (
-                node_before_depot and node_before_depot.type == "refill"
-            ):  # Akses .type LANGSUNG
-                cleaned.pop(-2)
-
-        # 3) if no parks left, return empty (FIXED)
-        has_park = False
-        for n_id in cleaned[1:-1]:
-            node_obj = nodes.get(n_id)  # Pakai .get() di DICT nodes
-            if node_obj and node_obj.type == "park":  # Akses .type LANGSUNG
-                has_park = True
-                break
-        return cleaned if has_park and len(cleaned) > 2 else []
-
-    # --- Akhir Sanitasi ---
-
-    # --- Membuat Segmen (Tidak berubah) ---
-    segments = []
-    prev = 0
-    # Pastikan cuts diurutkan untuk slicing yang benar
-    cuts.sort()
-    for cut in cuts:
-        # Pastikan cut index valid
-        if cut < len(route) - 1 and cut > prev:  # Tambah cek cut > prev
-            seg = [depot_id] + route[prev + 1 : cut + 1] + [depot_id]
-            seg = sanitize(seg)
-            if seg:
-                segments.append(seg)
-            prev = cut
-        elif cut <= prev:
-            # Jika ada cut duplikat atau tidak berurut, skip
-            pass
-
-    # Segmen terakhir
-    seg = [depot_id] + route[prev + 1 : -1] + [depot_id]
-    seg = sanitize(seg)
-    if seg:
-        segments.append(seg)
-
-    # Pad jika perlu (Tidak berubah)
-    while len(segments) < k:
-        segments.append([depot_id, depot_id])
-
-    # Jika hasilnya > k (karena potongan yg dipaksa), gabungkan yg terakhir (Tidak berubah)
-    while len(segments) > k and len(segments) > 1:
-        last = segments.pop()
-        if len(segments[-1]) > 1 and len(last) > 2:
-            segments[-1] = segments[-1][:-1] + last[1:-1] + [depot_id]
-        elif len(last) > 2:
-            segments[-1] = last
-
-    return segments
-
-
-def _solve(req: OptimizeRequest) -> OptimizeResponse:
+
+def _prepare_instance(
+    selected_node_ids: List[str], vehicle_capacity: float
+) -> SolveInstance:
+    """Load dataset, validasi pilihan taman, expand split delivery, depot/refill."""
     t0 = time.perf_counter()
 
     # 1) LOAD
@@ -326,23 +231,18 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
         settings.DATA_NODES_PATH,
         settings.DATA_MATRIX_PATH,
     )
-    nodes_orig, ids_in_order = run_step(
-        lambda: load_nodes_csv(settings.DATA_NODES_PATH), 3.0, "load_nodes_csv"
-    )
-    tm_orig = run_step(
-        lambda: load_time_matrix_csv(settings.DATA_MATRIX_PATH, ids_in_order),
-        3.0,
-        "load_time_matrix_csv",
-    )
+    # dataset di-cache registry (di-load ulang kalau file CSV berubah)
+    dataset = run_step(DATASETS.get, 6.0, "load_dataset")
+    nodes_orig, tm_orig = dataset.nodes, dataset.tm
     t_load = time.perf_counter()
     log.info("LOAD done in %.3fs", t_load - t0)
 
     # 2) VALIDASI input terhadap NODES ASLI (sebelum expand)
-    if not req.selected_node_ids:
+    if not selected_node_ids:
         raise HTTPException(
             status_code=400, detail="selected_node_ids tidak boleh kosong"
         )
-    selected_raw = [str(x) for x in req.selected_node_ids]
+    selected_raw = [str(x) for x in selected_node_ids]
 
     for nid in selected_raw:
         if nid not in nodes_orig:
@@ -357,7 +257,7 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
     # 3) EXPAND SPLIT-DELIVERY (jika demand > kapasitas)
 
     nodes_exp, tm_exp, selected_ids_expanded = expand_split_delivery(
-        nodes_orig, tm_orig, selected_raw, settings.VEHICLE_CAPACITY_LITERS
+        nodes_orig, tm_orig, selected_raw, vehicle_capacity
     )
 
     groups, part_to_group = build_groups_from_expanded_ids(selected_ids_expanded)
@@ -424,20 +324,132 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
         depot_id,
     )
 
+    return SolveInstance(
+        selected_raw=selected_raw,
+        selected_expanded=selected_ids_expanded,
+        nodes=nodes_exp,
+        tm=tm_exp,
+        groups=groups,
+        depot_id=depot_id,
+        refill_ids=refill_ids,
+        vehicle_capacity=vehicle_capacity,
+        dataset_version=dataset.version,
+        load_sec=t_load - t0,
+        validate_sec=t_val - t_load,
+    )
+
+
+def _solve(
+    req: OptimizeRequest,
+    on_incumbent: Optional[Callable[[str, List[List[str]], float], None]] = None,
+    token: Optional[CancelToken] = None,
+    time_limit_sec: Optional[float] = None,
+    instance: Optional[SolveInstance] = None,
+) -> OptimizeResponse:
+    """
+    Pipeline construct → ALNS → improve → evaluate.
+    - time_limit_sec: budget total dari scheduler (menyusut saat antrian
+      panjang); default settings.TIME_LIMIT_SEC
+    - on_incumbent(stage, routes, makespan): dipanggil untuk solusi greedy dan
+      tiap incumbent baru dari ALNS/improve (dipakai /optimize/stream)
+    - token: CancelToken dari API (disconnect, stop, DELETE job, request yang
+      di-supersede). Tiap tahap dapat token turunan dengan deadline budget-nya
+      sendiri dan mengembalikan solusi terbaik saat itu kalau batal
+    - instance: hasil _prepare_instance (kapasitas kendaraan ikut di situ);
+      None = disiapkan dari req dengan settings.VEHICLE_CAPACITY_LITERS
+    """
+    t0 = time.perf_counter()
+
+    # 1-5) LOAD, VALIDASI, EXPAND (dilewati kalau instance sudah disiapkan,
+    # mis. skenario /optimize/batch)
+    prepared_here = instance is None
+    if instance is None:
+        instance = _prepare_instance(
+            req.selected_node_ids, settings.VEHICLE_CAPACITY_LITERS
+        )
+    nodes_exp, tm_exp = instance.nodes, instance.tm
+    selected_raw = instance.selected_raw
+    selected_ids_expanded = instance.selected_expanded
+    groups = instance.groups
+    depot_id, refill_ids = instance.depot_id, instance.refill_ids
+    capacity = instance.vehicle_capacity
+    t_val = time.perf_counter()
+
     # === TIME BUDGET & ALNS CONFIG ===
-    TOTAL_TL = float(getattr(settings, "TIME_LIMIT_SEC", 6.0))
+    # batas atas: budget scheduler (menyusut saat antrian panjang) & max_time_sec
+    TIME_CAP = float(
+        time_limit_sec
+        if time_limit_sec is not None
+        else getattr(settings, "TIME_LIMIT_SEC", 6.0)
+    )
+    if req.max_time_sec is not None:
+        TIME_CAP = min(TIME_CAP, float(req.max_time_sec))
+    # adaptif: budget dari ukuran instance, tahap search berhenti saat konvergen
+    ADAPTIVE = bool(settings.ADAPTIVE_TIME_BUDGET)
+    n_service = len(selected_ids_expanded)
+    TOTAL_TL = (
+        plan_time_budget(
+            n_service,
+            TIME_CAP,
+            min_sec=settings.BUDGET_MIN_SEC,
+            sec_per_node=settings.BUDGET_SEC_PER_NODE,
+        )
+        if ADAPTIVE
+        else TIME_CAP
+    )
     ALNS_FRAC = float(getattr(settings, "ALNS_TIME_FRAC", 0.6))  # 60% ke ALNS
     USE_ALNS = bool(getattr(settings, "USE_ALNS", True))
     LAMBDA_CAP = float(
         getattr(settings, "ALNS_LAMBDA_CAPACITY", 0.0)
     )  # penalti kapasitas (0=off)
 
+    TARGET_GAP = float(
+        req.target_gap
+        if req.target_gap is not None
+        else getattr(settings, "LB_TARGET_GAP", 0.0)
+    )
+
     alns_time = max(0.0, TOTAL_TL * ALNS_FRAC)
     improv_time = max(0.1, TOTAL_TL - alns_time)
 
+    def stage_monitor(
+        limit_sec: float, target_iters: Optional[int] = None
+    ) -> Optional[ConvergenceMonitor]:
+        if not ADAPTIVE:
+            return None
+        return ConvergenceMonitor(
+            limit_sec,
+            target_iters=target_iters,
+            stall_frac=settings.BUDGET_STALL_FRAC,
+            stall_min_sec=settings.BUDGET_STALL_MIN_SEC,
+            min_rate=settings.BUDGET_MIN_IMPROVE_RATE,
+        )
+
+    # deadline seluruh solve; tahap-tahap di bawah memakai token turunan
+    token = token or CancelToken()
+    run_token = token.child(TOTAL_TL + settings.CONSTRUCT_TIME_CAP_SEC)
+
+    # lower bound makespan → early stop ALNS/improve kalau sudah cukup dekat
+    lb = makespan_lower_bound(
+        nodes=nodes_exp,
+        tm=tm_exp,
+        groups=groups,
+        depot_id=depot_id,
+        refill_ids=refill_ids,
+        num_vehicles=req.num_vehicles,
+        vehicle_capacity=capacity,
+    )
+    log.info(
+        "LOWER BOUND makespan=%.2f (work/K=%.2f, round_trip=%.2f, refills>=%d)",
+        lb.value,
+        lb.work_per_vehicle,
+        lb.longest_round_trip,
+        lb.refill_trips,
+    )
+
     alns_cfg = ALNSConfig(
         time_limit_sec=alns_time,
-        seed=42,
+        seed=int(getattr(settings, "ALNS_SEED", 42)),
         init_temperature=float(getattr(settings, "ALNS_INIT_TEMP", 1_000.0)),
         cooling_rate=float(getattr(settings, "ALNS_COOLING_RATE", 0.995)),
         min_temperature=float(getattr(settings, "ALNS_MIN_TEMP", 1e-3)),
@@ -452,78 +464,166 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
         use_construct_as_repair=bool(
             getattr(settings, "ALNS_USE_CONSTRUCT_AS_REPAIR", False)
         ),
+        max_no_improve=int(getattr(settings, "ALNS_MAX_NO_IMPROVE", 10000)),
+        split_period=int(getattr(settings, "ALNS_SPLIT_PERIOD", 50)),
+        target_gap=TARGET_GAP,
     )
 
     # 6) CONSTRUCT (pakai nodes_exp, tm_exp, selected_ids_expanded)
-    log.info("CONSTRUCT start")
-    routes = run_step(
-        lambda: greedy_construct(
+    construct_method = req.construct_method or settings.CONSTRUCT_METHOD
+    if construct_method != "portfolio" and construct_method not in CONSTRUCTORS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown construct_method: {construct_method} (available: {sorted(CONSTRUCTORS) + ['portfolio']})",
+        )
+    # portfolio: semua heuristik paralel, skor pakai objective ALNS
+    methods = (
+        list(settings.CONSTRUCT_PORTFOLIO)
+        if construct_method == "portfolio"
+        else [construct_method]
+    )
+    log.info("CONSTRUCT start (methods=%s)", methods)
+    candidates = run_step(
+        lambda: construct_portfolio(
+            methods=methods,
+            executor=CONSTRUCT_EXEC,
+            time_cap_sec=settings.CONSTRUCT_TIME_CAP_SEC,
             nodes=nodes_exp,
             tm=tm_exp,
             selected_parks=selected_ids_expanded,  # <— PAKAI YANG EXPANDED
             depot_id=depot_id,
             num_vehicles=req.num_vehicles,
-            vehicle_capacity=settings.VEHICLE_CAPACITY_LITERS,
+            vehicle_capacity=capacity,
             allow_refill=settings.ALLOW_REFILL,
             refill_ids=refill_ids,
+            split_objective=settings.SPLIT_OBJECTIVE,
+            token=run_token.child(settings.CONSTRUCT_TIME_CAP_SEC),
         ),
-        5.0,
-        "greedy_construct",
+        settings.CONSTRUCT_TIME_CAP_SEC + 5.0,
+        "construct",
     )
     t_cons = time.perf_counter()
-    log.info("CONSTRUCT done in %.3fs", t_cons - t_val)
+    seeds = [c for c in candidates if c.status == "ok"]
+    routes = seeds[0].routes
+    log.info(
+        "CONSTRUCT done in %.3fs (best=%s, cost=%.2f)",
+        t_cons - t_val,
+        seeds[0].method,
+        seeds[0].cost,
+    )
 
-    if len(routes) == 1 and req.num_vehicles > 1:
-        routes = split_route_into_k_by_load(
-            route=routes[0],
-            nodes=nodes_exp,
-            vehicle_capacity=settings.VEHICLE_CAPACITY_LITERS,
-            k=req.num_vehicles,
-            depot_id=depot_id,
-            groups=groups,  # <-- TAMBAHKAN INI
-            part_to_group=part_to_group,
-        )
+    def emit(stage: str):
+        def _cb(best_routes: List[List[str]], _cost: float = 0.0):
+            if on_incumbent is not None:
+                on_incumbent(
+                    stage, best_routes, makespan_minutes(best_routes, nodes_exp, tm_exp)
+                )
+
+        return _cb
+
+    emit("construct")(routes)
 
     # 7) ALNS (opsional) → lalu IMPROVE
     alns_dur = 0.0
     improv_dur = 0.0
+    alns_tel: Optional[ALNSTelemetry] = None
+    alns_portfolio: List[dict] = []
+    alns_mon: Optional[ConvergenceMonitor] = None
 
     if USE_ALNS and alns_time > 0.05:
-        log.info("ALNS start (limit=%.1fs)", alns_cfg.time_limit_sec)
+        # top-N solusi awal → N ALNS paralel (seed beda), ambil yang terbaik
+        alns_seeds = seeds[: max(1, int(settings.ALNS_PORTFOLIO_SIZE))]
+        log.info(
+            "ALNS start (limit=%.1fs, runs=%d)",
+            alns_cfg.time_limit_sec,
+            len(alns_seeds),
+        )
         t_alns0 = time.perf_counter()
-        routes = run_step(
-            lambda: alns_optimize(
-                init_routes=routes,
+        alns_lock = threading.Lock()
+        alns_best = [float("inf")]
+
+        def on_alns_improve(best_routes: List[List[str]], cost: float):
+            # beberapa run paralel: hanya incumbent global yang di-stream
+            with alns_lock:
+                if cost >= alns_best[0]:
+                    return
+                alns_best[0] = cost
+            emit("alns")(best_routes, cost)
+
+        def run_alns(i: int):
+            tel = ALNSTelemetry()
+            mon = stage_monitor(
+                alns_cfg.time_limit_sec, settings.ALNS_ITERS_PER_NODE * n_service
+            )
+            out = alns_optimize(
+                init_routes=alns_seeds[i].routes,
                 nodes=nodes_exp,
                 tm=tm_exp,
-                vehicle_capacity=settings.VEHICLE_CAPACITY_LITERS,
+                vehicle_capacity=capacity,
                 refill_ids=refill_ids,
                 depot_id=depot_id,
                 allow_refill=settings.ALLOW_REFILL,
                 cfg=alns_cfg,
                 groups=groups,
-            ),
+                lower_bound=lb.value,
+                on_improve=on_alns_improve,
+                token=run_token.child(alns_cfg.time_limit_sec),
+                telemetry=tel,
+                ctx=RunContext(seed=alns_cfg.seed + i),
+                monitor=mon,
+            )
+            return out, tel, mon
+
+        def run_alns_portfolio():
+            if len(alns_seeds) == 1:
+                return [run_alns(0)]
+            futs = [CONSTRUCT_EXEC.submit(run_alns, i) for i in range(len(alns_seeds))]
+            return [f.result() for f in futs]
+
+        alns_runs = run_step(
+            run_alns_portfolio,
             timeout_sec=alns_cfg.time_limit_sec + 1.0,  # sedikit buffer
             name="alns_optimize",
         )
+        run_costs = [routes_objective(r, nodes_exp, tm_exp) for r, _, _ in alns_runs]
+        best_run = min(range(len(alns_runs)), key=run_costs.__getitem__)
+        routes, alns_tel, alns_mon = alns_runs[best_run]
+        alns_portfolio = [
+            {
+                "seed_method": c.method,
+                "seed_cost": round(c.cost, 4),
+                "cost": round(cost, 4),
+                "best": i == best_run,
+            }
+            for i, (c, cost) in enumerate(zip(alns_seeds, run_costs))
+        ]
         t_alns1 = time.perf_counter()
         alns_dur = t_alns1 - t_alns0
         log.info("ALNS done in %.3fs", alns_dur)
     else:
         log.info("ALNS skipped (USE_ALNS=%s, time=%.2fs)", USE_ALNS, alns_time)
 
+    if ADAPTIVE:
+        # waktu yang tidak dipakai ALNS (konvergen lebih awal) pindah ke improve
+        improv_time = max(0.1, TOTAL_TL - (time.perf_counter() - t_cons))
+    improv_mon = stage_monitor(improv_time)
     log.info("IMPROVE start (limit=%.1fs)", improv_time)
     t_impr0 = time.perf_counter()
     routes = improve_routes(
         routes,
         nodes_exp,
         tm_exp,
-        vehicle_capacity=settings.VEHICLE_CAPACITY_LITERS,  # ⬅️ baru
+        vehicle_capacity=capacity,  # ⬅️ baru
         refill_ids=refill_ids,  # ⬅️ baru
         depot_id=depot_id,  # ⬅️ baru
         time_limit_sec=improv_time,
         max_no_improve=settings.IMPROVE_MAX_NO_IMPROVE,
         groups=groups,
+        lower_bound=lb.value,
+        target_gap=TARGET_GAP,
+        on_improve=emit("improve"),
+        token=run_token.child(improv_time),
+        monitor=improv_mon,
     )
     t_impr1 = time.perf_counter()
     improv_dur = t_impr1 - t_impr0
@@ -540,8 +640,9 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
         nodes_exp,
         tm_exp,
         depot_id,
-        vehicle_capacity=settings.VEHICLE_CAPACITY_LITERS,
+        vehicle_capacity=capacity,
         refill_ids=refill_ids,
+        token=run_token,
     )
     t_eg1 = time.perf_counter()
     ensure_groups_dur = t_eg1 - t_eg0
@@ -560,7 +661,7 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
     routes, _final_ins = ensure_all_routes_capacity(
         routes,
         nodes_exp,
-        settings.VEHICLE_CAPACITY_LITERS,
+        capacity,
         refill_ids,
         tm_exp,
         depot_id,
@@ -568,82 +669,258 @@ def _solve(req: OptimizeRequest) -> OptimizeResponse:
 
     # final safety: satukan grup + kapasitas
 
-    # 8) EVALUATE (pakai nodes_exp, tm_exp)
-    obj_time = makespan_minutes(routes, nodes_exp, tm_exp)
-    results: list[RouteResult] = []
-    for vid, r in enumerate(routes):
-        if len(r) <= 2:
-            continue
-        results.append(
-            RouteResult(
-                vehicle_id=vid,
-                sequence=r,
-                total_time_min=route_time_minutes(r, nodes_exp, tm_exp),
-                load_profile_liters=load_profile_liters(
-                    r, nodes_exp, settings.VEHICLE_CAPACITY_LITERS
-                ),
-            )
+    # 8) EVALUATE (pakai nodes_exp, tm_exp): satu pass per rute untuk
+    # RouteResult maupun diagnostics
+    evals = [evaluate_route(r, nodes_exp, tm_exp, capacity) for r in routes]
+    obj_time = max(
+        (ev.duration_min for r, ev in zip(routes, evals) if len(r) > 1), default=0.0
+    )
+    results: list[RouteResult] = [
+        RouteResult(
+            vehicle_id=vid,
+            sequence=r,
+            total_time_min=ev.duration_min,
+            load_profile_liters=ev.load_profile,
         )
+        for vid, (r, ev) in enumerate(zip(routes, evals))
+        if len(r) > 2
+    ]
     t_eval = time.perf_counter()
 
-    route_refills = []
-    for r in routes:
-        refill_pos = [i for i, nid in enumerate(r) if nodes_exp[nid].type == "refill"]
-        route_refills.append({"sequence": r, "refill_indices": refill_pos})
-
-    cap_diag = []
-    for vid, r in enumerate(routes):
-        trace, viol = capacity_trace_and_violations(
-            r, nodes_exp, settings.VEHICLE_CAPACITY_LITERS
-        )
-        if viol:
-            cap_diag.append(
-                {
-                    "vehicle_id": vid,
-                    "sequence": r,
-                    "violations": [
-                        {"idx": i, "node": nid, "liters_short": short}
-                        for (i, nid, short) in viol
-                    ],
-                }
-            )
+    route_refills = [
+        {"vehicle_id": vid, "refill_indices": ev.refill_indices}
+        for vid, ev in enumerate(evals)
+    ]
+    cap_diag = [
+        {
+            "vehicle_id": vid,
+            "violations": [
+                {"idx": i, "node": nid, "liters_short": short}
+                for (i, nid, short) in ev.violations
+            ],
+        }
+        for vid, ev in enumerate(evals)
+        if ev.violations
+    ]
 
-    return OptimizeResponse(
-        objective_time_min=obj_time,
-        vehicle_used=len(results),
-        routes=results,
-        diagnostics={
+    # diagnostics sesuai level: none → {}, summary → ringkasan & angka,
+    # full → + portfolio, telemetry ALNS, posisi refill/pelanggaran, daftar id
+    level = req.diagnostics_level or settings.DIAGNOSTICS_LEVEL
+    diagnostics: Dict[str, object] = {}
+    if level != "none":
+        diagnostics = {
             "depot_id": depot_id,
             "nodes_loaded": len(nodes_exp),
             "refill_count": len(refill_ids),
+            "construct_method": construct_method,
+            "cancelled": token.cancelled(),
             "timing_sec": {
-                "load": round(t_load - t0, 4),
-                "validate": round(t_val - t_load, 4),
+                "load": round(instance.load_sec if prepared_here else 0.0, 4),
+                "validate": round(instance.validate_sec if prepared_here else 0.0, 4),
                 "construct": round(t_cons - t_val, 4),
                 "alns": round(alns_dur, 4),
                 "improve": round(improv_dur, 4),
                 "evaluate": round(t_eval - max(t_impr1, t_cons), 4),
                 "total": round(t_eval - t0, 4),
+                "budget": round(TOTAL_TL, 4),
+            },
+            "budget": {
+                "adaptive": ADAPTIVE,
+                "cap_sec": round(TIME_CAP, 4),
+                "planned_sec": round(TOTAL_TL, 4),
+                "service_nodes": n_service,
+                "alns": alns_mon.to_dict() if alns_mon else None,
+                "improve": improv_mon.to_dict() if improv_mon else None,
             },
-            # --- HAPUS BAGIAN "expanded" PERTAMA DI SINI ---
-            "alns_config": {
-                "used": USE_ALNS,
-                "time_limit_sec": alns_cfg.time_limit_sec if USE_ALNS else 0.0,
-                "lambda_capacity": alns_cfg.lambda_capacity,
-                "k_remove": [alns_cfg.k_remove_min, alns_cfg.k_remove_max],
+            "alns": (
+                {
+                    "iterations": alns_tel.iterations,
+                    "elapsed_sec": round(alns_tel.elapsed_sec, 4),
+                    "stop_reason": alns_tel.stop_reason,
+                }
+                if alns_tel
+                else None
+            ),
+            "lower_bound": {
+                **lb.to_dict(),
+                "makespan": round(obj_time, 4),
+                "gap": round(lb.gap(obj_time), 6),
+                "target_gap": TARGET_GAP,
             },
-            "refill_positions": route_refills,
-            "capacity_violations": cap_diag,
-            # --- GUNAKAN DEFINISI "expanded" YANG KEDUA (LEBIH LENGKAP) ---
+            "refill_stops": sum(len(ev.refill_indices) for ev in evals),
+            "capacity_violation_count": sum(len(ev.violations) for ev in evals),
             "expanded": {
-                "selected_in": selected_raw,
-                "selected_expanded": selected_ids_expanded,
+                "selected_count": len(selected_raw),
+                "expanded_count": len(selected_ids_expanded),
                 "groups_count": len(groups),
             },
-        },
+        }
+    if level == "full":
+        diagnostics.update(
+            {
+                "construct_portfolio": [c.to_dict() for c in candidates],
+                "alns_portfolio": alns_portfolio,
+                "alns_config": {
+                    "used": USE_ALNS,
+                    "time_limit_sec": alns_cfg.time_limit_sec if USE_ALNS else 0.0,
+                    "lambda_capacity": alns_cfg.lambda_capacity,
+                    "k_remove": [alns_cfg.k_remove_min, alns_cfg.k_remove_max],
+                },
+                "alns_telemetry": alns_tel.to_dict() if alns_tel else None,
+                # sequence ada di routes[vehicle_id]; di sini cukup indeksnya
+                "refill_positions": route_refills,
+                "capacity_violations": cap_diag,
+            }
+        )
+        diagnostics["expanded"].update(
+            {
+                "selected_in": selected_raw,
+                "selected_expanded": selected_ids_expanded,
+            }
+        )
+
+    return OptimizeResponse(
+        objective_time_min=obj_time,
+        vehicle_used=len(results),
+        routes=results,
+        dataset_version=instance.dataset_version,
+        diagnostics=diagnostics,
     )
 
 
+# === Worker solver: proses pre-fork (default) atau thread scheduler ===
+POOL: Optional[ProcessSolverPool] = None
+
+
+def _init_solver_process(settings_values: dict) -> None:
+    """Dijalankan di proses worker (di-fork dari forkserver): settings proses
+    API diterapkan, step dijalankan inline (lihat run_step), dataset
+    dipastikan ter-load (biasanya sudah dari preload forkserver)."""
+    global STEP_EXEC, CONSTRUCT_EXEC
+    for key, value in settings_values.items():
+        setattr(settings, key, value)
+    STEP_EXEC = None
+    CONSTRUCT_EXEC = ThreadPoolExecutor(max_workers=settings.CONSTRUCT_WORKERS)
+    DATASETS.get()
+
+
+# instance per worker: (versi dataset, node terpilih, kapasitas) → SolveInstance;
+# skenario batch cukup mengirim kunci ini, bukan instance (matrix) lewat pipe
+_WORKER_INSTANCES: Dict[tuple, SolveInstance] = {}
+_WORKER_INSTANCES_MAX = 8
+
+
+def _worker_instance(selected_node_ids: Tuple[str, ...], capacity: float):
+    key = (DATASETS.get().version, selected_node_ids, capacity)
+    inst = _WORKER_INSTANCES.get(key)
+    if inst is None:
+        if len(_WORKER_INSTANCES) >= _WORKER_INSTANCES_MAX:
+            _WORKER_INSTANCES.pop(next(iter(_WORKER_INSTANCES)))
+        inst = _WORKER_INSTANCES[key] = _prepare_instance(
+            list(selected_node_ids), capacity
+        )
+    return inst
+
+
+def _solve_in_worker(
+    req, on_incumbent, token, time_limit_sec, instance_key=None, **kwargs
+) -> dict:
+    # di proses worker `token` berupa multiprocessing.Event dari pool
+    if not isinstance(token, CancelToken):
+        token = CancelToken(event=token)
+    if instance_key is not None:
+        kwargs["instance"] = _worker_instance(*instance_key)
+    result = _solve(
+        req,
+        on_incumbent=on_incumbent,
+        token=token,
+        time_limit_sec=time_limit_sec,
+        **kwargs,
+    )
+    return result if isinstance(result, dict) else result.dict()
+
+
+def _run_solve(
+    req: OptimizeRequest,
+    on_incumbent: Optional[Callable[[str, List[List[str]], float], None]] = None,
+    token: Optional[CancelToken] = None,
+    time_limit_sec: Optional[float] = None,
+    instance: Optional[SolveInstance] = None,
+) -> dict:
+    """_solve di proses worker kalau POOL aktif, selain itu di thread ini."""
+    if POOL is None:
+        return _solve_in_worker(
+            req, on_incumbent, token, time_limit_sec, instance=instance
+        )
+    tl = settings.TIME_LIMIT_SEC if time_limit_sec is None else time_limit_sec
+    try:
+        return POOL.run(
+            req,
+            tl,
+            on_incumbent=on_incumbent,
+            token=token,
+            timeout=tl + settings.SOLVER_KILL_GRACE_SEC,
+            instance_key=(
+                None
+                if instance is None
+                else (tuple(instance.selected_raw), instance.vehicle_capacity)
+            ),
+        )
+    except SolverTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except SolverWorkerError as e:
+        if e.kind == "http":
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        if e.kind == "runtime":
+            raise RuntimeError(e.detail)
+        raise HTTPException(status_code=500, detail=f"Solver error: {e.detail}")
+
+
+@app.on_event("startup")
+def _check_async_driver() -> None:
+    # engine async dibuat lazily; beri tahu lebih awal kalau drivernya belum ada
+    missing = async_driver_missing()
+    if missing:
+        log.warning(
+            "async DB driver %r not installed; routers on get_async_db will fail",
+            missing,
+        )
+
+
+@app.on_event("startup")
+def _start_solver_pool() -> None:
+    global POOL
+    DATASETS.get()
+    if settings.SOLVER_PROCESS_POOL and "forkserver" in mp.get_all_start_methods():
+        # worker di-fork dari forkserver bersih (bukan proses API yang sudah
+        # punya thread); dataset di-load di forkserver lewat preload
+        POOL = ProcessSolverPool(
+            size=settings.SOLVER_MAX_WORKERS,
+            solve_fn=_solve_in_worker,
+            initializer=_init_solver_process,
+            initargs=(asdict(settings),),
+            max_tasks=settings.SOLVER_WORKER_MAX_TASKS,
+            preload=[f"{__package__}.solver_preload"],
+        )
+        POOL.start()
+
+
+@app.on_event("shutdown")
+def _stop_solver_pool() -> None:
+    global POOL
+    if POOL is not None:
+        POOL.shutdown()
+        POOL = None
+
+
+@app.get("/optimize/workers")
+def optimize_worker_health():
+    """Status worker solver: pid, hidup/sibuk, jumlah solve, recycle per sebab."""
+    if POOL is None:
+        return {"mode": "thread", "size": SCHEDULER.workers}
+    return POOL.health()
+
+
 app.include_router(routes_groups.router)
 app.include_router(routes_catalog.router)
 app.include_router(routes_assign.router)
@@ -654,105 +931,170 @@ app.include_router(routes_history.router)
 log = logging.getLogger(__name__)
 
 
-def _to_node_id(x):
-    # adapt ke format sequence kamu: string, int, dict, tuple, dsb.
-    if isinstance(x, dict):
-        # coba beberapa kunci umum
-        return x.get("node_id") or x.get("id") or x.get("node") or str(x)
-    return str(x)
+# hasil optimasi ditulis bulk oleh thread writer (write-behind); job_id dibuat
+# di sini jadi response tidak menunggu database
+RESULT_WRITER = ResultWriter(
+    engine,
+    max_queue=settings.PERSIST_QUEUE_MAX,
+    batch_max=settings.PERSIST_BATCH_MAX,
+)
+
+
+def _persist_result(
+    result: dict, req: Optional[OptimizeRequest] = None
+) -> Optional[str]:
+    """Simpan hasil optimasi (job + ringkasan kendaraan + langkah rute); return job_id."""
+    if not result.get("routes"):
+        # kalau tak ada route, tidak ada yang disimpan
+        return None
+    job_id = str(uuid4())
+    try:
+        rows = result_rows(
+            job_id,
+            result,
+            params=(
+                req.dict(exclude={"supersede_key"}, exclude_none=True)
+                if req is not None
+                else None
+            ),
+            with_diagnostics=settings.PERSIST_DIAGNOSTICS,
+        )
+        if settings.PERSIST_WRITE_BEHIND:
+            RESULT_WRITER.submit(job_id, rows)
+        else:
+            RESULT_WRITER.write_now(job_id, rows)
+    except Exception as e:
+        log.exception("❌ Error saving optimization log (job_id=%s): %s", job_id, e)
+        raise HTTPException(
+            status_code=500, detail=f"Failed to save optimization log: {e}"
+        )
+    return job_id
+
+
+@app.on_event("shutdown")
+def _flush_result_writer() -> None:
+    RESULT_WRITER.close()
+
+
+@app.on_event("shutdown")
+async def _dispose_async_engine() -> None:
+    await dispose_async_engine()
+
+
+@app.get("/optimize/persistence")
+def optimize_persistence_metrics():
+    """Antrian write-behind hasil optimasi: kedalaman, durasi tulis, gagal."""
+    return RESULT_WRITER.metrics()
+
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={
+            "message": f"Solver queue full ({e.priority}), retry later",
+            "retry_after_sec": round(e.retry_after, 1),
+            "queue": SCHEDULER.metrics(),
+        },
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+
+def _submit(fn, priority: str):
+    """Antrikan fn(time_limit_sec); return (future, estimasi tunggu detik)."""
+    try:
+        fut = SCHEDULER.submit(fn, priority)
+    except QueueFull as e:
+        raise _queue_full(e)
+    return fut, SCHEDULER.estimated_wait(fut)
+
+
+# supersede_key -> token solve yang sedang jalan; request baru dengan key sama
+# membatalkan yang lama (mis. user mengubah pilihan taman sebelum hasil keluar)
+INFLIGHT: Dict[str, CancelToken] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _supersede(key: Optional[str], token: CancelToken) -> CancelToken:
+    if key:
+        with _INFLIGHT_LOCK:
+            prev = INFLIGHT.get(key)
+            INFLIGHT[key] = token
+        if prev is not None:
+            log.info("supersede %r: cancelling previous solve", key)
+            prev.cancel()
+    return token
+
+
+def _release(key: Optional[str], token: CancelToken) -> None:
+    if key:
+        with _INFLIGHT_LOCK:
+            if INFLIGHT.get(key) is token:
+                del INFLIGHT[key]
+
+
+async def _wait_or_disconnect(fut, request: Request, timeout: float):
+    """Tunggu fut (concurrent/asyncio); asyncio.CancelledError kalau client putus."""
+    wrapped = fut if asyncio.isfuture(fut) else asyncio.wrap_future(fut)
+    deadline = time.monotonic() + timeout
+    while True:
+        done, _ = await asyncio.wait({wrapped}, timeout=0.25)
+        if done:
+            return wrapped.result()
+        if await request.is_disconnected():
+            raise asyncio.CancelledError("client disconnected")
+        if time.monotonic() > deadline:
+            raise FTimeout()
 
 
 @app.post("/optimize", response_model=OptimizeResponse)
-def optimize(req: OptimizeRequest):
-    hard_timeout = max(3.0, settings.TIME_LIMIT_SEC + 5.0)
+async def optimize(req: OptimizeRequest, request: Request, response: Response):
+    token = _supersede(req.supersede_key, CancelToken())
+    fut, wait_est = _submit(
+        lambda tl: _run_solve(req, token=token, time_limit_sec=tl),
+        req.priority or "interactive",
+    )
+    response.headers["X-Queue-Wait-Estimate"] = f"{wait_est:.1f}"
+    # admission control sudah membatasi antrian; ini jaring pengaman saja
+    hard_timeout = max(3.0, wait_est * 2 + settings.TIME_LIMIT_SEC + 5.0)
     try:
-        fut = EXECUTOR.submit(_solve, req)
-        result = fut.result(timeout=hard_timeout)
+        result = await _wait_or_disconnect(fut, request, hard_timeout)
 
         # pastikan dict
         if not isinstance(result, dict):
             result = result.dict()
 
-        routes = result.get("routes", [])
-        if not routes:
-            # kalau tak ada route, langsung return saja
-            result["job_id"] = None
-            return result
-
-        db = SessionLocal()
-        job_id = str(uuid4())
-        try:
-            now = datetime.now(timezone.utc)
-
-            for r in routes:
-                # r bisa dict atau objek
-                vehicle_id = (
-                    r["vehicle_id"]
-                    if isinstance(r, dict)
-                    else getattr(r, "vehicle_id", None)
-                )
-                total_time_min = (
-                    r["total_time_min"]
-                    if isinstance(r, dict)
-                    else getattr(r, "total_time_min", None)
-                )
-                sequence = (
-                    r.get("sequence", [])
-                    if isinstance(r, dict)
-                    else getattr(r, "sequence", [])
-                )
-
-                if vehicle_id is None:
-                    raise ValueError("vehicle_id missing in route item")
-
-                # simpan ringkasan kendaraan
-                db.add(
-                    JobVehicleRun(
-                        job_id=job_id,
-                        vehicle_id=vehicle_id,
-                        route_total_time_min=total_time_min,
-                        status="planned",
-                        # expected_finish_local boleh None (nullable)
-                    )
-                )
-
-                # flush supaya error kunci/constraint cepat ketahuan di kendaraan ini
-                db.flush()
-
-                # simpan langkah rute
-                for idx, node in enumerate(sequence):
-                    db.add(
-                        JobStepStatus(
-                            job_id=job_id,
-                            vehicle_id=vehicle_id,
-                            sequence_index=idx,
-                            node_id=_to_node_id(node),  # <- ISI NODE_ID
-                            status="planned",
-                            reason=None,
-                            # ts dikasih—tapi kalau kamu sudah server_default=now(), boleh dihilangkan
-                            ts=now,
-                            author="system",
-                        )
-                    )
-
-                # flush per kendaraan (biar pinpoint error)
-                db.flush()
-
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            log.exception("❌ Error saving optimization log (job_id=%s): %s", job_id, e)
-            # biar kelihatan di response saat debug:
+        # hasil solve yang di-supersede tidak disimpan
+        if token.cancelled():
             raise HTTPException(
-                status_code=500, detail=f"Failed to save optimization log: {e}"
+                status_code=409, detail="Optimization superseded by a newer request"
             )
-        finally:
-            db.close()
+        result["job_id"] = await run_in_threadpool(_persist_result, result, req)
 
-        result["job_id"] = job_id
+        # layout compact dan/atau msgpack (Accept) → body di-encode langsung
+        media = negotiate(request.headers.get("accept"))
+        if req.response_format == "compact" or media != JSON_MEDIA:
+            payload = (
+                compact_result(result) if req.response_format == "compact" else result
+            )
+            return Response(
+                content=encode(payload, media),
+                media_type=media,
+                headers={
+                    "X-Queue-Wait-Estimate": f"{wait_est:.1f}",
+                    "Vary": "Accept",
+                },
+            )
         return result
 
+    except asyncio.CancelledError:
+        # client putus: solver berhenti, tidak ada yang perlu dikirim
+        log.info("/optimize: client disconnected, cancelling solve")
+        token.cancel()
+        SCHEDULER.cancel(fut)
+        return Response(status_code=499)
     except FTimeout:
+        token.cancel()
+        SCHEDULER.cancel(fut)
         raise HTTPException(
             status_code=504, detail=f"Optimization timed out after {hard_timeout:.1f}s"
         )
@@ -765,6 +1107,327 @@ def optimize(req: OptimizeRequest):
         raise HTTPException(
             status_code=500, detail=f"Internal error: {type(e).__name__}: {e}"
         )
+    finally:
+        _release(req.supersede_key, token)
+
+
+def _scenario_row(
+    i: int, sc: BatchScenario, inst: SolveInstance, outcome, include_routes: bool
+) -> BatchScenarioResult:
+    row = BatchScenarioResult(
+        index=i,
+        label=sc.label,
+        num_vehicles=sc.num_vehicles,
+        vehicle_capacity_liters=inst.vehicle_capacity,
+        split_parts=len(inst.selected_expanded),
+        status="ok",
+    )
+    if isinstance(outcome, BaseException):
+        row.status = "failed"
+        row.error = {
+            "status_code": getattr(outcome, "status_code", 500),
+            "detail": getattr(
+                outcome, "detail", f"{type(outcome).__name__}: {outcome}"
+            ),
+        }
+        return row
+    routes = outcome["routes"]
+    row.makespan_min = outcome["objective_time_min"]
+    row.total_time_min = round(sum(r["total_time_min"] for r in routes), 4)
+    row.vehicle_used = outcome["vehicle_used"]
+    row.refill_count = sum(
+        1 for r in routes for nid in r["sequence"] if inst.nodes[nid].type == "refill"
+    )
+    row.solve_time_sec = outcome["diagnostics"].get("timing_sec", {}).get("total")
+    if include_routes:
+        row.result = OptimizeResponse(**outcome)
+    return row
+
+
+@app.post("/optimize/batch", response_model=OptimizeBatchResponse)
+async def optimize_batch(req: OptimizeBatchRequest, request: Request):
+    """
+    Bandingkan beberapa skenario (jumlah kendaraan / kapasitas / batas waktu)
+    untuk satu pilihan taman. Instance di-expand sekali per kapasitas, lalu
+    skenario diantrikan bersamaan ke scheduler (paralel sebanyak worker).
+    Hasil tidak disimpan ke riwayat; pilih skenario lalu panggil /optimize.
+    """
+    if len(req.scenarios) > settings.BATCH_MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many scenarios: {len(req.scenarios)} > {settings.BATCH_MAX_SCENARIOS}",
+        )
+    t0 = time.perf_counter()
+
+    # split delivery bergantung kapasitas → satu instance per kapasitas
+    instances: Dict[float, SolveInstance] = {}
+    for sc in req.scenarios:
+        cap = float(sc.vehicle_capacity_liters or settings.VEHICLE_CAPACITY_LITERS)
+        if cap not in instances:
+            instances[cap] = await run_in_threadpool(
+                _prepare_instance, req.selected_node_ids, cap
+            )
+    t_prep = time.perf_counter()
+
+    token = CancelToken()
+    priority = req.priority or "batch"
+    jobs: List[Tuple[BatchScenario, SolveInstance]] = []
+    futs = []
+    try:
+        for sc in req.scenarios:
+            inst = instances[
+                float(sc.vehicle_capacity_liters or settings.VEHICLE_CAPACITY_LITERS)
+            ]
+            sreq = OptimizeRequest(
+                selected_node_ids=req.selected_node_ids,
+                num_vehicles=sc.num_vehicles,
+                construct_method=req.construct_method,
+                priority=priority,
+                max_time_sec=sc.time_limit_sec or req.max_time_sec,
+                target_gap=req.target_gap,
+                diagnostics_level="full" if req.include_routes else "summary",
+            )
+            futs.append(
+                SCHEDULER.submit(
+                    lambda tl, sreq=sreq, inst=inst: _run_solve(
+                        sreq, token=token, time_limit_sec=tl, instance=inst
+                    ),
+                    priority,
+                )
+            )
+            jobs.append((sc, inst))
+    except QueueFull as e:
+        token.cancel()
+        for f in futs:
+            SCHEDULER.cancel(f)
+        raise _queue_full(e)
+
+    rounds = math.ceil(len(futs) / SCHEDULER.workers) + 1
+    hard_timeout = SCHEDULER.estimated_wait(futs[0]) * 2 + rounds * (
+        settings.TIME_LIMIT_SEC + settings.SOLVER_KILL_GRACE_SEC
+    )
+    gathered = asyncio.gather(
+        *(asyncio.wrap_future(f) for f in futs), return_exceptions=True
+    )
+    try:
+        outcomes = await _wait_or_disconnect(gathered, request, hard_timeout)
+    except (asyncio.CancelledError, FTimeout) as e:
+        token.cancel()
+        for f in futs:
+            SCHEDULER.cancel(f)
+        if isinstance(e, asyncio.CancelledError):
+            log.info("/optimize/batch: client disconnected, cancelling scenarios")
+            return Response(status_code=499)
+        raise HTTPException(
+            status_code=504,
+            detail=f"Batch optimization timed out after {hard_timeout:.1f}s",
+        )
+
+    rows = [
+        _scenario_row(i, sc, inst, out, req.include_routes)
+        for i, ((sc, inst), out) in enumerate(zip(jobs, outcomes))
+    ]
+    ok = [r for r in rows if r.status == "ok"]
+    best = min(ok, key=lambda r: (r.makespan_min, r.vehicle_used), default=None)
+    return OptimizeBatchResponse(
+        scenarios=rows,
+        best_index=best.index if best else None,
+        prepare_time_sec=round(t_prep - t0, 4),
+        total_time_sec=round(time.perf_counter() - t0, 4),
+    )
+
+
+@app.get("/optimize/queue")
+def optimize_queue_metrics():
+    """Kedalaman antrian per prioritas, worker sibuk, estimasi tunggu, budget."""
+    return SCHEDULER.metrics()
+
+
+# === Job async: POST balik job_id, solve jalan di worker SCHEDULER ===
+def _run_job(job: SolveJob, time_limit_sec: float) -> dict:
+    result = _run_solve(
+        job.request,
+        on_incumbent=job.on_incumbent,
+        token=job.token,
+        time_limit_sec=time_limit_sec,
+    )
+    if not isinstance(result, dict):
+        result = result.dict()
+    # job yang dibatalkan tidak disimpan; best-so-far tetap dikembalikan
+    result["job_id"] = (
+        None if job.token.cancelled() else _persist_result(result, job.request)
+    )
+    return result
+
+
+JOBS = SolveJobManager(SCHEDULER, _run_job, retention_sec=settings.JOB_RETENTION_SEC)
+
+
+def _job_out(job: SolveJob) -> OptimizeJobOut:
+    return OptimizeJobOut(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        priority=job.priority,
+        queue_position=JOBS.queue_position(job),
+        estimated_wait_sec=JOBS.estimated_wait(job),
+        progress=job.progress,
+        result=job.result,
+        error=job.error,
+    )
+
+
+@app.post("/optimize/jobs", response_model=OptimizeJobOut, status_code=202)
+def submit_optimize_job(req: OptimizeRequest):
+    """Antrikan optimasi; poll GET /optimize/jobs/{job_id} untuk status & hasil."""
+    try:
+        job = JOBS.submit(req, priority=req.priority or "batch")
+    except QueueFull as e:
+        raise _queue_full(e)
+    return _job_out(job)
+
+
+@app.get("/optimize/jobs/{job_id}", response_model=OptimizeJobOut)
+def get_optimize_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_out(job)
+
+
+@app.delete("/optimize/jobs/{job_id}", response_model=OptimizeJobOut)
+def cancel_optimize_job(job_id: str):
+    """Batalkan job: yang masih antri langsung batal, yang jalan dihentikan."""
+    job = JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_out(job)
+
+
+# === Streaming incumbent (SSE) ===
+# stream_id -> (token, stopped); endpoint stop menandai `stopped` lalu membatalkan
+# token supaya best saat itu tetap disimpan & dikirim ("terima best sekarang")
+STREAMS: Dict[str, Tuple[CancelToken, threading.Event]] = {}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/optimize/stream")
+async def optimize_stream(req: OptimizeRequest):
+    """
+    Sama seperti /optimize tapi sebagai Server-Sent Events:
+    - `started`   : {stream_id}
+    - `incumbent` : solusi greedy lalu tiap incumbent baru dari ALNS/improve
+    - `result`    : OptimizeResponse final (+ job_id) setelah disimpan
+    - `error`     : {status_code, detail} (409 kalau di-supersede)
+    Client bisa POST /optimize/stream/{stream_id}/stop untuk berhenti lebih awal
+    dan menerima best saat itu; kalau koneksi putus solver juga dihentikan dan
+    hasilnya tidak disimpan.
+    """
+    stream_id = str(uuid4())
+    token = _supersede(req.supersede_key, CancelToken())
+    stopped = threading.Event()
+    loop = asyncio.get_running_loop()
+    # diisi dari thread solver lewat call_soon_threadsafe; None = solve selesai
+    events: "asyncio.Queue[Optional[Tuple[str, dict]]]" = asyncio.Queue()
+    t_start = time.perf_counter()
+
+    def on_incumbent(stage: str, routes: List[List[str]], makespan: float):
+        loop.call_soon_threadsafe(
+            events.put_nowait,
+            (
+                "incumbent",
+                {
+                    "stage": stage,
+                    "makespan_min": makespan,
+                    "elapsed_sec": round(time.perf_counter() - t_start, 3),
+                    "routes": [r for r in routes if len(r) > 2],
+                },
+            ),
+        )
+
+    def run(time_limit_sec: float) -> dict:
+        result = _run_solve(
+            req,
+            on_incumbent=on_incumbent,
+            token=token,
+            time_limit_sec=time_limit_sec,
+        )
+        if not isinstance(result, dict):
+            result = result.dict()
+        # batal karena disconnect/supersede → jangan simpan (sama seperti
+        # /optimize); batal lewat endpoint stop → best saat itu tetap disimpan
+        if token.cancelled() and not stopped.is_set():
+            raise HTTPException(
+                status_code=409, detail="Optimization superseded by a newer request"
+            )
+        result["job_id"] = _persist_result(result, req)
+        return result
+
+    fut, wait_est = _submit(run, req.priority or "interactive")
+    STREAMS[stream_id] = (token, stopped)
+    done = asyncio.wrap_future(fut)
+
+    def _finished(f: asyncio.Future) -> None:
+        # jalan di loop setelah incumbent yang lebih dulu dijadwalkan; error
+        # ditandai sudah dibaca (stream yang sudah putus tidak membacanya)
+        if not f.cancelled():
+            f.exception()
+        events.put_nowait(None)
+
+    done.add_done_callback(_finished)
+
+    async def gen():
+        try:
+            yield _sse(
+                "started",
+                {"stream_id": stream_id, "estimated_wait_sec": round(wait_est, 3)},
+            )
+            # koneksi putus → Starlette membatalkan generator di await ini
+            while (item := await events.get()) is not None:
+                yield _sse(*item)
+
+            try:
+                yield _sse("result", done.result())
+            except HTTPException as e:
+                yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+            except Exception as e:
+                log.exception("Unhandled error in /optimize/stream")
+                yield _sse(
+                    "error",
+                    {"status_code": 500, "detail": f"{type(e).__name__}: {e}"},
+                )
+        except asyncio.CancelledError:
+            log.info("stream %s: client disconnected, stopping", stream_id)
+            raise
+        finally:
+            # koneksi putus / selesai → bebaskan solver secepatnya
+            token.cancel()
+            SCHEDULER.cancel(fut)
+            _release(req.supersede_key, token)
+            STREAMS.pop(stream_id, None)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/optimize/stream/{stream_id}/stop")
+def stop_optimize_stream(stream_id: str):
+    """Hentikan search; stream akan mengirim `result` dengan best saat ini."""
+    entry = STREAMS.get(stream_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    token, stopped = entry
+    stopped.set()
+    token.cancel()
+    return {"stream_id": stream_id, "stopping": True}
 
 
 class NodeOut(BaseModel):
@@ -773,26 +1436,75 @@ class NodeOut(BaseModel):
     lat: float
     lon: float
     kind: Optional[Literal["depot", "refill", "park"]] = None
+    demand: Optional[float] = None  # liter
+
+
+@dataclass(frozen=True)
+class _NodesBody:
+    version: str
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    gzip_etag: str
+
+
+# body /nodes yang sudah di-serialize (+ gzip) untuk dataset versi terakhir
+_NODES_BODY: Optional[_NodesBody] = None
+
+
+def _nodes_body() -> _NodesBody:
+    global _NODES_BODY
+    dataset = DATASETS.get()
+    cached = _NODES_BODY
+    if cached is not None and cached.version == dataset.version:
+        return cached
+    out = [
+        NodeOut(
+            id=n.id,
+            name=n.name,
+            lat=float(n.lat),
+            lon=float(n.lon),
+            kind=n.type,
+            demand=float(n.demand_liters),
+        ).dict()
+        for n in (dataset.nodes[nid] for nid in dataset.ids)
+    ]
+    body = json.dumps(out, separators=(",", ":")).encode()
+    etag = make_etag(body)
+    cached = _NODES_BODY = _NodesBody(
+        version=dataset.version,
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=etag,
+        # ETag kuat per representasi: varian gzip beda byte, beda tag
+        gzip_etag=etag[:-1] + '-gz"',
+    )
+    return cached
 
 
 @app.get("/nodes", response_model=List[NodeOut])
-def list_nodes():
+def list_nodes(request: Request):
+    """
+    Katalog node dataset aktif. Body di-serialize & di-gzip sekali per versi
+    dataset; ETag kuat + If-None-Match → 304, jadi client bisa revalidasi
+    tiap buka halaman hampir tanpa biaya.
+    """
     try:
-        nodes_dict, ids_in_order = load_nodes_csv(settings.DATA_NODES_PATH)
+        nb = _nodes_body()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read nodes: {e}")
 
-    out: List[NodeOut] = []
-    for nid in ids_in_order:
-        n = nodes_dict[nid]
-        # field di Node: id, name, lat, lon, type, demand_liters, service_min
-        out.append(
-            NodeOut(
-                id=n.id,
-                name=getattr(n, "name", None),
-                lat=float(n.lat),
-                lon=float(n.lon),
-                kind=getattr(n, "type", None),
-            )
-        )
-    return out
+    use_gzip = accepts_gzip(request.headers.get("accept-encoding"))
+    etag = nb.gzip_etag if use_gzip else nb.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Dataset-Version": nb.version,
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(nb.gzip_body, media_type=JSON_MEDIA, headers=headers)
+    return Response(nb.body, media_type=JSON_MEDIA, headers=headers)
@@ -1,10 +1,20 @@
 # database.py
+import importlib.util
 import os
+from typing import Optional
 
 from dotenv import load_dotenv  # <--- 1. TAMBAHKAN INI
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from .settings import settings
+
 load_dotenv()  # <--- 1. TAMBAHKAN INI JUGA, UNTUK MEMBACA FILE .env
 
 # --- 2. UBAH BAGIAN INI ---
@@ -28,3 +38,85 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Async (router yang sudah dimigrasi: Depends(get_async_db)) ---
+# Engine sync di atas tetap dipakai writer hasil solver (thread) dan router
+# lama. URL async diturunkan dari DATABASE_URL kecuali ASYNC_DATABASE_URL diisi.
+# Engine dibuat saat pertama dipakai, jadi import modul ini (worker solver,
+# skrip) tidak butuh asyncpg/aiosqlite.
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+_ASYNC_DRIVER_MODULES = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _async_url(url: str) -> URL:
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}")
+    u = u.set(drivername=_ASYNC_DRIVERS[backend])
+    if backend == "postgresql":
+        # cache prepared statement asyncpg per koneksi (0 kalau lewat pgbouncer
+        # transaction pooling)
+        u = u.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+    return u
+
+
+def _async_database_url() -> str:
+    return os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL
+
+
+def async_driver_missing() -> Optional[str]:
+    """Nama modul driver async yang belum terpasang, atau None kalau siap."""
+    backend = make_url(_async_database_url()).get_backend_name()
+    module = _ASYNC_DRIVER_MODULES.get(backend)
+    if module is None or importlib.util.find_spec(module) is not None:
+        return None
+    return module
+
+
+def _create_async_engine() -> AsyncEngine:
+    url = _async_url(_async_database_url())
+    kwargs = {"pool_pre_ping": True, "query_cache_size": settings.DB_QUERY_CACHE_SIZE}
+    if url.get_backend_name() == "postgresql":
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SEC,
+            pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+        )
+    return create_async_engine(url, **kwargs)
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessions: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_sessions
+    if _async_engine is None:
+        missing = async_driver_missing()
+        if missing:
+            raise RuntimeError(
+                f"Async DB driver {missing!r} is not installed (pip install {missing})"
+            )
+        _async_engine = _create_async_engine()
+        _async_sessions = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessions
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_sessions = None
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _async_sessions() as db:
+        yield db
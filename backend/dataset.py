@@ -0,0 +1,58 @@
+# dataset.py
+# Registry dataset (nodes + time matrix) yang di-load sekali dan dipakai ulang
+# semua solve. Versi = hash (path, mtime, size) file CSV; kalau file berubah,
+# dataset di-load ulang otomatis pada get() berikutnya.
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .engine.data import Node, TimeMatrix, load_nodes_csv, load_time_matrix_csv
+from .settings import settings
+
+log = logging.getLogger("meta-vrp.dataset")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    version: str
+    nodes: Dict[str, Node]
+    ids: List[str]
+    tm: TimeMatrix
+
+
+def _version(*paths: str) -> str:
+    h = hashlib.sha1()
+    for p in paths:
+        st = os.stat(p)
+        h.update(f"{os.path.abspath(p)}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return h.hexdigest()[:16]
+
+
+class DatasetRegistry:
+    """Cache dataset aktif; path dibaca dari settings tiap get()."""
+
+    def __init__(self):
+        self._current: Optional[Dataset] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Dataset:
+        nodes_path, matrix_path = settings.DATA_NODES_PATH, settings.DATA_MATRIX_PATH
+        version = _version(nodes_path, matrix_path)
+        ds = self._current
+        if ds is not None and ds.version == version:
+            return ds
+        with self._lock:
+            if self._current is None or self._current.version != version:
+                nodes, ids = load_nodes_csv(nodes_path)
+                tm = load_time_matrix_csv(matrix_path, ids)
+                self._current = Dataset(version=version, nodes=nodes, ids=ids, tm=tm)
+                log.info("dataset loaded: version=%s, nodes=%d", version, len(ids))
+            return self._current
+
+
+DATASETS = DatasetRegistry()
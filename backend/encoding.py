@@ -0,0 +1,111 @@
+# encoding.py
+# Encoding response optimasi yang ringkas untuk plan besar / koneksi lambat:
+# - layout "compact": sequence rute jadi array indeks ke tabel `ids` bersama
+# - serializer: msgpack (Accept: application/msgpack) atau orjson, keduanya
+#   opsional; tanpa paket itu jatuh ke json stdlib
+from __future__ import annotations
+
+import json
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # opsional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # opsional
+    msgpack = None
+
+JSON_MEDIA = "application/json"
+MSGPACK_MEDIA = "application/msgpack"
+_MSGPACK_ALIASES = (MSGPACK_MEDIA, "application/x-msgpack", "application/vnd.msgpack")
+COMPACT_FORMAT = "compact-v1"
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Media type response dari header Accept (msgpack hanya kalau terpasang)."""
+    if msgpack is not None and accept:
+        if any(m in accept for m in _MSGPACK_ALIASES):
+            return MSGPACK_MEDIA
+    return JSON_MEDIA
+
+
+def encode(payload, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA:
+        return msgpack.packb(payload, use_bin_type=True, default=str)
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(",", ":"), default=str).encode()
+
+
+class _IdTable:
+    def __init__(self):
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def __call__(self, nid: str) -> int:
+        i = self._index.get(nid)
+        if i is None:
+            i = self._index[nid] = len(self.ids)
+            self.ids.append(nid)
+        return i
+
+    def many(self, seq: List[str]) -> List[int]:
+        return [self(nid) for nid in seq]
+
+
+def compact_result(result: dict) -> dict:
+    """
+    OptimizeResponse (dict) → layout compact:
+    {format, ids, objective_time_min, vehicle_used, dataset_version, job_id?,
+     routes: [{vehicle_id, seq: [int], total_time_min, load_profile_liters}],
+     diagnostics}
+    Daftar id di diagnostics (expanded, node pelanggaran) ikut memakai tabel.
+    """
+    table = _IdTable()
+    routes = [
+        {
+            "vehicle_id": r["vehicle_id"],
+            "seq": table.many(r["sequence"]),
+            "total_time_min": r["total_time_min"],
+            "load_profile_liters": r["load_profile_liters"],
+        }
+        for r in result.get("routes", [])
+    ]
+    diagnostics = _compact_diagnostics(result.get("diagnostics") or {}, table)
+    out = {
+        "format": COMPACT_FORMAT,
+        "ids": table.ids,
+        "objective_time_min": result["objective_time_min"],
+        "vehicle_used": result["vehicle_used"],
+        "dataset_version": result.get("dataset_version"),
+        "routes": routes,
+        "diagnostics": diagnostics,
+    }
+    if "job_id" in result:
+        out["job_id"] = result["job_id"]
+    return out
+
+
+def _compact_diagnostics(diag: dict, table: _IdTable) -> dict:
+    diag = dict(diag)
+    expanded = diag.get("expanded")
+    if expanded and "selected_expanded" in expanded:
+        diag["expanded"] = {
+            **expanded,
+            "selected_in": table.many(expanded.get("selected_in", [])),
+            "selected_expanded": table.many(expanded["selected_expanded"]),
+        }
+    if diag.get("capacity_violations"):
+        diag["capacity_violations"] = [
+            {
+                **cv,
+                "violations": [
+                    {**v, "node": table(v["node"])} for v in cv.get("violations", [])
+                ],
+            }
+            for cv in diag["capacity_violations"]
+        ]
+    return diag
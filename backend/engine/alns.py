@@ -4,25 +4,32 @@ from __future__ import annotations
 import logging
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Dict, List, Optional, Tuple
 
+import numpy as np
+
 # Di alns.py (Perbaikan Import)
+from .budget import ConvergenceMonitor
 from .construct import greedy_construct
+from .context import CancelToken, RunContext
 from .data import Node, TimeMatrix
 from .evaluation import route_time_minutes
+from .split import split_routes
 from .utils import (
     SimulatedAnnealing,
     TabuList,
     deepcopy_routes,
     ensure_all_routes_capacity,
     ensure_capacity_with_refills,
-    set_seed,
+    ensure_groups_single_vehicle,
+    groups_on_single_vehicle,
     weighted_choice,
 )
 
 log = logging.getLogger(__name__)
 
+# semua operator menerima keyword `rng` (random.Random milik RunContext)
 DestroyOp = Callable[
     [List[List[str]], Dict[str, Node], TimeMatrix, int, Dict[str, List[str]]],
     Tuple[List[str], List[List[str]]],
@@ -69,7 +76,135 @@ class ALNSConfig:
 
     # repair strategy
     use_construct_as_repair: bool = False
-    rebalance_period: int = 50
+    rebalance_period: int = 10
+    rebalance_k_shortest: int = 2  # kandidat rute tujuan rebalancing
+    # tiap N iterasi `current` di-decode ulang: giant tour → Split (makespan);
+    # diterima kalau objective membaik (0 = off)
+    split_period: int = 50
+
+    # early stop
+    max_no_improve: int = 10000
+    target_gap: float = 0.0  # stop kalau (makespan - LB) / makespan <= ini (0 = off)
+
+
+def balanced_objective(route_durations: List[float]) -> float:
+    """
+    Objective ALNS dari durasi rute AKTIF:
+    makespan + variance + 1e-3 * total + 0.01 * overload (di atas rata-rata).
+    """
+    if not route_durations:
+        return 0.0
+
+    makespan = max(route_durations)
+    total_time = sum(route_durations)
+
+    mean_duration = total_time / len(route_durations)
+    variance = sum((d - mean_duration) ** 2 for d in route_durations) / len(
+        route_durations
+    )
+
+    # bobot keseimbangan
+    alpha = 1.0
+
+    gamma = 1.0  # threshold, 100% dari rata-rata (kalau mau 120% jadikan 1.2)
+    over = [max(0.0, d - gamma * mean_duration) for d in route_durations]
+    overload_penalty = sum(o**2 for o in over)
+
+    return makespan + alpha * variance + 1e-3 * total_time + 0.01 * overload_penalty
+
+
+def route_durations(
+    routes: List[List[str]], nodes: Dict[str, Node], tm: TimeMatrix
+) -> List[float]:
+    """Durasi per rute (sejajar index routes); rute kosong (len <= 2) = 0."""
+    return [route_time_minutes(r, nodes, tm) if len(r) > 2 else 0.0 for r in routes]
+
+
+def routes_objective(
+    routes: List[List[str]], nodes: Dict[str, Node], tm: TimeMatrix
+) -> float:
+    """Objective ALNS untuk satu solusi (dipakai juga untuk skor konstruksi)."""
+    return balanced_objective(
+        [route_time_minutes(r, nodes, tm) for r in routes if len(r) > 2]
+    )
+
+
+@dataclass
+class OperatorStats:
+    calls: int = 0
+    time_sec: float = 0.0  # wall time destroy / repair (+ capacity fix)
+    accepts: int = 0
+    improvements: int = 0  # menghasilkan best baru
+    weight: float = 1.0  # bobot adaptif terakhir
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "time_sec": round(self.time_sec, 4),
+            "accepts": self.accepts,
+            "improvements": self.improvements,
+            "weight": round(self.weight, 4),
+        }
+
+
+@dataclass
+class ALNSTelemetry:
+    """Statistik satu run ALNS; diisi alns_optimize kalau di-pass."""
+
+    destroy: Dict[str, OperatorStats] = field(default_factory=dict)
+    repair: Dict[str, OperatorStats] = field(default_factory=dict)
+    iterations: int = 0
+    elapsed_sec: float = 0.0
+    tabu_skips: int = 0
+    rebalance_calls: int = 0
+    rebalance_accepted: int = 0
+    rebalance_rejected: int = 0
+    split_calls: int = 0
+    split_accepted: int = 0
+    stop_reason: str = "time_limit"
+    # (iterasi, temperatur, current_cost, best_cost), di-sample dengan stride
+    # yang digandakan tiap kali melebihi max_samples
+    temperature: List[Tuple[int, float, float, float]] = field(default_factory=list)
+    sample_every: int = 1
+    max_samples: int = 200
+
+    def sample(self, it: int, T: float, current_cost: float, best_cost: float):
+        if it % self.sample_every:
+            return
+        self.temperature.append((it, T, current_cost, best_cost))
+        if len(self.temperature) > self.max_samples:
+            self.temperature = self.temperature[::2]
+            self.sample_every *= 2
+
+    def to_dict(self) -> dict:
+        return {
+            "iterations": self.iterations,
+            "elapsed_sec": round(self.elapsed_sec, 4),
+            "iterations_per_sec": (
+                round(self.iterations / self.elapsed_sec, 2)
+                if self.elapsed_sec > 0
+                else 0.0
+            ),
+            "stop_reason": self.stop_reason,
+            "tabu_skips": self.tabu_skips,
+            "rebalance": {
+                "calls": self.rebalance_calls,
+                "accepted": self.rebalance_accepted,
+                "rejected": self.rebalance_rejected,
+            },
+            "split": {"calls": self.split_calls, "accepted": self.split_accepted},
+            "destroy": {k: v.to_dict() for k, v in self.destroy.items()},
+            "repair": {k: v.to_dict() for k, v in self.repair.items()},
+            "temperature": [
+                {
+                    "it": it,
+                    "T": round(T, 6),
+                    "current": round(cur, 4),
+                    "best": round(b, 4),
+                }
+                for it, T, cur, b in self.temperature
+            ],
+        }
 
 
 def alns_optimize(
@@ -82,22 +217,36 @@ def alns_optimize(
     allow_refill: bool,
     groups: Dict[str, List[str]],
     cfg: Optional[ALNSConfig] = None,
+    lower_bound: float = 0.0,
+    on_improve: Optional[Callable[[List[List[str]], float], None]] = None,
+    token: Optional[CancelToken] = None,
+    telemetry: Optional[ALNSTelemetry] = None,
+    ctx: Optional[RunContext] = None,
+    monitor: Optional[ConvergenceMonitor] = None,
 ) -> List[List[str]]:
     """
-    Core ALNS loop: Destroy → Repair → Acceptance → Adaptation.
+    Core ALNS loop: Destroy → Repair → Acceptance → Adaptation, plus
+    rebalancing dan decoder Split berkala pada solusi current.
     - init_routes: solusi awal (mis. dari greedy_construct)
+    - lower_bound: LB makespan (lihat bounds.py); dengan cfg.target_gap > 0,
+      loop berhenti begitu makespan best sudah dalam gap tsb dari LB
+    - on_improve(best, best_cost): dipanggil tiap kali best membaik (streaming)
+    - token: CancelToken; kalau batal (cancel/deadline) loop berhenti dan
+      mengembalikan best saat ini
+    - telemetry: kalau di-pass, diisi statistik per operator, rebalance, tabu
+      skip, dan trajektori temperatur SA
+    - ctx: state per-run (RNG + cache rebalancing); default RunContext(cfg.seed).
+      Tidak ada state global, jadi aman dipanggil paralel dari beberapa thread.
+    - monitor: ConvergenceMonitor (budget adaptif); berhenti lebih awal kalau
+      laju perbaikan datar atau target iterasi tercapai
     - returns: solusi terbaik menurut objective (total_time_minutes + optional penalti)
     """
     cfg = cfg or ALNSConfig()
 
-    log.info(f"ALNS starting with seed: {cfg.seed}")
-    set_seed(cfg.seed)
+    ctx = ctx or RunContext(seed=cfg.seed)
+    rng = ctx.rng
 
-    # reset cache failed rebalancing moves untuk run ini
-    if hasattr(_rebalance_longest_shortest, "failed_moves"):
-        _rebalance_longest_shortest.failed_moves.clear()
-    else:
-        _rebalance_longest_shortest.failed_moves = set()
+    log.info(f"ALNS starting with seed: {ctx.seed}")
 
     # --- operator pools ---
     destroy_ops: List[Tuple[str, DestroyOp]] = [
@@ -122,74 +271,111 @@ def alns_optimize(
 
     # acceptance
     sa = SimulatedAnnealing(
-        T=cfg.init_temperature, alpha=cfg.cooling_rate, Tmin=cfg.min_temperature
+        T=cfg.init_temperature,
+        alpha=cfg.cooling_rate,
+        Tmin=cfg.min_temperature,
+        rng=rng,
     )
 
     # tabu
     tabu = TabuList(maxlen=cfg.tabu_tenure)
 
-    # ----- objective helper -----
-    def objective(routes: List[List[str]]) -> float:
-        route_durations = [
-            route_time_minutes(r, nodes, tm) for r in routes if len(r) > 2
-        ]  # Durasi rute aktif
-        if not route_durations:
-            return 0.0
-
-        makespan = max(route_durations)
-        total_time = sum(route_durations)
-
-        mean_duration = total_time / len(route_durations)
-        variance = (
-            sum((d - mean_duration) ** 2 for d in route_durations)
-            / len(route_durations)
-            if route_durations
-            else 0.0
+    # telemetry (selalu diisi; dibuang kalau caller tidak minta)
+    tel = telemetry if telemetry is not None else ALNSTelemetry()
+    d_stats = [tel.destroy.setdefault(n, OperatorStats()) for n, _ in destroy_ops]
+    r_stats = [tel.repair.setdefault(n, OperatorStats()) for n, _ in repair_ops]
+    if cfg.use_construct_as_repair:
+        r_stats = [tel.repair.setdefault("greedy_construct", OperatorStats())] * len(
+            repair_ops
         )
 
-        # bobot keseimbangan
-        alpha = 1.0
-
-        gamma = 1.0  # threshold, 100% dari rata-rata (kalau mau 120% jadikan 1.2)
-        over = [max(0.0, d - gamma * mean_duration) for d in route_durations]
-        overload_penalty = sum(o**2 for o in over)
-
-        return makespan + alpha * variance + 1e-3 * total_time + 0.01 * overload_penalty
+    # ----- objective helper -----
+    def objective(routes: List[List[str]]) -> float:
+        return routes_objective(routes, nodes, tm)
+
+    def within_gap(routes: List[List[str]]) -> bool:
+        if lower_bound <= 0 or cfg.target_gap <= 0:
+            return False
+        # LB mengasumsikan tiap grup di satu kendaraan → bandingkan versi
+        # yang sudah disatukan (seperti output akhir _solve)
+        if not groups_on_single_vehicle(routes, groups):
+            routes = ensure_groups_single_vehicle(
+                routes, groups, nodes, tm, depot_id, vehicle_capacity, refill_ids
+            )
+        makespan = max((route_time_minutes(r, nodes, tm) for r in routes), default=0.0)
+        return makespan - lower_bound <= cfg.target_gap * makespan + 1e-9
 
     # init
     best = deepcopy_routes(init_routes)
     best_cost = objective(best)
     current = deepcopy_routes(best)
     current_cost = best_cost
+    # durasi per rute milik `current` (lazy; dipakai rebalancing)
+    current_durs: Optional[List[float]] = None
+
+    def finish() -> List[List[str]]:
+        tel.iterations = it
+        tel.elapsed_sec = time.time() - start
+        for st, w in zip(d_stats, d_weights):
+            st.weight = w
+        if not cfg.use_construct_as_repair:
+            for st, w in zip(r_stats, r_weights):
+                st.weight = w
+        return best
 
     start = time.time()
     it = 0
+
+    if within_gap(best):
+        log.info("ALNS skipped: initial solution already within target gap of LB")
+        tel.stop_reason = "initial_within_gap"
+        return finish()
+
     reb_accepted = False
 
     # ---- early stop state ----
     no_improve_iters = 0
-    MAX_NO_IMPROVE = 10000  # boleh kamu kecilin/besarin
 
     while time.time() - start < cfg.time_limit_sec:
+        if token is not None and token.cancelled():
+            log.info("ALNS cancelled after %d iterations", it)
+            tel.stop_reason = "stopped"
+            break
+        if monitor is not None:
+            reason = monitor.observe(it, best_cost)
+            if reason is not None:
+                log.info(
+                    "ALNS early stop: %s after %d iterations (best_cost=%.2f)",
+                    reason,
+                    it,
+                    best_cost,
+                )
+                tel.stop_reason = reason
+                break
         it += 1
         improved_best = False  # track apakah di iterasi ini best membaik
 
         # --- pilih operator (roulette by weight) ---
-        di = weighted_choice(d_weights)
-        ri = weighted_choice(r_weights)
+        di = weighted_choice(d_weights, rng)
+        ri = weighted_choice(r_weights, rng)
         d_name, d_op = destroy_ops[di]
         r_name, r_op = repair_ops[ri]
 
         # --- tentukan k (berapa node di-remove) ---
-        k_remove = random.randint(cfg.k_remove_min, cfg.k_remove_max)
+        k_remove = rng.randint(cfg.k_remove_min, cfg.k_remove_max)
 
         # --- DESTROY ---
-        removed, partial = d_op(current, nodes, tm, k_remove, groups)
+        t_op = time.perf_counter()
+        removed, partial = d_op(current, nodes, tm, k_remove, groups, rng=rng)
+        d_stats[di].calls += 1
+        d_stats[di].time_sec += time.perf_counter() - t_op
         if cfg.use_tabu_on_removed_nodes and tabu.contains_any(removed):
             # destroy ini menghasilkan set yg tabu → skip
+            tel.tabu_skips += 1
             continue
 
         # --- REPAIR ---
+        t_op = time.perf_counter()
         if cfg.use_construct_as_repair:
             repaired = greedy_construct(
                 nodes=nodes,
@@ -214,10 +400,13 @@ def alns_optimize(
                     "depot_id": depot_id,
                 },
                 groups,
+                rng=rng,
             )
         repaired, _ins = ensure_all_routes_capacity(
             repaired, nodes, vehicle_capacity, refill_ids, tm, depot_id
         )
+        r_stats[ri].calls += 1
+        r_stats[ri].time_sec += time.perf_counter() - t_op
         new_cost = objective(repaired)
         delta = new_cost - current_cost
 
@@ -230,12 +419,19 @@ def alns_optimize(
 
         if accepted:
             current = repaired
+            current_durs = None
             current_cost = new_cost
+            # index rute & isinya berubah: cache move gagal tidak berlaku lagi
+            ctx.failed_moves.clear()
+            d_stats[di].accepts += 1
+            r_stats[ri].accepts += 1
             # update best
             if new_cost < best_cost - 1e-9:
                 best = deepcopy_routes(repaired)
                 best_cost = new_cost
                 improved_best = True
+                d_stats[di].improvements += 1
+                r_stats[ri].improvements += 1
                 d_scores[di] += cfg.w_improve
                 r_scores[ri] += cfg.w_improve
             else:
@@ -264,195 +460,255 @@ def alns_optimize(
 
         # --- rebalancing ---
         if cfg.rebalance_period > 0 and it % cfg.rebalance_period == 0:
-            rebalanced_routes, rebalanced_cost, reb_accepted = (
+            if current_durs is None:
+                current_durs = route_durations(current, nodes, tm)
+            rebalanced_routes, rebalanced_durs, rebalanced_cost, reb_accepted = (
                 _rebalance_longest_shortest(
                     current,
+                    current_durs,
                     nodes,
                     tm,
                     vehicle_capacity,
                     refill_ids,
-                    depot_id,
                     groups,
-                    objective,
                     current_cost,
                     sa,
+                    ctx.failed_moves,
+                    k_shortest=cfg.rebalance_k_shortest,
+                    telemetry=tel,
                 )
             )
 
+            tel.rebalance_calls += 1
             if reb_accepted:
                 current = rebalanced_routes
+                current_durs = rebalanced_durs
                 current_cost = rebalanced_cost
+                ctx.failed_moves.clear()
                 if rebalanced_cost < best_cost - 1e-9:
                     best = deepcopy_routes(rebalanced_routes)
                     best_cost = rebalanced_cost
                     improved_best = True
 
+        # --- decoder Split: urutan kunjungan current dipotong ulang optimal ---
+        if cfg.split_period > 0 and it % cfg.split_period == 0:
+            decoded = split_routes(
+                current,
+                nodes,
+                tm,
+                depot_id,
+                len(current),
+                vehicle_capacity,
+                refill_ids if allow_refill else [],
+                token=token,
+            )
+            decoded_cost = objective(decoded)
+            tel.split_calls += 1
+            if decoded_cost < current_cost - 1e-9:
+                tel.split_accepted += 1
+                current = decoded
+                current_durs = None
+                current_cost = decoded_cost
+                ctx.failed_moves.clear()
+                if decoded_cost < best_cost - 1e-9:
+                    best = deepcopy_routes(decoded)
+                    best_cost = decoded_cost
+                    improved_best = True
+
         # cool down
+        tel.sample(it, sa.T, current_cost, best_cost)
         sa.cool()
 
-        # --- EARLY STOP kalau stagnan ---
+        # --- EARLY STOP kalau sudah dekat LB / stagnan ---
         if improved_best:
             no_improve_iters = 0
+            if on_improve is not None:
+                on_improve(best, best_cost)
+            if within_gap(best):
+                log.info(
+                    "ALNS early stop: within target gap of LB after %d iterations (best_cost=%.2f)",
+                    it,
+                    best_cost,
+                )
+                tel.stop_reason = "within_gap"
+                break
         else:
             no_improve_iters += 1
-            if no_improve_iters >= MAX_NO_IMPROVE:
+            if no_improve_iters >= cfg.max_no_improve:
                 log.info(
                     "ALNS early stop: no improvement in %d iterations (best_cost=%.2f)",
                     no_improve_iters,
                     best_cost,
                 )
+                tel.stop_reason = "no_improve"
                 break
 
-    return best
+    return finish()
+
+
+def _best_block_insertion(
+    route: List[str], parts: List[str], tm: TimeMatrix
+) -> Tuple[int, float]:
+    """
+    Posisi sisip terbaik untuk blok `parts` (berurutan) di `route` berdasarkan
+    delta travel: M[a,p0] + M[p_last,b] - M[a,b], dihitung vektor untuk semua
+    pasangan (a, b) sekaligus. Return (pos, delta).
+    """
+    if len(route) < 2:
+        return 1, 0.0
+    idx = np.fromiter((tm.index[n] for n in route), dtype=np.intp, count=len(route))
+    a, b = idx[:-1], idx[1:]
+    first, last = tm.index[parts[0]], tm.index[parts[-1]]
+    deltas = tm.M[a, first] + tm.M[last, b] - tm.M[a, b]
+    j = int(np.argmin(deltas))
+    return j + 1, float(deltas[j])
 
 
 def _rebalance_longest_shortest(
     routes,
+    durations,
     nodes,
     tm,
     vehicle_capacity,
     refill_ids,
-    depot_id,
     groups,
-    objective,
     current_cost,
     sa,
+    failed_moves,
+    k_shortest: int = 2,
+    telemetry: Optional[ALNSTelemetry] = None,
 ):
-    # inisialisasi cache failed moves (persist di level fungsi)
-    failed_moves = getattr(_rebalance_longest_shortest, "failed_moves", None)
-    if failed_moves is None:
-        failed_moves = set()
-        _rebalance_longest_shortest.failed_moves = failed_moves
-
-    # 1. Hitung durasi setiap rute (hanya yang punya lebih dari 2 node = ada kunjungan)
-    route_durations = []
-    for idx, r in enumerate(routes):
-        if len(r) > 2:
-            dur = route_time_minutes(r, nodes, tm)
-            route_durations.append((dur, idx))
-
-    if len(route_durations) <= 1:
-        return routes, current_cost, False
-
-    # 2. Cari terpanjang & terpendek
-    longest_dur, longest_idx = max(route_durations, key=lambda x: x[0])
-    shortest_dur, shortest_idx = min(route_durations, key=lambda x: x[0])
-
-    if longest_dur - shortest_dur < 1e-3:
-        return routes, current_cost, False
+    """
+    Pindahkan satu grup (semua part satu base) dari rute terpanjang ke salah
+    satu dari k rute terpendek (+ satu kendaraan idle kalau ada), di posisi
+    sisip terbaiknya. Evaluasi inkremental: hanya dua rute yang berubah yang
+    diperbaiki kapasitasnya & dihitung ulang durasinya; rute lain pakai cache
+    `durations` (sejajar index `routes`).
+    Return (routes, durations, cost, accepted).
+    failed_moves: cache (base, from_idx, to_idx) yang gagal, milik RunContext;
+    hanya valid untuk solusi `routes` ini (dikosongkan caller saat current
+    berubah).
+    """
+    active = [i for i, r in enumerate(routes) if len(r) > 2]
+    if not active:
+        return routes, durations, current_cost, False
+
+    # 1. Rute terpanjang & kandidat tujuan (k terpendek + satu yang idle)
+    longest_idx = max(active, key=lambda i: durations[i])
+    longest_dur = durations[longest_idx]
+    targets = sorted(
+        (i for i in active if i != longest_idx), key=lambda i: durations[i]
+    )[: max(1, k_shortest)]
+    idle = [i for i, r in enumerate(routes) if len(r) <= 2]
+    if idle:
+        targets.append(idle[0])
+    if not targets:
+        return routes, durations, current_cost, False
+    if longest_dur - min(durations[t] for t in targets) < 1e-3:
+        return routes, durations, current_cost, False
 
     longest_route = routes[longest_idx]
-    # shortest_route = routes[shortest_idx]
+    depot_id = longest_route[0]
 
-    # 3. Kumpulkan semua "base" yang ada di rute terpanjang
-    base_to_nodes_in_longest = {}
+    # 2. Kumpulkan semua "base" yang ada di rute terpanjang (urutan part terjaga)
+    base_to_nodes_in_longest: Dict[str, List[str]] = {}
     for nid in longest_route:
         node = nodes.get(nid)
         if not node or node.type != "park":
             continue
-        base = nid.split("#")[0]
-        base_to_nodes_in_longest.setdefault(base, [])
-        base_to_nodes_in_longest[base].append(nid)
+        base_to_nodes_in_longest.setdefault(nid.split("#")[0], []).append(nid)
 
-    if not base_to_nodes_in_longest:
-        return routes, current_cost, False
-
-    candidate_bases = list(base_to_nodes_in_longest.keys())
-
-    # filter base yang sudah pernah dicoba dan gagal (untuk pair route ini)
-    candidate_bases = [
-        b for b in candidate_bases if (b, longest_idx, shortest_idx) not in failed_moves
-    ]
-    if not candidate_bases:
-        # semua kandidat untuk pair (longest_idx, shortest_idx) sudah pernah gagal
-        return routes, current_cost, False
-
-    best_new_routes = None
-    # FIX: Inisialisasi dengan infinity, bukan None, agar type checker happy
-    best_new_cost = float("inf")
-    best_base = None
-
-    for base in candidate_bases:
-        parts = base_to_nodes_in_longest[base]
-
-        move_key = (base, longest_idx, shortest_idx)
-        if move_key in failed_moves:
-            # sebenarnya sudah di-filter di atas, tapi jaga-jaga
-            log.debug(
-                "[REBALANCE] SKIP base=%s | longest_idx=%d -> shortest_idx=%d (cached failed)",
-                base,
-                longest_idx,
-                shortest_idx,
-            )
+    best = None  # (cost, base, target_idx, new_longest, new_target, dur_l, dur_t)
+    for base, parts in base_to_nodes_in_longest.items():
+        open_targets = [
+            t for t in targets if (base, longest_idx, t) not in failed_moves
+        ]
+        if not open_targets:
             continue
 
-        cand_routes = deepcopy_routes(routes)
-
-        # 4a. Hapus semua part base ini dari rute terpanjang
-        cand_longest = cand_routes[longest_idx]
-        cand_longest = [nid for nid in cand_longest if nid not in parts]
-        if cand_longest and cand_longest[0] != routes[longest_idx][0]:
-            cand_longest.insert(0, routes[longest_idx][0])
-        if cand_longest and cand_longest[-1] != routes[longest_idx][-1]:
-            cand_longest.append(routes[longest_idx][-1])
-        cand_routes[longest_idx] = cand_longest
-
-        # 4b. Sisipkan semua parts ke rute terpendek
-        cand_shortest = cand_routes[shortest_idx]
-        if len(cand_shortest) >= 2:
-            insert_pos = len(cand_shortest) - 1
-        else:
-            insert_pos = 1
-        cand_shortest[insert_pos:insert_pos] = parts
-        cand_routes[shortest_idx] = cand_shortest
-
-        # 4c. Perbaiki kapasitas + refill
-        cand_routes, _ = ensure_all_routes_capacity(
-            cand_routes, nodes, vehicle_capacity, refill_ids, tm, depot_id
+        # 3a. Rute terpanjang tanpa grup ini (dihitung sekali per base)
+        parts_set = set(parts)
+        cand_longest = [nid for nid in longest_route if nid not in parts_set]
+        if cand_longest and cand_longest[0] != longest_route[0]:
+            cand_longest.insert(0, longest_route[0])
+        if cand_longest and cand_longest[-1] != longest_route[-1]:
+            cand_longest.append(longest_route[-1])
+        cand_longest, _ = ensure_capacity_with_refills(
+            cand_longest, nodes, vehicle_capacity, refill_ids, tm, depot_id
+        )
+        dur_l = (
+            route_time_minutes(cand_longest, nodes, tm)
+            if len(cand_longest) > 2
+            else 0.0
         )
 
-        # 4d. Hitung cost baru
-        cand_cost = objective(cand_routes)
-
-        # kalau move ini terlalu parah dibanding durasi longest, bisa di-skip
-        delta_tmp = cand_cost - current_cost
-        if delta_tmp > 10 * longest_dur:
-            # tandai juga sebagai failed supaya nggak dicoba lagi
-            failed_moves.add(move_key)
-            continue
+        for t in open_targets:
+            # 3b. Sisipkan blok di posisi terbaik rute tujuan
+            target_route = routes[t] if len(routes[t]) >= 2 else [depot_id, depot_id]
+            pos, _ = _best_block_insertion(target_route, parts, tm)
+            cand_target = target_route[:pos] + parts + target_route[pos:]
+            cand_target, _ = ensure_capacity_with_refills(
+                cand_target, nodes, vehicle_capacity, refill_ids, tm, depot_id
+            )
+            dur_t = route_time_minutes(cand_target, nodes, tm)
+
+            # 3c. Objective dari cache durasi, hanya 2 rute yang diganti
+            active_durs = []
+            for i, r in enumerate(routes):
+                if i == longest_idx:
+                    if len(cand_longest) > 2:
+                        active_durs.append(dur_l)
+                elif i == t:
+                    active_durs.append(dur_t)
+                elif len(r) > 2:
+                    active_durs.append(durations[i])
+            cand_cost = balanced_objective(active_durs)
+
+            # kalau move ini terlalu parah dibanding durasi longest, skip & cache
+            if cand_cost - current_cost > 10 * longest_dur:
+                failed_moves.add((base, longest_idx, t))
+                continue
 
-        # FIX: Hapus pengecekan None karena best_new_cost sudah float('inf')
-        if cand_cost < best_new_cost:
-            best_new_cost = cand_cost
-            best_new_routes = cand_routes
-            best_base = base
+            if best is None or cand_cost < best[0]:
+                best = (cand_cost, base, t, cand_longest, cand_target, dur_l, dur_t)
 
-    if best_new_routes is None:
-        return routes, current_cost, False
+    if best is None:
+        return routes, durations, current_cost, False
 
+    best_new_cost, best_base, best_t, new_longest, new_target, dur_l, dur_t = best
     delta = best_new_cost - current_cost
 
-    # 5. Acceptance (pakai SA biasa)
+    # 4. Acceptance (pakai SA biasa)
     if delta <= 0 or sa.accept(delta):
-        log.info(
-            "[REBALANCE] ACCEPT base=%s | longest_idx=%d -> shortest_idx=%d | Δ=%.2f",
+        if telemetry is not None:
+            telemetry.rebalance_accepted += 1
+        log.debug(
+            "[REBALANCE] ACCEPT base=%s | longest_idx=%d -> target_idx=%d | Δ=%.2f",
             best_base,
             longest_idx,
-            shortest_idx,
+            best_t,
             delta,
         )
-        return best_new_routes, best_new_cost, True
+        new_routes = list(routes)
+        new_routes[longest_idx] = new_longest
+        new_routes[best_t] = new_target
+        new_durs = list(durations)
+        new_durs[longest_idx] = dur_l
+        new_durs[best_t] = dur_t
+        return new_routes, new_durs, best_new_cost, True
     else:
-        log.info(
-            "[REBALANCE] REJECT base=%s | longest_idx=%d -> shortest_idx=%d | Δ=%.2f",
+        if telemetry is not None:
+            telemetry.rebalance_rejected += 1
+        log.debug(
+            "[REBALANCE] REJECT base=%s | longest_idx=%d -> target_idx=%d | Δ=%.2f",
             best_base,
             longest_idx,
-            shortest_idx,
+            best_t,
             delta,
         )
         # cache move yang gagal ini supaya nggak di-spam lagi
-        failed_moves.add((best_base, longest_idx, shortest_idx))
-        return routes, current_cost, False
+        failed_moves.add((best_base, longest_idx, best_t))
+        return routes, durations, current_cost, False
 
 
 # =========================
@@ -466,6 +722,7 @@ def destroy_random(
     tm: TimeMatrix,
     k: int,
     groups: Dict[str, List[str]],
+    rng: Optional[random.Random] = None,
 ) -> Tuple[List[str], List[List[str]]]:
     """
     Random removal (group-aware): pilih beberapa seed park acak,
@@ -477,7 +734,7 @@ def destroy_random(
     if not parks or k <= 0:
         return [], routes
 
-    random.shuffle(parks)
+    (rng or random).shuffle(parks)
     removed_set = set()
     for nid in parks:
         base = nid.split("#")[0]
@@ -506,6 +763,7 @@ def destroy_shaw(
     tm: TimeMatrix,
     k: int,
     groups: Dict[str, List[str]],
+    rng: Optional[random.Random] = None,
 ) -> Tuple[List[str], List[List[str]]]:
     """
     Shaw removal (group-aware): pilih 1 seed park, urutkan tetangga paling dekat,
@@ -517,7 +775,7 @@ def destroy_shaw(
     if not parks or k <= 0:
         return [], routes
 
-    seed = random.choice(parks)
+    seed = (rng or random).choice(parks)
 
     def proximity(p):
         return tm.travel(seed, p) + tm.travel(p, seed)
@@ -552,6 +810,7 @@ def destroy_worst(
     tm: TimeMatrix,
     k: int,
     groups: Dict[str, List[str]],
+    rng: Optional[random.Random] = None,
 ) -> Tuple[List[str], List[List[str]]]:
     """
     Worst removal (group-aware): rangking part berdasarkan kontribusi lokal terbesar,
@@ -599,7 +858,7 @@ def destroy_worst(
     return list(removed_set), new_routes
 
 
-def destroy_longest(routes, nodes, tm, k, groups):
+def destroy_longest(routes, nodes, tm, k, groups, rng=None):
     durations = [route_time_minutes(r, nodes, tm) for r in routes]
     if not durations:
         return [], routes
@@ -610,7 +869,7 @@ def destroy_longest(routes, nodes, tm, k, groups):
     if not parks:
         return [], routes
 
-    random.shuffle(parks)
+    (rng or random).shuffle(parks)
 
     removed_set = set()
     for nid in parks:
@@ -648,6 +907,7 @@ def repair_greedy(
     groups: Optional[Dict[str, List[str]]] = None,
     balance_probability: float = 0.7,
     balance_tolerance: float = 1.05,
+    rng: Optional[random.Random] = None,
 ) -> List[List[str]]:
     """
     Greedy insertion (group-aware) dengan logika balancing tambahan.
@@ -728,7 +988,7 @@ def repair_greedy(
         target_route_idx = best_overall_route_idx
         target_pos = best_overall_pos
 
-        if random.random() < balance_probability and len(current) > 1:
+        if (rng or random).random() < balance_probability and len(current) > 1:
             route_durations = [
                 (route_time_minutes(r, nodes, tm), i)
                 for i, r in enumerate(current)
@@ -775,6 +1035,7 @@ def repair_regret2(
     tm: TimeMatrix,
     ctx: dict,
     groups: Optional[Dict[str, List[str]]] = None,
+    rng: Optional[random.Random] = None,
 ) -> List[List[str]]:
     """
     Regret-2 insertion (group-aware).
@@ -0,0 +1,145 @@
+# bounds.py
+# Lower bound murah untuk makespan, dipakai untuk early-stop ALNS & improve.
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from .data import Node, TimeMatrix
+
+# Floyd–Warshall O(n^3): di atas ini bound round-trip pakai edge minimum saja
+MAX_CLOSURE_NODES = 600
+
+
+@dataclass
+class MakespanBound:
+    value: float  # max dari semua komponen di bawah
+    work_per_vehicle: float  # (service + travel masuk minimum + refill wajib) / K
+    longest_round_trip: float  # depot → refill → grup → depot terlama
+    refill_trips: int  # jumlah refill minimum karena kapasitas
+
+    def gap(self, makespan: float) -> float:
+        """Relative gap (UB - LB) / UB; 0 kalau makespan sudah = bound."""
+        if makespan <= 1e-9:
+            return 0.0
+        return max(0.0, (makespan - self.value) / makespan)
+
+    def to_dict(self) -> dict:
+        return {
+            "value": round(self.value, 4),
+            "work_per_vehicle": round(self.work_per_vehicle, 4),
+            "longest_round_trip": round(self.longest_round_trip, 4),
+            "refill_trips": self.refill_trips,
+        }
+
+
+def _shortest_paths(M: np.ndarray) -> np.ndarray:
+    """All-pairs shortest path (matrix waktu tidak selalu memenuhi triangle inequality)."""
+    D = M.copy()
+    for k in range(D.shape[0]):
+        np.minimum(D, D[:, k, None] + D[None, k, :], out=D)
+    return D
+
+
+def makespan_lower_bound(
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    groups: Dict[str, List[str]],
+    depot_id: str,
+    refill_ids: List[str],
+    num_vehicles: int,
+    vehicle_capacity: float,
+) -> MakespanBound:
+    """
+    Lower bound makespan (menit) yang valid untuk model rute di engine:
+    truk mulai kosong dari depot, refill mengisi penuh, grup split dilayani
+    satu kendaraan. Komponen:
+      1. work/K   : tiap part butuh service + minimal satu edge masuk, plus
+                    refill minimum ceil(total_demand / kapasitas)
+      2. round-trip: grup apa pun harus dilayani dalam satu rute
+                    depot → refill → grup (+ detour refill) → depot
+    """
+    parts = [p for members in groups.values() for p in members]
+    if not parts:
+        return MakespanBound(0.0, 0.0, 0.0, 0)
+
+    M = tm.M
+    n = M.shape[0]
+    k = max(1, int(num_vehicles))
+
+    # edge masuk termurah ke tiap node (diagonal diabaikan)
+    M_off = M + np.diag(np.full(n, np.inf))
+    min_in = M_off.min(axis=0)
+
+    part_idx = np.array([tm.index[p] for p in parts])
+    service = np.array([nodes[p].service_min for p in parts])
+    demand = np.array([nodes[p].demand_liters for p in parts])
+    total_demand = float(demand.sum())
+
+    refill_trips = 0
+    refill_visit = 0.0
+    if refill_ids and vehicle_capacity > 0 and total_demand > 1e-9:
+        refill_trips = math.ceil(total_demand / vehicle_capacity - 1e-9)
+        r_idx = np.array([tm.index[r] for r in refill_ids])
+        r_service = np.array([nodes[r].service_min for r in refill_ids])
+        refill_visit = float((min_in[r_idx] + r_service).min())
+
+    work = (
+        float((service + min_in[part_idx]).sum())
+        + refill_trips * refill_visit
+        + float(min_in[tm.index[depot_id]])
+    )
+    work_lb = work / k
+
+    # --- round trip per grup (pakai shortest-path closure antar lokasi) ---
+    # part dari grup yg sama satu lokasi, jadi cukup wakilkan dengan anchor
+    anchors = [members[0] for members in groups.values() if members]
+    loc_ids = [depot_id] + list(refill_ids) + anchors
+    if len(loc_ids) <= MAX_CLOSURE_NODES:
+        sub = np.array([tm.index[i] for i in loc_ids])
+        D = _shortest_paths(M[np.ix_(sub, sub)])
+    else:
+        # fallback: edge minimum saja (tetap valid, lebih longgar)
+        D = None
+
+    n_ref = len(refill_ids)
+    r_service = np.array([nodes[r].service_min for r in refill_ids], dtype=float)
+
+    longest = 0.0
+    for gi, members in enumerate(groups.values()):
+        if not members:
+            continue
+        g_service = sum(nodes[p].service_min for p in members)
+        g_demand = sum(nodes[p].demand_liters for p in members)
+        g_refills = (
+            math.ceil(g_demand / vehicle_capacity - 1e-9)
+            if vehicle_capacity > 0 and g_demand > 1e-9 and n_ref
+            else 0
+        )
+
+        if D is not None:
+            g = 1 + n_ref + gi
+            out_leg = D[g, 0]
+            if g_refills and n_ref:
+                refills = slice(1, 1 + n_ref)
+                first = float((D[0, refills] + r_service + D[refills, g]).min())
+                detour = float((D[g, refills] + r_service + D[refills, g]).min())
+                in_leg = first + (g_refills - 1) * detour
+            else:
+                in_leg = D[0, g]
+        else:
+            gidx = tm.index[members[0]]
+            out_leg = float(M_off[gidx].min())
+            in_leg = float(min_in[gidx]) + g_refills * refill_visit
+
+        longest = max(longest, float(in_leg + g_service + out_leg))
+
+    return MakespanBound(
+        value=max(work_lb, longest),
+        work_per_vehicle=work_lb,
+        longest_round_trip=longest,
+        refill_trips=refill_trips,
+    )
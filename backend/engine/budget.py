@@ -0,0 +1,104 @@
+# budget.py
+# Budget waktu adaptif: total budget dipilih dari ukuran instance, lalu tiap
+# tahap search (ALNS/improve) dipantau ConvergenceMonitor yang menghentikan
+# tahap lebih awal kalau laju perbaikannya sudah datar atau target iterasi
+# (dari laju iterasi terukur) tercapai. Sisa waktunya dipakai tahap berikut.
+from __future__ import annotations
+
+import bisect
+import time
+from typing import List, Optional
+
+
+def plan_time_budget(
+    n_nodes: int,
+    cap_sec: float,
+    min_sec: float = 0.5,
+    sec_per_node: float = 0.2,
+) -> float:
+    """Budget total (detik) untuk n_nodes titik layanan, dibatasi cap_sec."""
+    return max(0.0, min(cap_sec, min_sec + sec_per_node * max(0, n_nodes)))
+
+
+class ConvergenceMonitor:
+    """
+    Keputusan berhenti untuk satu tahap search; panggil observe(it, best_cost)
+    tiap iterasi, return alasan berhenti atau None.
+    - time_limit_sec : batas keras tahap
+    - target_iters   : setelah warmup, laju iterasi diukur dan batas waktu
+                       dipersempit ke target_iters / (iterasi per detik)
+    - stall          : perbaikan relatif best dalam jendela terakhir
+                       (max(stall_min_sec, stall_frac × max(elapsed,
+                       proyeksi))) < min_rate
+    """
+
+    def __init__(
+        self,
+        time_limit_sec: float,
+        target_iters: Optional[int] = None,
+        stall_frac: float = 0.25,
+        stall_min_sec: float = 0.2,
+        min_rate: float = 1e-3,
+        warmup_sec: float = 0.1,
+    ):
+        self.time_limit_sec = time_limit_sec
+        self.target_iters = target_iters
+        self.stall_frac = stall_frac
+        self.stall_min_sec = stall_min_sec
+        self.min_rate = min_rate
+        self.warmup_sec = warmup_sec
+        self.start = time.monotonic()
+        self.projected_sec: Optional[float] = None  # dari laju iterasi
+        self.stop_reason: Optional[str] = None
+        self.elapsed_sec = 0.0
+        self.iterations = 0
+        # titik perbaikan best: (detik sejak start, cost)
+        self._t: List[float] = []
+        self._cost: List[float] = []
+
+    def observe(self, it: int, best_cost: float) -> Optional[str]:
+        now = time.monotonic() - self.start
+        self.elapsed_sec, self.iterations = now, it
+        if not self._cost or best_cost < self._cost[-1]:
+            self._t.append(now)
+            self._cost.append(best_cost)
+
+        if now >= self.time_limit_sec:
+            return self._stop("time_limit")
+        if now < self.warmup_sec:
+            return None
+
+        if self.target_iters and it > 0:
+            if self.projected_sec is None:
+                self.projected_sec = self.target_iters * now / it
+            if it >= self.target_iters:
+                return self._stop("iteration_target")
+
+        # kesabaran mengikuti panjang run yang diharapkan, bukan hanya elapsed
+        window = max(
+            self.stall_min_sec, self.stall_frac * max(now, self.projected_sec or 0.0)
+        )
+        if now >= window:
+            # cost best pada awal jendela = perbaikan terakhir sebelum now - window
+            i = bisect.bisect_right(self._t, now - window) - 1
+            then = self._cost[max(0, i)]
+            if then <= 0 or (then - best_cost) / then < self.min_rate:
+                return self._stop("converged")
+        return None
+
+    def _stop(self, reason: str) -> str:
+        self.stop_reason = reason
+        return reason
+
+    def to_dict(self) -> dict:
+        return {
+            "time_limit_sec": round(self.time_limit_sec, 4),
+            "elapsed_sec": round(self.elapsed_sec, 4),
+            "iterations": self.iterations,
+            "target_iters": self.target_iters,
+            "projected_sec": (
+                None if self.projected_sec is None else round(self.projected_sec, 4)
+            ),
+            "improvements": max(0, len(self._cost) - 1),
+            "stop_reason": self.stop_reason,
+        }
@@ -1,6 +1,15 @@
-from typing import Dict, List, Set
+import heapq
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
+
+from .context import CancelToken
 from .data import Node, TimeMatrix
+from .evaluation import route_time_minutes
+from .split import split_giant_tour
+from .utils import ensure_capacity_with_refills
 
 
 def _nearest(target_from: str, candidates: List[str], tm: TimeMatrix) -> str:
@@ -28,10 +37,13 @@ def greedy_construct(
     vehicle_capacity: float,
     allow_refill: bool,
     refill_ids: List[str],
+    token: Optional[CancelToken] = None,
 ) -> List[List[str]]:
     """
     Versi 'Group-Aware' dari greedy construct.
     Unit kerjanya adalah 'Grup' (misal ['1#1', '1#2', '1#3']), bukan 'part'.
+    Kalau token batal, grup yang tersisa langsung ditempel ke rute terakhir
+    (jalur 'paksa' di bawah) supaya hasil tetap melayani semua grup.
     """
 
     # --- 1. Bangun Grup dari selected_parks (parts) ---
@@ -64,6 +76,8 @@ def greedy_construct(
 
     # --- 3. Loop Utama (Per Kendaraan) ---
     for _ in range(num_vehicles):
+        if routes and token is not None and token.cancelled():
+            break
         route = [depot_id]
         cur = depot_id
         rem = 0.0  # Asumsi truk mulai kosong
@@ -72,6 +86,8 @@ def greedy_construct(
         iters = 0
 
         while unserved:
+            if token is not None and token.cancelled():
+                break
             iters += 1
             if iters > MAX_ITERS:
                 raise RuntimeError(
@@ -226,3 +242,423 @@ def greedy_construct(
         routes[-1] = route
 
     return routes
+
+
+def _group_units(nodes: Dict[str, Node], selected_parks: List[str]) -> List[List[str]]:
+    """Kelompokkan part per base id (urutan part terjaga), urut by base id."""
+    groups: Dict[str, List[str]] = {}
+    for part_id in selected_parks:
+        node = nodes.get(part_id)
+        if not node or node.type != "park":
+            continue
+        groups.setdefault(part_id.split("#")[0], []).append(part_id)
+    return [sorted(groups[b]) for b in sorted(groups)]
+
+
+@dataclass
+class _SavingsRoute:
+    """
+    Ringkasan satu rute savings supaya biaya merge bisa dihitung O(1):
+    - first / last unit (rantai unit lewat `nxt`), head / tail = index matrix
+    - dur       : durasi total (travel + service, termasuk refill)
+    - first_leg : biaya depot(→refill)→head tanpa service head
+    - last_leg  : tail→depot + service depot
+    - head_load : liter yang dipakai dari tangki saat tiba di head sampai
+                  refill internal pertama (atau seluruh rute kalau tidak ada)
+    - internal  : ada refill sesudah head
+    - rem_end   : sisa muatan di akhir rute
+    - total     : total demand rute
+    """
+
+    first: int
+    last: int
+    head: int
+    tail: int
+    dur: float
+    first_leg: float
+    last_leg: float
+    head_load: float
+    internal: bool
+    rem_end: float
+    total: float
+
+
+def savings_construct(
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    selected_parks: List[str],
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    allow_refill: bool,
+    refill_ids: List[str],
+    neighbors: int = 30,
+    slack: float = 1.05,
+    token: Optional[CancelToken] = None,
+) -> List[List[str]]:
+    """
+    Clarke–Wright savings (group-aware & refill-aware).
+    - Unit kerja = grup (semua part satu base selalu berurutan).
+    - Saving i→j = t(i,depot) + t(depot,j) - t(i,j), dihitung NumPy untuk semua
+      pasangan; per unit hanya `neighbors` saving terbesar yang masuk heap.
+    - Biaya merge O(1) dari ringkasan rute (_SavingsRoute): endpoint saving +
+      delta refill di sambungan (refill disisipkan sebelum head rute kedua
+      hanya kalau sisa muatan rute pertama tidak cukup; pola refill lain tetap).
+    - Pass 1 tanpa batas durasi → estimasi total kerja L; pass 2 membatasi
+      durasi rute ke L / num_vehicles * slack supaya hasilnya seimbang.
+    - Kalau masih > num_vehicles rute, dua rute terpendek digabung berulang.
+    Rute final dibangun sekali pakai ensure_capacity_with_refills.
+    Hasil selalu num_vehicles rute (rute kosong = [depot, depot]). Kalau token
+    batal, merge berhenti dan rute yang ada langsung digabung ke <= K.
+    """
+    units = _group_units(nodes, selected_parks)
+    k = max(1, num_vehicles)
+    if not units:
+        return [[depot_id, depot_id] for _ in range(k)]
+
+    refills = refill_ids if allow_refill else []
+    M = tm.M
+    n = len(units)
+    d = tm.index[depot_id]
+    heads = np.array([tm.index[u[0]] for u in units])
+    tails = np.array([tm.index[u[-1]] for u in units])
+    depot_svc = nodes[depot_id].service_min
+
+    def build(seq_units: List[int]) -> List[str]:
+        route = [depot_id]
+        for u in seq_units:
+            route.extend(units[u])
+        route.append(depot_id)
+        fixed, _ = ensure_capacity_with_refills(
+            route, nodes, vehicle_capacity, refills, tm, depot_id
+        )
+        return fixed
+
+    # sambungan tail_i → head_j lewat refill termurah (travel + service refill)
+    if refills:
+        r_idx = np.array([tm.index[r] for r in refills])
+        r_svc = np.array([nodes[r].service_min for r in refills])
+        via_refill = (
+            (M[np.ix_(tails, r_idx)] + r_svc)[:, :, None] + M[np.ix_(r_idx, heads)]
+        ).min(axis=1)
+    else:
+        via_refill = None
+
+    def unit_route(u: int) -> _SavingsRoute:
+        route = build([u])
+        head_pos = 1
+        while nodes[route[head_pos]].type != "park":
+            head_pos += 1
+        first_leg = (
+            sum(
+                tm.travel(route[i], route[i + 1]) + nodes[route[i + 1]].service_min
+                for i in range(head_pos)
+            )
+            - nodes[route[head_pos]].service_min
+        )
+        head_refill = nodes[route[head_pos - 1]].type == "refill"
+        rem = vehicle_capacity if head_refill else 0.0
+        head_load, internal, total = 0.0, False, 0.0
+        for nid in route[head_pos:]:
+            node = nodes[nid]
+            if node.type == "refill":
+                internal, rem = True, vehicle_capacity
+            elif node.type == "park":
+                rem -= node.demand_liters
+                total += node.demand_liters
+                if not internal:
+                    head_load += node.demand_liters
+        return _SavingsRoute(
+            first=u,
+            last=u,
+            head=int(heads[u]),
+            tail=int(tails[u]),
+            dur=route_time_minutes(route, nodes, tm),
+            first_leg=first_leg,
+            last_leg=float(M[tails[u], d]) + depot_svc,
+            head_load=head_load,
+            internal=internal,
+            rem_end=rem,
+            total=total,
+        )
+
+    base_routes = [unit_route(u) for u in range(n)]
+
+    def merge(a: _SavingsRoute, b: _SavingsRoute) -> _SavingsRoute:
+        """Ringkasan rute a lalu b; O(1)."""
+        refill_at_join = via_refill is not None and a.rem_end < b.head_load - 1e-9
+        if refill_at_join:
+            join = float(via_refill[a.last, b.first])
+        else:
+            join = float(M[a.tail, b.head])
+        if a.internal:
+            head_load = a.head_load
+        else:
+            head_load = a.total + (0.0 if refill_at_join else b.head_load)
+        if b.internal:
+            rem_end = b.rem_end
+        else:
+            rem_end = (vehicle_capacity if refill_at_join else a.rem_end) - b.total
+        return _SavingsRoute(
+            first=a.first,
+            last=b.last,
+            head=a.head,
+            tail=b.tail,
+            dur=a.dur - a.last_leg + join + b.dur - b.first_leg,
+            first_leg=a.first_leg,
+            last_leg=b.last_leg,
+            head_load=head_load,
+            internal=a.internal or b.internal or refill_at_join,
+            rem_end=rem_end,
+            total=a.total + b.total,
+        )
+
+    # --- savings list (NumPy) ---
+    S = M[tails, d][:, None] + M[d, heads][None, :] - M[np.ix_(tails, heads)]
+    np.fill_diagonal(S, -np.inf)
+    m = min(neighbors, n - 1)
+    candidates: List[Tuple[float, int, int]] = []
+    if m > 0:
+        top = np.argpartition(-S, m - 1, axis=1)[:, :m]
+        for i in range(n):
+            for j in top[i]:
+                if S[i, j] > 0:
+                    candidates.append((-float(S[i, j]), i, int(j)))
+    heapq.heapify(candidates)
+
+    def run(max_dur: float) -> Tuple[List[_SavingsRoute], List[int]]:
+        route_of = list(range(n))  # unit -> route id
+        nxt = [-1] * n  # rantai unit dalam rute
+        routes: Dict[int, _SavingsRoute] = dict(enumerate(base_routes))
+        size = [1] * n  # jumlah unit per route id
+        heap = candidates[:]
+        while heap:
+            if token is not None and token.cancelled():
+                break
+            _, i, j = heapq.heappop(heap)
+            a, b = route_of[i], route_of[j]
+            if a == b or routes[a].last != i or routes[b].first != j:
+                continue
+            merged = merge(routes[a], routes[b])
+            if merged.dur > max_dur:
+                continue
+            # relabel rute yang lebih kecil → tiap unit pindah O(log n) kali
+            keep, drop = (a, b) if size[a] >= size[b] else (b, a)
+            u = routes[drop].first
+            while u != -1:
+                route_of[u] = keep
+                u = nxt[u]
+            nxt[i] = j
+            del routes[drop]
+            routes[keep] = merged
+            size[keep] += size[drop]
+        return [routes[r] for r in sorted(routes)], nxt
+
+    # pass 1: tanpa batas → estimasi kerja total; pass 2: batas seimbang
+    merged_routes, nxt = run(float("inf"))
+    if not (token is not None and token.cancelled()):
+        total = sum(r.dur for r in merged_routes)
+        merged_routes, nxt = run(total / k * slack)
+
+    # gabungkan rute terpendek sampai <= num_vehicles (heap by durasi)
+    if len(merged_routes) > k:
+        heap_r = [(r.dur, r.first, r) for r in merged_routes]
+        heapq.heapify(heap_r)
+        while len(heap_r) > k:
+            _, _, r1 = heapq.heappop(heap_r)
+            _, _, r2 = heapq.heappop(heap_r)
+            m12, m21 = merge(r1, r2), merge(r2, r1)
+            r, (x, y) = (m12, (r1, r2)) if m12.dur <= m21.dur else (m21, (r2, r1))
+            nxt[x.last] = y.first
+            heapq.heappush(heap_r, (r.dur, r.first, r))
+        merged_routes = [r for _, _, r in heap_r]
+
+    routes = []
+    for r in merged_routes:
+        seq, u = [], r.first
+        while u != -1:
+            seq.append(u)
+            u = nxt[u]
+        routes.append(build(seq))
+    routes.sort(key=lambda r: -route_time_minutes(r, nodes, tm))
+    while len(routes) < k:
+        routes.append([depot_id, depot_id])
+    return routes
+
+
+def _nearest_neighbor_order(
+    heads: np.ndarray, tails: np.ndarray, start: int, M: np.ndarray
+) -> List[int]:
+    """Urutan nearest-neighbour unit (head/tail = index matrix) mulai dari `start`."""
+    left = np.ones(len(heads), dtype=bool)
+    order: List[int] = []
+    cur = start
+    for _ in range(len(heads)):
+        t = np.where(left, M[cur, heads], np.inf)
+        u = int(t.argmin())
+        order.append(u)
+        left[u] = False
+        cur = tails[u]
+    return order
+
+
+def sweep_construct(
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    selected_parks: List[str],
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    allow_refill: bool,
+    refill_ids: List[str],
+    token: Optional[CancelToken] = None,
+) -> List[List[str]]:
+    """
+    Cluster-first route-second (sweep) berbasis lat/lon, seimbang by workload.
+    - Unit kerja = grup; estimasi kerja unit = service + edge masuk termurah
+      + (demand / kapasitas) * detour refill termurah (unit → refill → unit).
+    - Unit diurutkan by sudut polar dari depot, mulai setelah celah sudut
+      terbesar, lalu dipotong jadi num_vehicles sektor dengan kerja kumulatif
+      yang sama (cumsum + floor, tanpa loop Python).
+    - Tiap sektor diurutkan nearest-neighbour dari depot, refill disisipkan
+      pakai ensure_capacity_with_refills.
+    Hasil selalu num_vehicles rute (rute kosong = [depot, depot]). Kalau token
+    batal, sektor sisanya dipakai dalam urutan sweep tanpa nearest-neighbour.
+    """
+    units = _group_units(nodes, selected_parks)
+    k = max(1, num_vehicles)
+    if not units:
+        return [[depot_id, depot_id] for _ in range(k)]
+
+    refills = refill_ids if allow_refill else []
+    M = tm.M
+    d = tm.index[depot_id]
+    heads = np.array([tm.index[u[0]] for u in units])
+    tails = np.array([tm.index[u[-1]] for u in units])
+
+    # --- estimasi kerja per unit ---
+    service = np.array([sum(nodes[p].service_min for p in u) for u in units])
+    demand = np.array([sum(nodes[p].demand_liters for p in u) for u in units])
+    inbound = M[np.ix_(np.append(tails, d), heads)].astype(float)
+    inbound[np.arange(len(units)), np.arange(len(units))] = np.inf
+    work = service + inbound.min(axis=0)
+    if refills and vehicle_capacity > 0:
+        r_idx = np.array([tm.index[r] for r in refills])
+        r_svc = np.array([nodes[r].service_min for r in refills])
+        detour = (M[np.ix_(tails, r_idx)] + r_svc + M[np.ix_(r_idx, heads)].T).min(
+            axis=1
+        )
+        work = work + demand / vehicle_capacity * detour
+
+    # --- sweep: sudut polar dari depot (lon diskalakan cos(lat)) ---
+    depot = nodes[depot_id]
+    lat = np.array([nodes[u[0]].lat for u in units])
+    lon = np.array([nodes[u[0]].lon for u in units])
+    x = (lon - depot.lon) * np.cos(np.radians(depot.lat))
+    y = lat - depot.lat
+    order = np.argsort(np.arctan2(y, x), kind="stable")
+    if len(order) > 1:
+        ang = np.arctan2(y, x)[order]
+        gaps = np.diff(np.append(ang, ang[0] + 2 * np.pi))
+        order = np.roll(order, -(int(gaps.argmax()) + 1))
+
+    # potong jadi k sektor dengan kerja kumulatif sama (pakai titik tengah unit);
+    # total kerja 0 (park berimpit, service 0) → sektor berisi jumlah unit sama
+    w = work[order]
+    if w.sum() > 0:
+        mid = np.cumsum(w) - w / 2
+        sector = np.minimum((mid / (w.sum() / k)).astype(int), k - 1)
+    else:
+        sector = np.arange(len(w)) * k // len(w)
+
+    routes: List[List[str]] = []
+    for s in range(k):
+        members = order[sector == s]
+        if len(members) == 0:
+            continue
+        if token is not None and token.cancelled():
+            seq = range(len(members))
+        else:
+            seq = _nearest_neighbor_order(heads[members], tails[members], d, M)
+        route = [depot_id]
+        for i in seq:
+            route.extend(units[members[i]])
+        route.append(depot_id)
+        fixed, _ = ensure_capacity_with_refills(
+            route, nodes, vehicle_capacity, refills, tm, depot_id
+        )
+        routes.append(fixed)
+
+    routes.sort(key=lambda r: -route_time_minutes(r, nodes, tm))
+    while len(routes) < k:
+        routes.append([depot_id, depot_id])
+    return routes
+
+
+def random_restart_greedy(
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    selected_parks: List[str],
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    allow_refill: bool,
+    refill_ids: List[str],
+    restarts: int = 8,
+    rcl_size: int = 3,
+    seed: int = 42,
+    token: Optional[CancelToken] = None,
+) -> List[List[str]]:
+    """
+    Greedy nearest-group teracak (GRASP): tiap langkah pilih acak salah satu
+    dari `rcl_size` grup terdekat, giant tour hasilnya di-Split ke
+    num_vehicles rute. Restart pertama murni greedy; yang makespan-nya
+    terkecil dipakai. Restart berhenti saat token batal (minimal satu); tour
+    yang sedang dibangun dilengkapi dengan grup sisa sesuai urutan input.
+    """
+    units = _group_units(nodes, selected_parks)
+    k = max(1, num_vehicles)
+    if not units:
+        return [[depot_id, depot_id] for _ in range(k)]
+
+    refills = refill_ids if allow_refill else []
+    rng = random.Random(seed)
+    M = tm.M
+    d = tm.index[depot_id]
+    heads = np.array([tm.index[u[0]] for u in units])
+    tails = np.array([tm.index[u[-1]] for u in units])
+
+    best: List[List[str]] = []
+    best_ms = float("inf")
+    for attempt in range(max(1, restarts)):
+        if attempt and token is not None and token.cancelled():
+            break
+        left = np.ones(len(units), dtype=bool)
+        cur, tour = d, []
+        for step in range(len(units)):
+            if token is not None and token.cancelled():
+                tour.extend(p for u in np.flatnonzero(left) for p in units[u])
+                break
+            t = np.where(left, M[cur, heads], np.inf)
+            m = min(rcl_size if attempt else 1, len(units) - step)
+            cand = np.argpartition(t, m - 1)[:m] if m > 1 else [int(t.argmin())]
+            u = int(rng.choice(list(cand)))
+            left[u] = False
+            tour.extend(units[u])
+            cur = tails[u]
+        routes = split_giant_tour(
+            tour, nodes, tm, depot_id, k, vehicle_capacity, refills, token=token
+        )
+        ms = max(route_time_minutes(r, nodes, tm) for r in routes)
+        if ms < best_ms:
+            best, best_ms = routes, ms
+    return best
+
+
+# metode konstruksi yang bisa dipilih lewat settings / request
+CONSTRUCTORS = {
+    "greedy": greedy_construct,
+    "savings": savings_construct,
+    "sweep": sweep_construct,
+    "random_greedy": random_restart_greedy,
+}
@@ -0,0 +1,78 @@
+# context.py
+# State per-run engine. Semua state yang dulunya global (random module,
+# cache rebalancing di atribut fungsi) disimpan di sini supaya beberapa solve
+# bisa jalan paralel (thread/proses) tanpa saling ganggu, dan tetap
+# deterministik per seed.
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Set, Tuple
+
+
+@dataclass
+class RunContext:
+    seed: int = 42
+    rng: random.Random = field(init=False, repr=False)
+    # (base, longest_idx, shortest_idx) yang sudah gagal di-rebalance untuk
+    # solusi current saat ini; dikosongkan ALNS tiap current berubah
+    failed_moves: Set[Tuple[str, int, int]] = field(default_factory=set)
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+
+class CancelToken:
+    """
+    Pembatalan kooperatif + deadline, diteruskan dari API ke tiap tahap engine.
+    Tahap engine mengecek `cancelled()` di loop utamanya dan mengembalikan
+    solusi terbaik saat itu.
+    - event   : threading.Event / multiprocessing.Event (batal eksplisit)
+    - deadline: time.monotonic() absolut (None = tanpa batas)
+    - child() : token turunan dengan deadline lebih ketat; ikut batal kalau
+                induknya batal
+    Punya set()/is_set() supaya bisa dipakai di tempat threading.Event.
+    """
+
+    def __init__(
+        self,
+        deadline: Optional[float] = None,
+        event=None,
+        parent: Optional["CancelToken"] = None,
+    ):
+        self.deadline = deadline
+        self._event = event if event is not None else threading.Event()
+        self._parent = parent
+
+    @classmethod
+    def with_timeout(cls, seconds: float, event=None) -> "CancelToken":
+        return cls(deadline=time.monotonic() + seconds, event=event)
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._parent is not None and self._parent.cancelled():
+            return True
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> float:
+        """Detik tersisa sampai deadline terdekat di rantai token (inf = tanpa batas)."""
+        rem = float("inf")
+        if self.deadline is not None:
+            rem = self.deadline - time.monotonic()
+        if self._parent is not None:
+            rem = min(rem, self._parent.remaining())
+        return max(0.0, rem)
+
+    def child(self, timeout: Optional[float] = None) -> "CancelToken":
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return CancelToken(deadline=deadline, parent=self)
+
+    # kompatibel dengan threading.Event
+    set = cancel
+    is_set = cancelled
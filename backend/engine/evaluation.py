@@ -1,4 +1,5 @@
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
 
 from .data import Node, TimeMatrix
 
@@ -70,3 +71,51 @@ def capacity_trace_and_violations(route, nodes, vehicle_capacity):
         # catat rem apa adanya (bisa negatif)
         trace.append(rem)
     return trace, violations
+
+
+@dataclass
+class RouteEvaluation:
+    """Hasil evaluate_route; setara fungsi-fungsi di atas untuk rute yang sama."""
+
+    duration_min: float = 0.0  # = route_time_minutes
+    load_profile: List[float] = field(default_factory=list)  # = load_profile_liters
+    trace_strict: List[float] = field(default_factory=list)  # boleh negatif
+    violations: List[Tuple[int, str, float]] = field(default_factory=list)
+    refill_indices: List[int] = field(default_factory=list)
+
+
+def evaluate_route(
+    route: List[str], nodes: Dict[str, Node], tm: TimeMatrix, vehicle_capacity: float
+) -> RouteEvaluation:
+    """
+    Satu kali jalan untuk durasi, load profile (clamp ≥ 0), trace kapasitas
+    strict + pelanggaran, dan posisi refill — menggantikan route_time_minutes,
+    load_profile_liters, capacity_trace_and_violations dan scan refill terpisah.
+    """
+    ev = RouteEvaluation()
+    M, index = tm.M, tm.index
+    rem = 0.0  # clamp ke 0 (load_profile_liters)
+    strict = 0.0  # apa adanya (capacity_trace_and_violations)
+    total = 0.0
+    prev = -1
+    for idx, nid in enumerate(route):
+        n = nodes[nid]
+        cur = index[nid]
+        if prev >= 0:
+            total += float(M[prev, cur])
+            total += n.service_min
+        prev = cur
+        if n.type == "refill":
+            rem = strict = vehicle_capacity
+            ev.refill_indices.append(idx)
+        elif n.type == "park":
+            rem -= n.demand_liters
+            if rem < 0:
+                rem = 0.0
+            strict -= n.demand_liters
+            if strict < 0:
+                ev.violations.append((idx, nid, -strict))
+        ev.load_profile.append(rem)
+        ev.trace_strict.append(strict)
+    ev.duration_min = total
+    return ev
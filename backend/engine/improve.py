@@ -1,16 +1,22 @@
 # improve.py (VERSI BARU - Group-Aware)
 
 import time
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
+from .budget import ConvergenceMonitor
+from .context import CancelToken
 from .data import Node, TimeMatrix
-from .evaluation import total_time_minutes
+from .evaluation import makespan_minutes, total_time_minutes
 from .neighborhoods import (
     relocate_move,
     swap_move,
     two_opt_move,
 )
-from .utils import ensure_all_routes_capacity
+from .utils import (
+    ensure_all_routes_capacity,
+    ensure_groups_single_vehicle,
+    groups_on_single_vehicle,
+)
 
 
 def improve_routes(
@@ -23,6 +29,11 @@ def improve_routes(
     groups: Dict[str, List[str]],  # <-- TAMBAH INI
     time_limit_sec: float = 3.0,
     max_no_improve: int = 1_000_000_000,
+    lower_bound: float = 0.0,
+    target_gap: float = 0.0,
+    on_improve: Optional[Callable[[List[List[str]], float], None]] = None,
+    token: Optional[CancelToken] = None,
+    monitor: Optional[ConvergenceMonitor] = None,
 ) -> List[List[str]]:
     start = time.time()
     best = [r[:] for r in routes]
@@ -33,8 +44,34 @@ def improve_routes(
     )
     best_cost = total_time_minutes(best, nodes, tm)
 
+    # hasil cek gap terakhir per objek `best`; best hanya diganti saat membaik
+    gap_checked: list = [None, False]
+
+    def within_gap() -> bool:
+        # berhenti kalau makespan sudah dalam target_gap dari lower bound
+        if lower_bound <= 0 or target_gap <= 0:
+            return False
+        if gap_checked[0] is best:
+            return gap_checked[1]
+        routes = best
+        if not groups_on_single_vehicle(routes, groups):
+            routes = ensure_groups_single_vehicle(
+                routes, groups, nodes, tm, depot_id, vehicle_capacity, refill_ids
+            )
+        makespan = makespan_minutes(routes, nodes, tm)
+        gap_checked[:] = [best, makespan - lower_bound <= target_gap * makespan + 1e-9]
+        return gap_checked[1]
+
     noimprove = 0
-    while time.time() - start < time_limit_sec and noimprove < max_no_improve:
+    it = 0
+    while (
+        time.time() - start < time_limit_sec
+        and noimprove < max_no_improve
+        and not within_gap()
+        and not (token is not None and token.cancelled())
+        and not (monitor is not None and monitor.observe(it, best_cost))
+    ):
+        it += 1
 
         # 1) Relocate (Group-Aware)
         # Operasi ini HANYA akan memindahkan node non-split
@@ -46,6 +83,8 @@ def improve_routes(
             new_cost = total_time_minutes(cand, nodes, tm)
             if new_cost < best_cost - 1e-9:
                 best, best_cost = cand, new_cost
+                if on_improve is not None:
+                    on_improve(best, best_cost)
                 noimprove = 0  # Reset counter jika ada perbaikan
                 continue  # Langsung ulangi loop
 
@@ -59,6 +98,8 @@ def improve_routes(
             new_cost = total_time_minutes(cand, nodes, tm)
             if new_cost < best_cost - 1e-9:
                 best, best_cost = cand, new_cost
+                if on_improve is not None:
+                    on_improve(best, best_cost)
                 noimprove = 0  # Reset counter
                 continue  # Langsung ulangi loop
 
@@ -72,6 +113,8 @@ def improve_routes(
             new_cost = total_time_minutes(cand, nodes, tm)
             if new_cost < best_cost - 1e-9:
                 best, best_cost = cand, new_cost
+                if on_improve is not None:
+                    on_improve(best, best_cost)
                 noimprove = 0  # Reset counter
                 continue  # Langsung ulangi loop
 
@@ -0,0 +1,176 @@
+# portfolio.py
+# Jalankan beberapa heuristik konstruksi paralel (di executor milik caller),
+# skor pakai objective ALNS, urutkan dari yang terbaik.
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Executor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .alns import routes_objective
+from .construct import CONSTRUCTORS, greedy_construct
+from .context import CancelToken
+from .data import Node, TimeMatrix
+from .evaluation import makespan_minutes
+from .split import split_routes
+
+log = logging.getLogger("meta-vrp.portfolio")
+
+
+@dataclass
+class Candidate:
+    method: str
+    routes: List[List[str]] = field(default_factory=list, repr=False)
+    cost: float = float("inf")  # routes_objective (sama dgn ALNS)
+    makespan: float = float("inf")
+    time_sec: float = 0.0
+    status: str = "ok"  # ok | error | timeout
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        ok = self.status == "ok"
+        return {
+            "method": self.method,
+            "status": self.status,
+            "cost": round(self.cost, 4) if ok else None,
+            "makespan": round(self.makespan, 4) if ok else None,
+            "time_sec": round(self.time_sec, 4),
+            "error": self.error,
+        }
+
+
+def construct_portfolio(
+    methods: List[str],
+    executor: Executor,
+    time_cap_sec: float,
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    selected_parks: List[str],
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    allow_refill: bool,
+    refill_ids: List[str],
+    split_objective: str = "makespan",
+    token: Optional[CancelToken] = None,
+) -> List[Candidate]:
+    """
+    Jalankan `methods` (key CONSTRUCTORS) bersamaan, tunggu maksimal
+    time_cap_sec. Hasil yang cuma 1 rute di-Split ke num_vehicles dulu supaya
+    skornya adil. Return semua kandidat, yang sukses di depan (cost naik).
+    Kalau tidak ada yang selesai, greedy_construct dijalankan sinkron. Hasil
+    yang tidak memuat tiap park terpilih tepat satu kali dianggap error.
+    Tiap heuristik dapat token anak sendiri (ikut batal kalau `token` batal);
+    yang lewat time_cap_sec dibatalkan lewat token itu supaya thread executor
+    cepat bebas untuk tahap berikutnya.
+    """
+    refills = refill_ids if allow_refill else []
+    expected = sorted(p for p in selected_parks if nodes[p].type == "park")
+
+    def check_served(method: str, routes: List[List[str]]) -> None:
+        served = sorted(p for r in routes for p in r if nodes[p].type == "park")
+        if served != expected:
+            missing = len(set(expected) - set(served))
+            raise ValueError(
+                f"{method}: {missing} park(s) missing, "
+                f"{len(served) - len(set(served))} duplicated"
+            )
+
+    def run(method: str, cand_token: CancelToken) -> Candidate:
+        t0 = time.perf_counter()
+        routes = CONSTRUCTORS[method](
+            nodes=nodes,
+            tm=tm,
+            selected_parks=selected_parks,
+            depot_id=depot_id,
+            num_vehicles=num_vehicles,
+            vehicle_capacity=vehicle_capacity,
+            allow_refill=allow_refill,
+            refill_ids=refill_ids,
+            token=cand_token,
+        )
+        if len(routes) == 1 and num_vehicles > 1:
+            routes = split_routes(
+                routes,
+                nodes,
+                tm,
+                depot_id,
+                num_vehicles,
+                vehicle_capacity,
+                refills,
+                objective=split_objective,
+                token=cand_token,
+            )
+        check_served(method, routes)
+        return Candidate(
+            method=method,
+            routes=routes,
+            cost=routes_objective(routes, nodes, tm),
+            makespan=makespan_minutes(routes, nodes, tm),
+            time_sec=time.perf_counter() - t0,
+        )
+
+    t0 = time.perf_counter()
+    tokens = {
+        m: token.child() if token is not None else CancelToken()
+        for m in methods
+        if m in CONSTRUCTORS
+    }
+    futures = {executor.submit(run, m, tok): m for m, tok in tokens.items()}
+    if token is not None:
+        time_cap_sec = min(time_cap_sec, token.remaining())
+    done, pending = wait(futures, timeout=time_cap_sec)
+
+    out: List[Candidate] = []
+    for fut, method in futures.items():
+        if fut in pending:
+            fut.cancel()  # belum mulai → tidak pernah jalan
+            tokens[method].cancel()  # sudah jalan → berhenti di cek token berikutnya
+            out.append(
+                Candidate(method, status="timeout", time_sec=time.perf_counter() - t0)
+            )
+            continue
+        try:
+            out.append(fut.result())
+        except Exception as e:  # satu heuristik gagal tidak menggagalkan solve
+            log.warning("construct %s failed: %s", method, e)
+            out.append(Candidate(method, status="error", error=str(e)))
+
+    if not any(c.status == "ok" for c in out):
+        t1 = time.perf_counter()
+        routes = greedy_construct(
+            nodes,
+            tm,
+            selected_parks,
+            depot_id,
+            num_vehicles,
+            vehicle_capacity,
+            allow_refill,
+            refill_ids,
+            token=token,
+        )
+        if len(routes) == 1 and num_vehicles > 1:
+            routes = split_routes(
+                routes,
+                nodes,
+                tm,
+                depot_id,
+                num_vehicles,
+                vehicle_capacity,
+                refills,
+                objective=split_objective,
+            )
+        out.append(
+            Candidate(
+                "greedy",
+                routes=routes,
+                cost=routes_objective(routes, nodes, tm),
+                makespan=makespan_minutes(routes, nodes, tm),
+                time_sec=time.perf_counter() - t1,
+            )
+        )
+
+    out.sort(key=lambda c: (c.status != "ok", c.cost))
+    return out
@@ -0,0 +1,233 @@
+# split.py
+# Split ala Prins: belah satu giant tour (urutan kunjungan tanpa depot/refill)
+# menjadi <= K rute. Biaya segmen dihitung persis seperti
+# ensure_capacity_with_refills + route_time_minutes (truk mulai kosong, refill
+# dipilih by delta lokal), jadi hasilnya konsisten dengan evaluasi engine.
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .context import CancelToken
+from .data import Node, TimeMatrix
+from .utils import ensure_capacity_with_refills
+
+
+def giant_tour(routes: List[List[str]], nodes: Dict[str, Node]) -> List[str]:
+    """Gabungkan rute jadi satu urutan park (depot/refill dibuang)."""
+    return [nid for r in routes for nid in r if nodes[nid].type == "park"]
+
+
+def _units(tour: List[str]) -> List[List[str]]:
+    """Part satu grup dikumpulkan jadi satu unit (posisi = kemunculan pertama)."""
+    units: Dict[str, List[str]] = {}
+    for pid in tour:
+        units.setdefault(pid.split("#")[0], []).append(pid)
+    return list(units.values())
+
+
+def split_giant_tour(
+    tour: List[str],
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    refill_ids: List[str],
+    objective: str = "makespan",
+    max_route_min: Optional[float] = None,
+    total_slack: float = 1.5,
+    token: Optional[CancelToken] = None,
+) -> List[List[str]]:
+    """
+    Partisi giant tour jadi <= num_vehicles rute kontigu, grup split tidak
+    pernah terbelah. Refill disisipkan per rute (ensure_capacity_with_refills).
+      - objective="makespan": bisection pada batas durasi T + greedy cut O(n)
+        per langkah → O(n log C). Greedy memakai T* minimum yang feasible.
+      - objective="total": DP Bellman per jumlah rute, O(K · n · w) dengan w =
+        jumlah unit segmen terpanjang yang durasinya <= max_route_min, atau
+        (kalau tidak diisi) <= total_slack × makespan minimum hasil bisection.
+    Hasil selalu num_vehicles rute (rute kosong = [depot, depot]); cocok
+    dipakai sebagai decoder: split_giant_tour(giant_tour(routes, nodes), ...).
+    Kalau token batal, pencarian berhenti dan cut terbaik sejauh ini dipakai
+    (paling buruk satu rute).
+    """
+    k = max(1, num_vehicles)
+    units = _units([p for p in tour if nodes[p].type == "park"])
+    if not units:
+        return [[depot_id, depot_id] for _ in range(k)]
+
+    # --- prekomputasi per part (vectorized) ---
+    parts = [p for u in units for p in u]
+    unit_end = np.cumsum([len(u) for u in units]).tolist()
+    M = tm.M
+    d = tm.index[depot_id]
+    idx = np.array([tm.index[p] for p in parts])
+    prev = np.concatenate(([d], idx[:-1]))
+    svc = [nodes[p].service_min for p in parts]
+    dem = [nodes[p].demand_liters for p in parts]
+    from_depot = M[d, idx]
+    from_prev = M[prev, idx]
+    back = (M[idx, d] + nodes[depot_id].service_min).tolist()
+
+    if refill_ids:
+        r_idx = np.array([tm.index[r] for r in refill_ids])
+        r_svc = np.array([nodes[r].service_min for r in refill_ids])
+
+        def via_refill(src: np.ndarray) -> np.ndarray:
+            # refill dipilih by delta travel (sama dgn _nearest_refill_delta),
+            # biaya = src→r + service r + r→part
+            legs = M[np.ix_(src, r_idx)] + M[np.ix_(r_idx, idx)].T
+            best = legs.argmin(axis=1)
+            return legs[np.arange(len(idx)), best] + r_svc[best]
+
+        ref_depot = via_refill(np.full(len(idx), d)).tolist()
+        ref_prev = via_refill(prev).tolist()
+    else:
+        ref_depot, ref_prev = from_depot.tolist(), from_prev.tolist()
+    from_depot, from_prev = from_depot.tolist(), from_prev.tolist()
+
+    def extend(state, a: int, b: int):
+        """Tambahkan part a..b-1 ke segmen; state = (time, rem, last) | None."""
+        t, rem, _ = state if state else (0.0, 0.0, -1)
+        for p in range(a, b):
+            first = state is None and p == a
+            if dem[p] > rem + 1e-9 and refill_ids:
+                t += ref_depot[p] if first else ref_prev[p]
+                rem = vehicle_capacity
+            else:
+                t += from_depot[p] if first else from_prev[p]
+            t += svc[p]
+            rem -= dem[p]
+        return (t, rem, b - 1)
+
+    def closed(state) -> float:
+        return state[0] + back[state[2]]
+
+    starts = [0] + unit_end[:-1]
+
+    def stopped() -> bool:
+        return token is not None and token.cancelled()
+
+    def greedy_cuts(limit: float) -> Optional[List[int]]:
+        """Cut (index unit awal tiap rute) dengan durasi <= limit, None jika gagal."""
+        cuts, state = [0], None
+        for u, (a, b) in enumerate(zip(starts, unit_end)):
+            nxt = extend(state, a, b)
+            if state is not None and closed(nxt) > limit:
+                cuts.append(u)
+                nxt = extend(None, a, b)
+            if closed(nxt) > limit or len(cuts) > k:
+                return None
+            state = nxt
+        return cuts
+
+    def min_makespan_cuts() -> Tuple[float, List[int]]:
+        """Bisection pada batas durasi T → (T* minimum feasible, cut-nya)."""
+        lo = max(closed(extend(None, a, b)) for a, b in zip(starts, unit_end))
+        hi = closed(extend(None, 0, len(parts)))
+        cuts = greedy_cuts(hi)
+        for _ in range(60):
+            if cuts is None or hi - lo <= 1e-4 * max(hi, 1.0) or stopped():
+                break
+            mid = (lo + hi) / 2
+            trial = greedy_cuts(mid)
+            if trial is None:
+                lo = mid
+            else:
+                hi, cuts = mid, trial
+        if cuts is None:  # biaya non-monoton (matrix non-metric): fallback 1 rute
+            cuts = [0]
+        return hi, cuts
+
+    if objective == "makespan":
+        _, cuts = min_makespan_cuts()
+    elif objective == "total":
+        n = len(units)
+        if max_route_min is not None:
+            cap = max_route_min
+        else:
+            # jendela DP dibatasi durasi rute: T* (makespan minimum) dijamin
+            # feasible, jadi optimum total di bawah batas ini selalu ada
+            cap = min_makespan_cuts()[0] * total_slack
+        # seg[i] = [(j, biaya unit i..j-1)], berhenti saat melewati cap
+        seg: List[List[tuple]] = []
+        for i in range(n):
+            if stopped():
+                break
+            row, state = [], None
+            for j in range(i, n):
+                state = extend(state, starts[j], unit_end[j])
+                c = closed(state)
+                if c > cap and row:
+                    break
+                row.append((j + 1, c))
+            seg.append(row)
+
+        inf = float("inf")
+        V = [0.0] + [inf] * n
+        best_val, best_pred, preds = inf, None, []
+        for _ in range(k):
+            if len(seg) < n or (best_pred is not None and stopped()):
+                break
+            W = [inf] * (n + 1)
+            P = [-1] * (n + 1)
+            for i in range(n):
+                if V[i] == inf:
+                    continue
+                for j, c in seg[i]:
+                    if V[i] + c < W[j]:
+                        W[j], P[j] = V[i] + c, i
+            preds.append(P)
+            if W[n] < best_val:
+                best_val, best_pred = W[n], len(preds)
+            V = W
+        if len(seg) < n:  # batal sebelum DP jalan: satu rute
+            cuts = [0]
+        elif best_pred is None:
+            raise ValueError("split_giant_tour: no feasible split within max_route_min")
+        else:
+            cuts, j = [], n
+            for layer in range(best_pred - 1, -1, -1):
+                j = preds[layer][j]
+                cuts.append(j)
+            cuts.reverse()
+    else:
+        raise ValueError(f"split_giant_tour: unknown objective {objective!r}")
+
+    routes: List[List[str]] = []
+    for a, b in zip(cuts, cuts[1:] + [len(units)]):
+        route = [depot_id] + [p for u in units[a:b] for p in u] + [depot_id]
+        fixed, _ = ensure_capacity_with_refills(
+            route, nodes, vehicle_capacity, refill_ids, tm, depot_id
+        )
+        routes.append(fixed)
+    while len(routes) < k:
+        routes.append([depot_id, depot_id])
+    return routes
+
+
+def split_routes(
+    routes: List[List[str]],
+    nodes: Dict[str, Node],
+    tm: TimeMatrix,
+    depot_id: str,
+    num_vehicles: int,
+    vehicle_capacity: float,
+    refill_ids: List[str],
+    objective: str = "makespan",
+    token: Optional[CancelToken] = None,
+) -> List[List[str]]:
+    """Decoder: rute yang ada → giant tour → Split ulang ke num_vehicles rute."""
+    return split_giant_tour(
+        giant_tour(routes, nodes),
+        nodes,
+        tm,
+        depot_id,
+        num_vehicles,
+        vehicle_capacity,
+        refill_ids,
+        objective=objective,
+        token=token,
+    )
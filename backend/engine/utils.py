@@ -5,12 +5,14 @@ import hashlib
 import math
 import random
 from collections import deque
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from .context import CancelToken
 from .data import Node, TimeMatrix
 
 
 def set_seed(seed: int) -> None:
+    """Seed RNG global. Engine sendiri memakai RunContext.rng (lihat context.py)."""
     random.seed(seed)
 
 
@@ -24,13 +26,14 @@ def hash_routes(routes: List[List[str]]) -> str:
     return hashlib.md5(s.encode("utf-8")).hexdigest()
 
 
-def weighted_choice(weights: List[float]) -> int:
+def weighted_choice(weights: List[float], rng: Optional[random.Random] = None) -> int:
     """Roulette-wheel selection; return index berdasarkan bobot."""
+    rng = rng or random
     total = sum(weights)
     if total <= 0:
         # fallback: seragam
-        return random.randrange(len(weights))
-    r = random.uniform(0, total)
+        return rng.randrange(len(weights))
+    r = rng.uniform(0, total)
     acc = 0.0
     for i, w in enumerate(weights):
         acc += w
@@ -42,17 +45,24 @@ def weighted_choice(weights: List[float]) -> int:
 class SimulatedAnnealing:
     """SA acceptance sederhana (Metropolis)."""
 
-    def __init__(self, T: float, alpha: float, Tmin: float):
+    def __init__(
+        self,
+        T: float,
+        alpha: float,
+        Tmin: float,
+        rng: Optional[random.Random] = None,
+    ):
         self.T = T
         self.alpha = alpha
         self.Tmin = Tmin
+        self.rng = rng or random
 
     def accept(self, delta: float) -> bool:
         # delta > 0 adalah perburukan
         if self.T <= 1e-12:
             return False
         prob = math.exp(-delta / max(self.T, 1e-12))
-        return random.random() < prob
+        return self.rng.random() < prob
 
     def cool(self) -> None:
         self.T = max(self.Tmin, self.T * self.alpha)
@@ -264,6 +274,19 @@ def build_groups_from_expanded_ids(
     return groups, part_to_group
 
 
+def groups_on_single_vehicle(
+    routes: List[List[str]], groups: Dict[str, List[str]]
+) -> bool:
+    """True kalau tiap grup split hanya dilayani oleh satu rute."""
+    where: Dict[str, int] = {}
+    for ri, r in enumerate(routes):
+        for nid in r:
+            base = nid.split("#")[0]
+            if base in groups and where.setdefault(base, ri) != ri:
+                return False
+    return True
+
+
 # Di utils.py (Perbaikan untuk AttributeError di line 289)
 
 # Fungsi ensure_all_routes_capacity dan _nearest_refill_delta tidak berubah
@@ -278,12 +301,21 @@ def ensure_groups_single_vehicle(
     depot_id: str,
     vehicle_capacity: float,
     refill_ids: List[str],
+    token: Optional[CancelToken] = None,
 ) -> List[List[str]]:
     """
     Memastikan semua anggota grup (split-node) ada di rute yang sama,
     berurutan (contiguous), dan sesuai urutan sequence (part 1, 2, 3).
     Versi ini memperbaiki bug duplikat visit & AttributeError.
+    Kalau token sudah batal dan grup sudah satu kendaraan, rute dikembalikan
+    apa adanya; selain itu perbaikan tetap diselesaikan (hasil harus valid).
     """
+    if (
+        token is not None
+        and token.cancelled()
+        and groups_on_single_vehicle(routes, groups)
+    ):
+        return [r[:] for r in routes]
     new_routes = [r[:] for r in routes]
     # Map untuk melacak lokasi sementara: part_id -> route_idx
     part_location: Dict[str, int] = {}
@@ -0,0 +1,55 @@
+# http_cache.py
+# Validator HTTP untuk response GET yang jarang berubah (groups, nodes):
+# body di-serialize sekali, ETag kuat = hash body, If-None-Match → 304.
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match (bisa daftar, `*`, atau weak `W/`) cocok dengan etag?"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Accept-Encoding mengizinkan gzip? `x-gzip` = gzip, `*` berlaku kalau gzip
+    tidak disebut, dan q=0 berarti ditolak (RFC 9110 §12.5.3).
+    """
+    explicit: Optional[float] = None
+    wildcard: Optional[float] = None
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding in ("gzip", "x-gzip"):
+            explicit = q if explicit is None else max(explicit, q)
+        elif coding == "*":
+            wildcard = q
+    if explicit is not None:
+        return explicit > 0
+    return wildcard is not None and wildcard > 0
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
@@ -78,3 +78,50 @@ CREATE TABLE IF NOT EXISTS vrp_job_notes (
   author TEXT,
   ts TIMESTAMPTZ NOT NULL DEFAULT now()
 );
+
+-- === 0.5 Diagnostics optimasi (opsional, settings.PERSIST_DIAGNOSTICS) ===
+-- timing, lower bound & telemetry ALNS per operator
+CREATE TABLE IF NOT EXISTS vrp_job_diagnostics (
+  job_id UUID PRIMARY KEY,
+  diagnostics JSONB NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- === 0.6 Ringkasan job (satu baris per optimasi) ===
+-- dibaca /jobs, /jobs/latest, /jobs/{id}/summary tanpa agregasi tabel step
+CREATE TABLE IF NOT EXISTS vrp_jobs (
+  job_id UUID PRIMARY KEY,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  objective_time_min NUMERIC,
+  makespan_min NUMERIC,
+  total_time_min NUMERIC,
+  vehicle_count INT NOT NULL DEFAULT 0,
+  stop_count INT NOT NULL DEFAULT 0,
+  dataset_version TEXT,
+  status TEXT NOT NULL DEFAULT 'planned',
+  status_counts JSONB,
+  params JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_vrp_jobs_created ON vrp_jobs(created_at, job_id);
+
+-- backfill job lama dari vrp_job_vehicle_runs / vrp_job_step_status
+INSERT INTO vrp_jobs (job_id, created_at, objective_time_min, makespan_min,
+                      total_time_min, vehicle_count, stop_count, status, status_counts)
+SELECT v.job_id,
+       COALESCE(MIN(v.created_at),
+                (SELECT MIN(s.ts) FROM vrp_job_step_status s WHERE s.job_id = v.job_id),
+                now()),  -- vehicle_runs.created_at boleh NULL
+       MAX(v.route_total_time_min),
+       MAX(v.route_total_time_min),
+       SUM(v.route_total_time_min),
+       COUNT(*),
+       COALESCE((SELECT COUNT(*) FROM vrp_job_step_status s WHERE s.job_id = v.job_id), 0),
+       (SELECT c.status FROM vrp_job_vehicle_runs c WHERE c.job_id = v.job_id
+         GROUP BY c.status ORDER BY COUNT(*) DESC, c.status LIMIT 1),
+       (SELECT jsonb_object_agg(t.status, t.n) FROM (
+          SELECT c.status, COUNT(*) AS n FROM vrp_job_vehicle_runs c
+           WHERE c.job_id = v.job_id GROUP BY c.status) t)
+FROM vrp_job_vehicle_runs v
+GROUP BY v.job_id
+ON CONFLICT (job_id) DO NOTHING;
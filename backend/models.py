@@ -1,12 +1,28 @@
-from sqlalchemy import String, Boolean, Text, Numeric, Integer, ForeignKey, TIMESTAMP
+import os
+from uuid import uuid4
+
+from sqlalchemy import (
+    JSON,
+    TIMESTAMP,
+    Boolean,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+)
 
 # from sqlalchemy.dialects.sqlite import BLOB as SQLITE_UUID  # safe for SQLite
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
-from uuid import uuid4
+
 from .database import Base
-import os
+
+# Kolom UUID di PostgreSQL (lihat migrations), dibaca/ditulis sebagai str;
+# asyncpg mengembalikan objek UUID-nya sendiri kalau kolom di-map sebagai String
+UUIDStr = String().with_variant(PG_UUID(as_uuid=False), "postgresql")
 
 
 # UUID column helper (works for SQLite & Postgres)
@@ -32,7 +48,7 @@ def UUIDCol(primary_key=False, foreign_key: str | None = None):
 class ParkGroup(Base):
     __tablename__ = "park_groups"
     group_id: Mapped[str] = mapped_column(
-        String, primary_key=True, default=lambda: str(uuid4())
+        UUIDStr, primary_key=True, default=lambda: str(uuid4())
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
@@ -49,7 +65,9 @@ class ParkGroup(Base):
 class ParkGroupItem(Base):
     __tablename__ = "park_group_items"
     group_id: Mapped[str] = mapped_column(
-        String, ForeignKey("park_groups.group_id", ondelete="CASCADE"), primary_key=True
+        UUIDStr,
+        ForeignKey("park_groups.group_id", ondelete="CASCADE"),
+        primary_key=True,
     )
     node_id: Mapped[str] = mapped_column(String, primary_key=True)
     group: Mapped[ParkGroup] = relationship("ParkGroup", back_populates="items")
@@ -59,7 +77,7 @@ class ParkGroupItem(Base):
 class Operator(Base):
     __tablename__ = "operators"
     operator_id: Mapped[str] = mapped_column(
-        String, primary_key=True, default=lambda: str(uuid4())
+        UUIDStr, primary_key=True, default=lambda: str(uuid4())
     )
     name: Mapped[str] = mapped_column(String, nullable=False)
     phone: Mapped[str | None] = mapped_column(String)
@@ -72,7 +90,7 @@ class Operator(Base):
 class Vehicle(Base):
     __tablename__ = "vehicles"
     vehicle_id: Mapped[str] = mapped_column(
-        String, primary_key=True, default=lambda: str(uuid4())
+        UUIDStr, primary_key=True, default=lambda: str(uuid4())
     )
     plate: Mapped[str | None] = mapped_column(String, unique=True)
     capacity_l: Mapped[float | None] = mapped_column(Numeric)
@@ -82,22 +100,46 @@ class Vehicle(Base):
     )
 
 
+# ================== Job (satu baris per optimasi) ==================
+# Ditulis sekali saat hasil /optimize disimpan; status_counts/status ikut
+# di-update saat status kendaraan berubah (routes_assign). History, latest &
+# summary membaca tabel ini, bukan agregasi step/vehicle run.
+class Job(Base):
+    __tablename__ = "vrp_jobs"
+    job_id: Mapped[str] = mapped_column(UUIDStr, primary_key=True)
+    created_at = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
+    objective_time_min: Mapped[float | None] = mapped_column(Numeric)
+    makespan_min: Mapped[float | None] = mapped_column(Numeric)
+    total_time_min: Mapped[float | None] = mapped_column(Numeric)
+    vehicle_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    stop_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    dataset_version: Mapped[str | None] = mapped_column(String)
+    # status dominan kendaraan + jumlah kendaraan per status
+    status: Mapped[str] = mapped_column(String, nullable=False, default="planned")
+    status_counts = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+    params = mapped_column(JSON().with_variant(JSONB(), "postgresql"))
+
+    __table_args__ = (Index("idx_vrp_jobs_created", "created_at", "job_id"),)
+
+
 # ================== Job vehicle run (extend existing table) ==================
 # Asumsikan tabel vrp_job_vehicle_runs sudah dibuat oleh pipeline kamu.
 # Kita definisikan minimal ORM agar bisa PATCH assign/status.
 class JobVehicleRun(Base):
     __tablename__ = "vrp_job_vehicle_runs"
-    job_id: Mapped[str] = mapped_column(String, primary_key=True)
+    job_id: Mapped[str] = mapped_column(UUIDStr, primary_key=True)
     vehicle_id: Mapped[int] = mapped_column(Integer, primary_key=True)
 
     route_total_time_min: Mapped[float | None] = mapped_column(Numeric)
     expected_finish_local = mapped_column(TIMESTAMP(timezone=False))
 
     assigned_vehicle_id: Mapped[str | None] = mapped_column(
-        String, ForeignKey("vehicles.vehicle_id")
+        UUIDStr, ForeignKey("vehicles.vehicle_id")
     )
     assigned_operator_id: Mapped[str | None] = mapped_column(
-        String, ForeignKey("operators.operator_id")
+        UUIDStr, ForeignKey("operators.operator_id")
     )
     status: Mapped[str] = mapped_column(String, nullable=False, default="planned")
     created_at = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -106,7 +148,7 @@ class JobVehicleRun(Base):
 # ================== Step status ==================
 class JobStepStatus(Base):
     __tablename__ = "vrp_job_step_status"
-    job_id: Mapped[str] = mapped_column(String, primary_key=True)
+    job_id: Mapped[str] = mapped_column(UUIDStr, primary_key=True)
     vehicle_id: Mapped[int] = mapped_column(Integer, primary_key=True)
     sequence_index: Mapped[int] = mapped_column(Integer, primary_key=True)
 
@@ -115,3 +157,16 @@ class JobStepStatus(Base):
     reason: Mapped[str | None] = mapped_column(Text)
     ts = mapped_column(TIMESTAMP(timezone=True), nullable=False)
     author: Mapped[str | None] = mapped_column(String)
+
+
+# ================== Diagnostics (opsional) ==================
+# Diisi /optimize kalau settings.PERSIST_DIAGNOSTICS = True
+class JobDiagnostics(Base):
+    __tablename__ = "vrp_job_diagnostics"
+    job_id: Mapped[str] = mapped_column(UUIDStr, primary_key=True)
+    diagnostics = mapped_column(
+        JSON().with_variant(JSONB(), "postgresql"), nullable=False
+    )
+    created_at = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,334 @@
+# persistence.py
+# Penyimpanan hasil optimasi secara bulk: satu statement multi-row (Core
+# insert().values) per tabel, atau COPY di PostgreSQL untuk langkah rute.
+# ResultWriter menjalankannya di thread background (write-behind) supaya
+# response HTTP tidak menunggu database; beberapa job digabung per transaksi.
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Connection, Engine
+
+from .models import Job, JobDiagnostics, JobStepStatus, JobVehicleRun
+
+log = logging.getLogger("meta-vrp.persist")
+
+# baris per statement insert multi-row (SQLite ≥ 3.32 membolehkan 32766 parameter)
+INSERT_CHUNK_ROWS = 500
+
+ResultRows = Dict[str, List[dict]]
+
+
+def _route_field(r, key: str, default=None):
+    # route bisa dict (hasil worker) atau RouteResult
+    return r.get(key, default) if isinstance(r, dict) else getattr(r, key, default)
+
+
+def _node_id(x) -> str:
+    if isinstance(x, dict):
+        return x.get("node_id") or x.get("id") or x.get("node") or str(x)
+    return str(x)
+
+
+def result_rows(
+    job_id: str,
+    result: dict,
+    params: Optional[dict] = None,
+    with_diagnostics: bool = False,
+    now: Optional[datetime] = None,
+) -> ResultRows:
+    """Baris vrp_jobs / vehicle_runs / step_status (/ diagnostics) satu job."""
+    now = now or datetime.now(timezone.utc)
+    vehicles: List[dict] = []
+    steps: List[dict] = []
+    routes = result.get("routes", [])
+    for r in routes:
+        vehicle_id = _route_field(r, "vehicle_id")
+        if vehicle_id is None:
+            raise ValueError("vehicle_id missing in route item")
+        vehicles.append(
+            {
+                "job_id": job_id,
+                "vehicle_id": vehicle_id,
+                "route_total_time_min": _route_field(r, "total_time_min"),
+                "status": "planned",
+            }
+        )
+        for idx, node in enumerate(_route_field(r, "sequence", [])):
+            steps.append(
+                {
+                    "job_id": job_id,
+                    "vehicle_id": vehicle_id,
+                    "sequence_index": idx,
+                    "node_id": _node_id(node),
+                    "status": "planned",
+                    "reason": None,
+                    "ts": now,
+                    "author": "system",
+                }
+            )
+    times = [float(_route_field(r, "total_time_min") or 0.0) for r in routes]
+    job = {
+        "job_id": job_id,
+        "created_at": now,
+        "objective_time_min": result.get("objective_time_min"),
+        "makespan_min": max(times, default=0.0),
+        "total_time_min": round(sum(times), 4),
+        "vehicle_count": len(vehicles),
+        "stop_count": len(steps),
+        "dataset_version": result.get("dataset_version"),
+        "status": "planned",
+        "status_counts": {"planned": len(vehicles)},
+        "params": params,
+    }
+    rows: ResultRows = {
+        Job.__tablename__: [job],
+        JobVehicleRun.__tablename__: vehicles,
+        JobStepStatus.__tablename__: steps,
+    }
+    if with_diagnostics and result.get("diagnostics"):
+        rows[JobDiagnostics.__tablename__] = [
+            {"job_id": job_id, "diagnostics": result["diagnostics"]}
+        ]
+    return rows
+
+
+_TABLES = {
+    m.__tablename__: m.__table__
+    for m in (Job, JobVehicleRun, JobStepStatus, JobDiagnostics)
+}
+# COPY hanya untuk tabel lebar tanpa kolom JSON
+_COPY_TABLES = {JobStepStatus.__tablename__}
+
+
+def _copy_rows(conn: Connection, table_name: str, rows: List[dict]) -> None:
+    cols = list(rows[0])
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for row in rows:
+        # None → field kosong tanpa kutip = NULL di COPY (FORMAT csv)
+        w.writerow(
+            [
+                v.isoformat() if isinstance(v, datetime) else ("" if v is None else v)
+                for v in (row[c] for c in cols)
+            ]
+        )
+    buf.seek(0)
+    cur = conn.connection.cursor()
+    try:
+        cur.copy_expert(
+            f"COPY {table_name} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    finally:
+        cur.close()
+
+
+def write_rows(conn: Connection, rows: ResultRows, use_copy: bool = False) -> int:
+    """Tulis semua baris (urut tabel induk dulu) dalam transaksi conn; return jumlah baris."""
+    n = 0
+    for table_name, table_rows in rows.items():
+        if not table_rows:
+            continue
+        if use_copy and table_name in _COPY_TABLES:
+            _copy_rows(conn, table_name, table_rows)
+        else:
+            table = _TABLES[table_name]
+            for i in range(0, len(table_rows), INSERT_CHUNK_ROWS):
+                conn.execute(
+                    insert(table).values(table_rows[i : i + INSERT_CHUNK_ROWS])
+                )
+        n += len(table_rows)
+    return n
+
+
+def _merge(batch: List[Tuple[str, ResultRows]]) -> ResultRows:
+    merged: ResultRows = {}
+    for _, rows in batch:
+        for table_name, table_rows in rows.items():
+            merged.setdefault(table_name, []).extend(table_rows)
+    return merged
+
+
+class ResultWriter:
+    """
+    Write-behind untuk hasil optimasi:
+    - submit() langsung return; thread writer mengambil sampai `batch_max`
+      job sekaligus dan menulisnya dalam satu transaksi (bulk insert / COPY)
+    - batch gagal → tiap job dicoba sendiri-sendiri, yang tetap gagal dicatat
+    - antrian penuh (`max_queue`) → submit menulis langsung di thread caller
+    - metrics(): kedalaman antrian, durasi tulis (rata-rata/p95/max), jumlah
+      job & baris tertulis/gagal
+    """
+
+    def __init__(self, engine: Engine, max_queue: int = 256, batch_max: int = 32):
+        self.engine = engine
+        self.batch_max = max(1, int(batch_max))
+        self.use_copy = engine.dialect.name == "postgresql"
+        self._q: "queue.Queue[Optional[Tuple[str, ResultRows]]]" = queue.Queue(
+            maxsize=max(1, int(max_queue))
+        )
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._durations: deque = deque(maxlen=200)  # detik per transaksi
+        self._stats = {
+            "jobs_written": 0,
+            "jobs_failed": 0,
+            "rows_written": 0,
+            "transactions": 0,
+            "inline_writes": 0,
+        }
+
+    # --- API ---
+    def submit(self, job_id: str, rows: ResultRows) -> None:
+        self._ensure_started()
+        try:
+            self._q.put_nowait((job_id, rows))
+        except queue.Full:
+            log.warning("persist queue full; writing job %s inline", job_id)
+            with self._lock:
+                self._stats["inline_writes"] += 1
+            self._write([(job_id, rows)])
+
+    def write_now(self, job_id: str, rows: ResultRows) -> None:
+        """Tulis sinkron; exception diteruskan ke caller."""
+        self._commit([(job_id, rows)])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Tunggu antrian kosong; False kalau timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._q.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._q.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            durs = sorted(self._durations)
+            stats = dict(self._stats)
+        return {
+            "mode": "copy" if self.use_copy else "insert",
+            "queue_depth": self._q.qsize(),
+            "max_queue": self._q.maxsize,
+            "write_ms": {
+                "last": round(self._durations[-1] * 1000, 2) if durs else None,
+                "avg": round(sum(durs) / len(durs) * 1000, 2) if durs else None,
+                "p95": (
+                    round(durs[int(0.95 * (len(durs) - 1))] * 1000, 2) if durs else None
+                ),
+                "max": round(durs[-1] * 1000, 2) if durs else None,
+            },
+            **stats,
+        }
+
+    # --- internal ---
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="result-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                self._q.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_max:
+                try:
+                    nxt = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._q.put(None)  # proses sentinel setelah batch ini
+                    self._q.task_done()
+                    break
+                batch.append(nxt)
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+    def _write(self, batch: List[Tuple[str, ResultRows]]) -> None:
+        try:
+            self._commit(batch)
+            return
+        except Exception:
+            if len(batch) == 1:
+                log.exception("failed to persist optimization job %s", batch[0][0])
+                with self._lock:
+                    self._stats["jobs_failed"] += 1
+                return
+        # satu job rusak jangan menggagalkan job lain di batch
+        for item in batch:
+            self._write([item])
+
+    def _commit(self, batch: List[Tuple[str, ResultRows]]) -> None:
+        t0 = time.perf_counter()
+        with self.engine.begin() as conn:
+            n = write_rows(conn, _merge(batch), use_copy=self.use_copy)
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self._durations.append(dt)
+            self._stats["transactions"] += 1
+            self._stats["jobs_written"] += len(batch)
+            self._stats["rows_written"] += n
+        log.debug("persisted %d job(s), %d rows in %.1fms", len(batch), n, dt * 1000)
+
+
+def dominant_status(counts: Dict[str, int]) -> str:
+    """Status dengan kendaraan terbanyak (seri → urut abjad), default planned."""
+    live = [(n, st) for st, n in counts.items() if n > 0]
+    if not live:
+        return "planned"
+    return min(live, key=lambda x: (-x[0], x[1]))[1]
+
+
+def apply_vehicle_status_change(db, job_id: str, old: str, new: str) -> None:
+    """Update vrp_jobs.status_counts/status di sesi db (commit oleh caller)."""
+    if old == new:
+        return
+    job = db.query(Job).filter_by(job_id=job_id).with_for_update().first()
+    if job is None:
+        return
+    counts = dict(job.status_counts or {})
+    counts[old] = max(0, counts.get(old, 0) - 1)
+    counts[new] = counts.get(new, 0) + 1
+    job.status_counts = {k: v for k, v in counts.items() if v > 0}
+    job.status = dominant_status(job.status_counts)
+
+
+def update_step_statuses(db, rows: List[dict]) -> int:
+    """
+    UPDATE banyak step yang sudah ada sekaligus di sesi db (commit oleh
+    caller): bulk UPDATE by primary key ORM (executemany, semua dialect).
+    Tiap row wajib berisi job_id, vehicle_id, sequence_index; node_id tidak
+    disentuh.
+    """
+    for i in range(0, len(rows), INSERT_CHUNK_ROWS):
+        db.execute(update(JobStepStatus), rows[i : i + INSERT_CHUNK_ROWS])
+    return len(rows)
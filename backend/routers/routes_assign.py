@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import JobVehicleRun, Operator, Vehicle
+from ..persistence import apply_vehicle_status_change
 from ..schemas_extra import AssignPayload
+from ..status_events import STATUS_EVENTS
 
 router = APIRouter(prefix="/jobs", tags=["assign"])
 
@@ -16,6 +18,8 @@ def assign_vehicle_operator(
     if not row:
         raise HTTPException(404, "Job vehicle run not found")
 
+    status_changed = False
+
     if payload.assigned_operator_id:
         op = (
             db.query(Operator)
@@ -35,9 +39,15 @@ def assign_vehicle_operator(
     if payload.status:
         if payload.status not in ("planned", "in_progress", "done", "cancelled"):
             raise HTTPException(400, "Invalid status")
+        status_changed = row.status != payload.status
+        apply_vehicle_status_change(db, job_id, row.status, payload.status)
         row.status = payload.status
 
     db.commit()
+    if status_changed:
+        STATUS_EVENTS.publish(
+            job_id, "vehicle", {"vehicle_id": row.vehicle_id, "status": row.status}
+        )
     return {
         "job_id": row.job_id,
         "vehicle_id": row.vehicle_id,
@@ -5,9 +5,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy import exists, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from ..models import Operator, Vehicle
 from ..schemas_extra import OperatorCreate, OperatorOut, VehicleCreate, VehicleOut
 
@@ -16,7 +16,9 @@ router = APIRouter(prefix="/catalog", tags=["catalog"])
 
 # Operators
 @router.post("/operators", response_model=OperatorOut)
-def create_operator(payload: OperatorCreate, db: Session = Depends(get_db)):
+async def create_operator(
+    payload: OperatorCreate, db: AsyncSession = Depends(get_async_db)
+):
     op = Operator(
         operator_id=str(uuid4()),
         name=payload.name,
@@ -24,21 +26,26 @@ def create_operator(payload: OperatorCreate, db: Session = Depends(get_db)):
         active=bool(payload.active),
     )
     db.add(op)
-    db.commit()
+    await db.commit()
+    await db.refresh(op)  # created_at dari server_default
     return op
 
 
 @router.get("/operators", response_model=List[OperatorOut])
-def list_operators(active: Optional[bool] = Query(None), db: Session = Depends(get_db)):
-    q = db.query(Operator)
+async def list_operators(
+    active: Optional[bool] = Query(None), db: AsyncSession = Depends(get_async_db)
+):
+    q = select(Operator)
     if active is not None:
-        q = q.filter(Operator.active == active)
-    return q.order_by(Operator.created_at.desc()).all()
+        q = q.where(Operator.active == active)
+    return (await db.scalars(q.order_by(Operator.created_at.desc()))).all()
 
 
 # Vehicles
 @router.post("/vehicles", response_model=VehicleOut)
-def create_vehicle(payload: VehicleCreate, db: Session = Depends(get_db)):
+async def create_vehicle(
+    payload: VehicleCreate, db: AsyncSession = Depends(get_async_db)
+):
     vh = Vehicle(
         vehicle_id=str(uuid4()),
         plate=payload.plate,
@@ -46,16 +53,19 @@ def create_vehicle(payload: VehicleCreate, db: Session = Depends(get_db)):
         active=bool(payload.active),
     )
     db.add(vh)
-    db.commit()
+    await db.commit()
+    await db.refresh(vh)  # created_at dari server_default
     return vh
 
 
 @router.get("/vehicles", response_model=List[VehicleOut])
-def list_vehicles(active: Optional[bool] = Query(None), db: Session = Depends(get_db)):
-    q = db.query(Vehicle)
+async def list_vehicles(
+    active: Optional[bool] = Query(None), db: AsyncSession = Depends(get_async_db)
+):
+    q = select(Vehicle)
     if active is not None:
-        q = q.filter(Vehicle.active == active)
-    return q.order_by(Vehicle.created_at.desc()).all()
+        q = q.where(Vehicle.active == active)
+    return (await db.scalars(q.order_by(Vehicle.created_at.desc()))).all()
 
 
 class OperatorUpdate(BaseModel):
@@ -74,10 +84,10 @@ class VehicleUpdate(BaseModel):
 # OPERATORS: UPDATE & DELETE
 # =========================
 @router.patch("/operators/{operator_id}")
-def update_operator(
-    operator_id: str, payload: OperatorUpdate, db: Session = Depends(get_db)
+async def update_operator(
+    operator_id: str, payload: OperatorUpdate, db: AsyncSession = Depends(get_async_db)
 ):
-    op: Operator | None = db.get(Operator, operator_id)
+    op: Operator | None = await db.get(Operator, operator_id)
     if not op:
         raise HTTPException(status_code=404, detail="Operator not found")
 
@@ -88,36 +98,36 @@ def update_operator(
     if payload.active is not None:
         op.active = payload.active
 
-    db.commit()
-    db.refresh(op)
+    await db.commit()
+    await db.refresh(op)
     return op
 
 
 @router.delete("/operators/{operator_id}")
-def delete_operator(
+async def delete_operator(
     operator_id: str,
     hard: bool = Query(
         False, description="true untuk hard delete; default soft delete (active=false)"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    op: Operator | None = db.get(Operator, operator_id)
+    op: Operator | None = await db.get(Operator, operator_id)
     if not op:
         raise HTTPException(status_code=404, detail="Operator not found")
 
     if not hard:
         # soft delete
         op.active = False
-        db.commit()
+        await db.commit()
         return {"message": "Operator deactivated", "operator_id": operator_id}
 
     # hard delete (akan error jika masih direferensikan FK)
     try:
-        db.delete(op)
-        db.commit()
+        await db.delete(op)
+        await db.commit()
         return {"message": "Operator deleted", "operator_id": operator_id}
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=409,
             detail="Operator is still referenced by other records. Use soft delete (hard=false).",
@@ -128,22 +138,22 @@ def delete_operator(
 # VEHICLES: UPDATE & DELETE
 # ========================
 @router.patch("/vehicles/{vehicle_id}")
-def update_vehicle(
-    vehicle_id: str, payload: VehicleUpdate, db: Session = Depends(get_db)
+async def update_vehicle(
+    vehicle_id: str, payload: VehicleUpdate, db: AsyncSession = Depends(get_async_db)
 ):
-    v: Vehicle | None = db.get(Vehicle, vehicle_id)
+    v: Vehicle | None = await db.get(Vehicle, vehicle_id)
     if not v:
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     # validasi unik: plate tidak boleh dipakai kendaraan lain
     if payload.plate is not None and payload.plate != v.plate:
-        dup = db.execute(
+        dup = await db.scalar(
             select(
                 exists().where(
                     Vehicle.plate == payload.plate, Vehicle.vehicle_id != vehicle_id
                 )
             )
-        ).scalar()
+        )
         if dup:
             raise HTTPException(status_code=409, detail="Plate already exists")
 
@@ -154,34 +164,34 @@ def update_vehicle(
     if payload.active is not None:
         v.active = payload.active
 
-    db.commit()
-    db.refresh(v)
+    await db.commit()
+    await db.refresh(v)
     return v
 
 
 @router.delete("/vehicles/{vehicle_id}")
-def delete_vehicle(
+async def delete_vehicle(
     vehicle_id: str,
     hard: bool = Query(
         False, description="true untuk hard delete; default soft delete (active=false)"
     ),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    v: Vehicle | None = db.get(Vehicle, vehicle_id)
+    v: Vehicle | None = await db.get(Vehicle, vehicle_id)
     if not v:
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     if not hard:
         v.active = False
-        db.commit()
+        await db.commit()
         return {"message": "Vehicle deactivated", "vehicle_id": vehicle_id}
 
     try:
-        db.delete(v)
-        db.commit()
+        await db.delete(v)
+        await db.commit()
         return {"message": "Vehicle deleted", "vehicle_id": vehicle_id}
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=409,
             detail="Vehicle is still referenced by other records. Use soft delete (hard=false).",
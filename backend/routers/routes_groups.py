@@ -1,15 +1,19 @@
+import time
 from typing import List, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy import delete
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..database import get_db
+from ..database import get_async_db
 from ..deps import get_current_user
+from ..http_cache import etag_matches, make_etag, not_modified
 from ..models import ParkGroup, ParkGroupItem
 from ..schemas_extra import ParkGroupCreate, ParkGroupOut
+from ..settings import settings
 
 router = APIRouter(prefix="/groups", tags=["groups"])
 
@@ -20,89 +24,130 @@ class GroupUpdate(BaseModel):
     node_ids: Optional[List[str]] = None  # kalau None, tidak mengubah items
 
 
+_GROUP_LIST = TypeAdapter(List[ParkGroupOut])
+
+
+def _group_out(g: ParkGroup) -> ParkGroupOut:
+    return ParkGroupOut(
+        group_id=str(g.group_id),
+        name=g.name,
+        description=g.description,
+        created_by=g.created_by,
+        created_at=g.created_at,
+        node_ids=[i.node_id for i in g.items],
+    )
+
+
+class _ListCache:
+    """
+    Body GET /groups yang sudah di-serialize + ETag-nya. `generation` naik
+    tiap invalidate; hasil query yang dimulai sebelum invalidate tidak disimpan.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.expires_at = 0.0
+
+    def get(self) -> Optional[tuple[bytes, str]]:
+        if self.body is None or time.monotonic() >= self.expires_at:
+            return None
+        return self.body, self.etag
+
+    def put(self, generation: int, body: bytes) -> str:
+        etag = make_etag(body)
+        if generation == self.generation:
+            self.body, self.etag = body, etag
+            self.expires_at = time.monotonic() + settings.GROUPS_CACHE_TTL_SEC
+        return etag
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self.body = self.etag = None
+
+
+GROUPS_CACHE = _ListCache()
+
+
+async def _load_group(db: AsyncSession, group_id: str) -> Optional[ParkGroup]:
+    return await db.get(ParkGroup, group_id, options=[selectinload(ParkGroup.items)])
+
+
 @router.post("", response_model=ParkGroupOut)
-def create_group(
+async def create_group(
     payload: ParkGroupCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user),
 ):
-    gid = str(uuid4())
     group = ParkGroup(
-        group_id=gid,
+        group_id=str(uuid4()),
         name=payload.name,
         description=payload.description,
         created_by=user.get("username"),
+        items=[ParkGroupItem(node_id=str(nid)) for nid in payload.node_ids],
     )
     db.add(group)
-    for nid in payload.node_ids:
-        db.add(ParkGroupItem(group_id=gid, node_id=str(nid)))
-    db.commit()
-
-    node_ids = [
-        i.node_id for i in db.query(ParkGroupItem).filter_by(group_id=gid).all()
-    ]
-    return ParkGroupOut(
-        group_id=group.group_id,
-        name=group.name,
-        description=group.description,
-        created_by=group.created_by,
-        created_at=group.created_at,
-        node_ids=node_ids,
-    )
+    await db.commit()
+    GROUPS_CACHE.invalidate()
+    await db.refresh(group, ["created_at"])  # server_default
+    return _group_out(group)
 
 
 @router.get("", response_model=List[ParkGroupOut])
-def list_groups(db: Session = Depends(get_db)):
-    groups = db.query(ParkGroup).order_by(ParkGroup.created_at.desc()).all()
-    out = []
-    for g in groups:
-        node_ids = [
-            i.node_id
-            for i in db.query(ParkGroupItem).filter_by(group_id=g.group_id).all()
-        ]
-        out.append(
-            ParkGroupOut(
-                group_id=g.group_id,
-                name=g.name,
-                description=g.description,
-                created_by=g.created_by,
-                created_at=g.created_at,
-                node_ids=node_ids,
+async def list_groups(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Semua group + node_ids (satu query group + satu selectin untuk items).
+    Body di-cache per proses dan dikirim dengan ETag; If-None-Match yang
+    cocok → 304 tanpa body.
+    """
+    cached = GROUPS_CACHE.get()
+    if cached is None:
+        generation = GROUPS_CACHE.generation
+        groups = (
+            await db.scalars(
+                select(ParkGroup)
+                .options(selectinload(ParkGroup.items))
+                .order_by(ParkGroup.created_at.desc())
             )
-        )
-    return out
+        ).all()
+        # body di-serialize dari ParkGroupOut tervalidasi, sama seperti response_model
+        body = _GROUP_LIST.dump_json([_group_out(g) for g in groups])
+        cached = body, GROUPS_CACHE.put(generation, body)
+
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, {"Cache-Control": "no-cache"})
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @router.get("/{group_id}", response_model=ParkGroupOut)
-def get_group(group_id: str, db: Session = Depends(get_db)):
-    g = db.query(ParkGroup).filter_by(group_id=group_id).first()
+async def get_group(group_id: str, db: AsyncSession = Depends(get_async_db)):
+    g = await _load_group(db, group_id)
     if not g:
         raise HTTPException(404, "Group not found")
-    node_ids = [
-        i.node_id for i in db.query(ParkGroupItem).filter_by(group_id=g.group_id).all()
-    ]
-    return ParkGroupOut(
-        group_id=g.group_id,
-        name=g.name,
-        description=g.description,
-        created_by=g.created_by,
-        created_at=g.created_at,
-        node_ids=node_ids,
-    )
+    return _group_out(g)
 
 
 @router.delete("/{group_id}", status_code=204)
-def delete_group(group_id: str, db: Session = Depends(get_db)):
-    g = db.query(ParkGroup).filter_by(group_id=group_id).first()
+async def delete_group(group_id: str, db: AsyncSession = Depends(get_async_db)):
+    g = await _load_group(db, group_id)
     if not g:
         raise HTTPException(404, "Group not found")
-    db.delete(g)  # cascade ke items
-    db.commit()
+    await db.delete(g)  # cascade ke items
+    await db.commit()
+    GROUPS_CACHE.invalidate()
 
 
 @router.patch("/{group_id}")
-def update_group(group_id: str, payload: GroupUpdate, db: Session = Depends(get_db)):
-    grp = db.query(ParkGroup).filter(ParkGroup.group_id == group_id).first()
+async def update_group(
+    group_id: str, payload: GroupUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    grp = await _load_group(db, group_id)
     if not grp:
         raise HTTPException(status_code=404, detail="Group not found")
 
@@ -112,46 +157,21 @@ def update_group(group_id: str, payload: GroupUpdate, db: Session = Depends(get_
     if payload.description is not None:
         grp.description = payload.description
 
-    # update items (opsional)
+    # update items (opsional); item yang dilepas dihapus oleh delete-orphan
     if payload.node_ids is not None:
         new_set = set(payload.node_ids)
-        # ambil items lama
-        old_rows = (
-            db.query(ParkGroupItem).filter(ParkGroupItem.group_id == group_id).all()
-        )
-        old_set = set(r.node_id for r in old_rows)
-
-        to_add = new_set - old_set
-        to_del = old_set - new_set
-
-        # hapus yang tidak ada lagi
-        if to_del:
-            db.execute(
-                delete(ParkGroupItem).where(
-                    ParkGroupItem.group_id == group_id,
-                    ParkGroupItem.node_id.in_(to_del),
-                )
-            )
-
-        # tambah yang baru
-        if to_add:
-            db.add_all(
-                [ParkGroupItem(group_id=group_id, node_id=nid) for nid in to_add]
-            )
-
-    db.commit()
-    db.refresh(grp)
+        old_set = {i.node_id for i in grp.items}
+        grp.items = [i for i in grp.items if i.node_id in new_set] + [
+            ParkGroupItem(node_id=nid) for nid in new_set - old_set
+        ]
 
-    # susun response termasuk node_ids terbaru
-    items = (
-        db.query(ParkGroupItem.node_id).filter(ParkGroupItem.group_id == group_id).all()
-    )
-    node_ids = [r[0] for r in items]
+    await db.commit()
+    GROUPS_CACHE.invalidate()
 
     return {
         "group_id": grp.group_id,
         "name": grp.name,
         "description": grp.description,
-        "node_ids": node_ids,
+        "node_ids": [i.node_id for i in grp.items],
         "created_at": grp.created_at,
     }
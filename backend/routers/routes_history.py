@@ -1,11 +1,13 @@
+import base64
+import json
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import desc, func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
-from ..models import JobStepStatus, JobVehicleRun
+from ..database import get_async_db
+from ..models import Job, JobDiagnostics, JobStepStatus, JobVehicleRun
 
 router = APIRouter(prefix="/jobs", tags=["history"])
 
@@ -20,150 +22,210 @@ def _parse_date(s: str | None):
         return None
 
 
+def _encode_cursor(created_at: datetime | None, job_id: str) -> str:
+    at = created_at.isoformat() if created_at is not None else None
+    raw = json.dumps([at, str(job_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, job_id = json.loads(raw)
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, str(job_id)
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _after_cursor(c_at: datetime | None, c_id: str):
+    """
+    Kondisi "sesudah cursor" untuk urutan created_at DESC NULLS LAST, job_id
+    DESC. Baris lama/impor bisa punya created_at NULL: tanpa cabang IS NULL
+    baris itu tidak pernah lolos perbandingan `<` dan hilang dari halaman.
+    """
+    if c_at is None:
+        return and_(Job.created_at.is_(None), Job.job_id < c_id)
+    return or_(
+        Job.created_at < c_at,
+        and_(Job.created_at == c_at, Job.job_id < c_id),
+        Job.created_at.is_(None),
+    )
+
+
+def _job_item(j: Job) -> dict:
+    return {
+        "job_id": j.job_id,
+        "created_at": j.created_at,
+        "vehicle_count": j.vehicle_count,
+        "status": j.status or "planned",
+        "points_count": j.stop_count,
+        "objective_time_min": _num(j.objective_time_min),
+    }
+
+
+def _num(x):
+    return float(x) if x is not None else None
+
+
 @router.get("")
-def list_jobs(
+async def list_jobs(
     date_from: str | None = Query(None, description="YYYY-MM-DD"),
     date_to: str | None = Query(None, description="YYYY-MM-DD"),
-    db: Session = Depends(get_db),
+    limit: int | None = Query(None, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    List job berdasarkan data yang ADA:
-    - created_at   : MIN(ts) dari vrp_job_step_status untuk tiap job_id
-    - vehicle_count: COUNT(DISTINCT vehicle_id) dari vrp_job_step_status
+    List job (terbaru dulu) dari vrp_jobs (index created_at, job_id):
+    - created_at   : waktu simpan hasil optimasi
+    - vehicle_count: jumlah kendaraan (rute) job
+    - status       : status dominan kendaraan (planned/in_progress/done/cancelled)
+    Dengan `limit`/`cursor` → {items, next_cursor} (keyset pagination pada
+    (created_at, job_id), job tanpa created_at di akhir); tanpa keduanya →
+    list semua job (kompatibel lama).
     """
     dt_from = _parse_date(date_from)
     dt_to = _parse_date(date_to)
 
-    # Aggregate per job dari step status
-    q = db.query(
-        JobStepStatus.job_id.label("job_id"),
-        func.min(JobStepStatus.ts).label("created_at"),
-        func.count(func.distinct(JobStepStatus.vehicle_id)).label("vehicle_count"),
-    ).group_by(JobStepStatus.job_id)
-
-    # Filter tanggal (pakai HAVING karena pakai agregasi)
+    q = select(Job)
     if dt_from:
-        q = q.having(func.min(JobStepStatus.ts) >= dt_from)
+        q = q.where(Job.created_at >= dt_from)
     if dt_to:
-        q = q.having(func.min(JobStepStatus.ts) < dt_to)
-
-    rows = q.order_by(desc(func.min(JobStepStatus.ts))).all()
-
-    # Status job (opsional): ambil status dominan dari vehicle_runs jika ada
-    # (planned/in_progress/done/cancelled). Kalau ga ada, default "planned".
-    out = []
-    for r in rows:
-        status_row = (
-            db.query(JobVehicleRun.status, func.count().label("cnt"))
-            .filter(JobVehicleRun.job_id == r.job_id)
-            .group_by(JobVehicleRun.status)
-            .order_by(desc("cnt"))
-            .first()
-        )
-        out.append(
-            {
-                "job_id": r.job_id,
-                "created_at": r.created_at,
-                "vehicle_count": r.vehicle_count,
-                "status": status_row.status if status_row else "planned",
-            }
-        )
-    return out
+        q = q.where(Job.created_at < dt_to)
+
+    paged = limit is not None or cursor is not None
+    if cursor:
+        c_at, c_id = _decode_cursor(cursor)
+        q = q.where(_after_cursor(c_at, c_id))
+    # NULLS LAST eksplisit: default PostgreSQL untuk DESC adalah NULLS FIRST
+    q = q.order_by(desc(Job.created_at).nulls_last(), desc(Job.job_id))
+    if paged:
+        limit = limit or 50
+        q = q.limit(limit + 1)  # +1 untuk tahu masih ada halaman berikut
+
+    rows = (await db.scalars(q)).all()
+    has_more = paged and len(rows) > limit
+    rows = rows[:limit] if paged else rows
+    items = [_job_item(j) for j in rows]
+    if not paged:
+        return items
+    last = rows[-1] if has_more else None
+    return {
+        "items": items,
+        "next_cursor": _encode_cursor(last.created_at, last.job_id) if last else None,
+    }
 
 
 @router.get("/{job_id}/summary")
-def get_job_summary(job_id: str, db: Session = Depends(get_db)):
+async def get_job_summary(job_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Ringkasan job lengkap:
-    - Info job
+    - Info job (vrp_jobs)
     - Daftar kendaraan beserta rute (sequence node_id)
+    Satu query: vehicle_runs ⟕ step_status ⟕ vrp_jobs, urut kendaraan lalu
+    sequence. Kolom vrp_jobs hanya di-join pada step pertama tiap kendaraan
+    supaya params (JSON) tidak terulang di setiap baris step.
     """
-    # Ambil waktu dibuatnya job
-    created_at_row = (
-        db.query(func.min(JobStepStatus.ts))
-        .filter(JobStepStatus.job_id == job_id)
-        .first()
-    )
-    created_at = created_at_row[0] if created_at_row and created_at_row[0] else None
-
-    # Ambil semua kendaraan dari job ini
-    veh_rows = (
-        db.query(
+    q = (
+        select(
             JobVehicleRun.vehicle_id,
             JobVehicleRun.route_total_time_min,
             JobVehicleRun.expected_finish_local,
             JobVehicleRun.status,
             JobVehicleRun.assigned_vehicle_id,
             JobVehicleRun.assigned_operator_id,
+            JobStepStatus.sequence_index,
+            JobStepStatus.node_id,
+            JobStepStatus.status.label("step_status"),
+            JobStepStatus.reason,
+            Job,
+        )
+        .outerjoin(
+            JobStepStatus,
+            and_(
+                JobStepStatus.job_id == JobVehicleRun.job_id,
+                JobStepStatus.vehicle_id == JobVehicleRun.vehicle_id,
+            ),
         )
-        .filter(JobVehicleRun.job_id == job_id)
-        .order_by(JobVehicleRun.vehicle_id.asc())
-        .all()
+        .outerjoin(
+            Job,
+            and_(
+                Job.job_id == JobVehicleRun.job_id,
+                func.coalesce(JobStepStatus.sequence_index, 0) == 0,
+            ),
+        )
+        .where(JobVehicleRun.job_id == job_id)
+        .order_by(JobVehicleRun.vehicle_id.asc(), JobStepStatus.sequence_index.asc())
     )
+    rows = (await db.execute(q)).all()
 
-    vehicles = []
-    for v in veh_rows:
-        # Ambil rute untuk kendaraan ini dari step status
-        route_steps = (
-            db.query(
-                JobStepStatus.sequence_index,
-                JobStepStatus.node_id,  # <-- tambahkan
-                JobStepStatus.status,
-                JobStepStatus.reason,
+    job = None
+    vehicles: list[dict] = []
+    for r in rows:
+        if r.Job is not None:
+            job = r.Job
+        if not vehicles or vehicles[-1]["vehicle_id"] != r.vehicle_id:
+            vehicles.append(
+                {
+                    "vehicle_id": r.vehicle_id,
+                    "route_total_time_min": _num(r.route_total_time_min),
+                    "expected_finish_local": r.expected_finish_local,
+                    "status": r.status,
+                    "assigned_vehicle_id": r.assigned_vehicle_id,
+                    "assigned_operator_id": r.assigned_operator_id,
+                    "route": [],  # rute tiap kendaraan
+                }
             )
-            .filter(
-                JobStepStatus.job_id == job_id,
-                JobStepStatus.vehicle_id == v.vehicle_id,
+        if r.sequence_index is not None:
+            vehicles[-1]["route"].append(
+                {
+                    "sequence_index": r.sequence_index,
+                    "node_id": r.node_id,
+                    "status": r.step_status,
+                    "reason": r.reason,
+                }
             )
-            .order_by(JobStepStatus.sequence_index.asc())
-            .all()
-        )
-
-        # node_id tidak ada di JobStepStatus (kalau kamu ingin, bisa tambahkan kolom node_id nanti)
-        # sementara ini kita pakai sequence_index + status saja
-
-        route = [
-            {
-                "sequence_index": s.sequence_index,
-                "node_id": s.node_id,  # <-- keluarkan ke response
-                "status": s.status,
-                "reason": s.reason,
-            }
-            for s in route_steps
-        ]
-
-        vehicles.append(
-            {
-                "vehicle_id": v.vehicle_id,
-                "route_total_time_min": (
-                    float(v.route_total_time_min)
-                    if v.route_total_time_min is not None
-                    else None
-                ),
-                "expected_finish_local": v.expected_finish_local,
-                "status": v.status,
-                "assigned_vehicle_id": v.assigned_vehicle_id,
-                "assigned_operator_id": v.assigned_operator_id,
-                "route": route,  # 🟢 rute tiap kendaraan
-            }
-        )
+    if not rows:
+        # job tanpa kendaraan: info job saja
+        job = await db.get(Job, job_id)
 
     return {
         "job": {
             "job_id": job_id,
-            "created_at": created_at,
+            "created_at": job.created_at if job else None,
             "vehicle_count": len(vehicles),
+            "status": job.status if job else "planned",
+            "status_counts": job.status_counts if job else None,
+            "objective_time_min": _num(job.objective_time_min) if job else None,
+            "makespan_min": _num(job.makespan_min) if job else None,
+            "total_time_min": _num(job.total_time_min) if job else None,
+            "dataset_version": job.dataset_version if job else None,
+            "params": job.params if job else None,
         },
         "vehicles": vehicles,
     }
 
 
+@router.get("/{job_id}/diagnostics")
+async def get_job_diagnostics(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Diagnostics /optimize yang tersimpan (kalau PERSIST_DIAGNOSTICS aktif)."""
+    row = await db.get(JobDiagnostics, job_id)
+    if not row:
+        raise HTTPException(404, "Diagnostics not found for this job")
+    return {
+        "job_id": job_id,
+        "created_at": row.created_at,
+        "diagnostics": row.diagnostics,
+    }
+
+
 @router.get("/latest")
-def get_latest_job(db: Session = Depends(get_db)):
-    job = (
-        db.query(JobVehicleRun.job_id)
-        .order_by(desc(JobVehicleRun.job_id))
+async def get_latest_job(db: AsyncSession = Depends(get_async_db)):
+    job_id = await db.scalar(
+        select(Job.job_id)
+        .order_by(desc(Job.created_at).nulls_last(), desc(Job.job_id))
         .limit(1)
-        .first()
     )
-    return {"latest_job_id": job.job_id if job else None}
+    return {"latest_job_id": job_id}
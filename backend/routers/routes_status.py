@@ -1,12 +1,22 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
 from ..deps import get_current_user
-from ..models import JobStepStatus
-from ..schemas_extra import StepStatusOut, StepStatusUpdate
+from ..models import JobStepStatus, JobVehicleRun
+from ..persistence import update_step_statuses
+from ..schemas_extra import (
+    StepStatusBulkOut,
+    StepStatusBulkUpdate,
+    StepStatusOut,
+    StepStatusUpdate,
+)
+from ..settings import settings
+from ..status_events import STATUS_EVENTS, sse
 
 router = APIRouter(prefix="/jobs", tags=["status"])
 VALID_STEP_STATUS = {"planned", "visited", "skipped", "failed"}
@@ -16,6 +26,17 @@ def now_utc():
     return datetime.now(timezone.utc)
 
 
+def _step_event(r) -> dict:
+    return {
+        "vehicle_id": r.vehicle_id,
+        "sequence_index": r.sequence_index,
+        "status": r.status,
+        "reason": r.reason,
+        "ts": r.ts,
+        "author": r.author,
+    }
+
+
 @router.patch("/{job_id}/vehicles/{vid}/steps/{seq}", response_model=StepStatusOut)
 def update_step_status(
     job_id: str,
@@ -51,6 +72,7 @@ def update_step_status(
         row.author = user.get("username")
 
     db.commit()
+    STATUS_EVENTS.publish(job_id, "steps", {"steps": [_step_event(row)]})
     return StepStatusOut(
         sequence_index=row.sequence_index,
         status=row.status,
@@ -78,3 +100,147 @@ def get_all_step_status(job_id: str, vid: int, db: Session = Depends(get_db)):
         )
         for r in rows
     ]
+
+
+@router.patch("/{job_id}/steps", response_model=StepStatusBulkOut)
+def bulk_update_step_status(
+    job_id: str,
+    payload: StepStatusBulkUpdate,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Update banyak step sekaligus (mis. antrian offline operator) dalam satu
+    transaksi. Hanya step yang sudah ada di job yang boleh diubah: job tidak
+    dikenal → 404, (vehicle_id, sequence_index) tidak dikenal → 422 tanpa
+    ada yang ditulis. Step yang sama muncul lebih dari sekali → yang terakhir
+    dipakai.
+    """
+    if len(payload.updates) > settings.STEP_STATUS_BULK_MAX:
+        raise HTTPException(
+            413, f"Too many step updates (max {settings.STEP_STATUS_BULK_MAX})"
+        )
+    if any(u.status not in VALID_STEP_STATUS for u in payload.updates):
+        raise HTTPException(400, "Invalid step status")
+
+    latest = {(u.vehicle_id, u.sequence_index): u for u in payload.updates}
+    existing = set(
+        db.query(JobStepStatus.vehicle_id, JobStepStatus.sequence_index)
+        .filter(JobStepStatus.job_id == job_id)
+        .all()
+    )
+    if not existing and not (
+        db.query(JobVehicleRun.job_id).filter(JobVehicleRun.job_id == job_id).first()
+    ):
+        raise HTTPException(404, "Job not found")
+    unknown = sorted(set(latest) - existing)
+    if unknown:
+        raise HTTPException(
+            422,
+            {
+                "message": f"{len(unknown)} unknown step(s) for job",
+                "steps": [
+                    {"vehicle_id": vid, "sequence_index": seq}
+                    for vid, seq in unknown[:50]
+                ],
+            },
+        )
+
+    ts = now_utc()
+    author = user.get("username")
+    rows = [
+        {
+            "job_id": job_id,
+            "vehicle_id": vid,
+            "sequence_index": seq,
+            "status": u.status,
+            "reason": u.reason,
+            "ts": ts,
+            "author": author,
+        }
+        for (vid, seq), u in sorted(latest.items())
+    ]
+    update_step_statuses(db, rows)
+    db.commit()
+
+    STATUS_EVENTS.publish(
+        job_id,
+        "steps",
+        {"steps": [{k: r[k] for k in r if k != "job_id"} for r in rows]},
+    )
+    return StepStatusBulkOut(job_id=job_id, updated=len(rows), ts=ts)
+
+
+def _status_snapshot(db: Session, job_id: str) -> dict:
+    vehicles = (
+        db.query(JobVehicleRun.vehicle_id, JobVehicleRun.status)
+        .filter(JobVehicleRun.job_id == job_id)
+        .order_by(JobVehicleRun.vehicle_id.asc())
+        .all()
+    )
+    steps = (
+        db.query(JobStepStatus)
+        .filter(JobStepStatus.job_id == job_id)
+        .order_by(JobStepStatus.vehicle_id.asc(), JobStepStatus.sequence_index.asc())
+        .all()
+    )
+    return {
+        "job_id": job_id,
+        "vehicles": [
+            {"vehicle_id": v.vehicle_id, "status": v.status} for v in vehicles
+        ],
+        "steps": [_step_event(r) for r in steps],
+    }
+
+
+def _load_status_snapshot(job_id: str) -> dict:
+    # session sendiri: session Depends sudah ditutup begitu response stream mulai
+    with SessionLocal() as db:
+        return _status_snapshot(db, job_id)
+
+
+@router.get("/{job_id}/status/stream")
+async def stream_job_status(job_id: str, request: Request):
+    """
+    Server-Sent Events perubahan status job (pengganti polling steps/status):
+    - `snapshot` : status semua kendaraan & step saat subscribe (dan lagi
+                   kalau subscriber tertinggal)
+    - `steps`    : {steps: [...]} step yang berubah (PATCH tunggal / bulk)
+    - `vehicle`  : {vehicle_id, status} status kendaraan berubah
+    Komentar keepalive dikirim tiap STATUS_STREAM_KEEPALIVE_SEC.
+    """
+    # subscribe dulu supaya perubahan selama snapshot dibaca tidak hilang
+    sub = STATUS_EVENTS.subscribe(job_id)
+    try:
+        snapshot = await run_in_threadpool(_load_status_snapshot, job_id)
+    except Exception:
+        STATUS_EVENTS.unsubscribe(sub)
+        raise
+    if not snapshot["vehicles"] and not snapshot["steps"]:
+        STATUS_EVENTS.unsubscribe(sub)
+        raise HTTPException(404, "Job not found")
+
+    async def gen():
+        keepalive = settings.STATUS_STREAM_KEEPALIVE_SEC
+        try:
+            yield sse("snapshot", snapshot)
+            while True:
+                item = await sub.get(keepalive)
+                if item is None:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                event, data = item
+                if event == "resync":
+                    event = "snapshot"
+                    data = await run_in_threadpool(_load_status_snapshot, job_id)
+                yield sse(event, data)
+        finally:
+            STATUS_EVENTS.unsubscribe(sub)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,4 +1,5 @@
-from typing import Annotated, Any, Dict, List
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -14,6 +15,65 @@ class OptimizeRequest(BaseModel):
     num_vehicles: Annotated[
         int, Field(ge=1, description="Jumlah kendaraan yang digunakan")
     ]
+    construct_method: Optional[
+        Literal["portfolio", "greedy", "savings", "sweep", "random_greedy"]
+    ] = Field(
+        default=None,
+        description="Heuristik solusi awal; default settings.CONSTRUCT_METHOD",
+    )
+    priority: Optional[Literal["interactive", "batch"]] = Field(
+        default=None,
+        description="Kelas antrian solver; default interactive (sync/stream), batch (jobs)",
+    )
+    max_time_sec: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Batas atas waktu solver; budget adaptif tidak melewatinya",
+    )
+    target_gap: Optional[float] = Field(
+        default=None,
+        ge=0,
+        lt=1,
+        description="Berhenti begitu makespan dalam gap ini dari lower bound; default settings.LB_TARGET_GAP",
+    )
+    diagnostics_level: Optional[Literal["none", "summary", "full"]] = Field(
+        default=None, description="Isi diagnostics; default settings.DIAGNOSTICS_LEVEL"
+    )
+    response_format: Literal["json", "compact"] = Field(
+        default="json",
+        description="compact: sequence sebagai indeks ke tabel `ids` bersama",
+    )
+    supersede_key: Optional[str] = Field(
+        default=None,
+        description="Request baru dengan key sama membatalkan solve sebelumnya",
+    )
+
+
+class BatchScenario(BaseModel):
+    label: Optional[str] = None
+    num_vehicles: Annotated[int, Field(ge=1)]
+    vehicle_capacity_liters: Optional[float] = Field(
+        default=None, gt=0, description="Default settings.VEHICLE_CAPACITY_LITERS"
+    )
+    time_limit_sec: Optional[float] = Field(
+        default=None, gt=0, description="Batas waktu skenario; default max_time_sec"
+    )
+
+
+class OptimizeBatchRequest(BaseModel):
+    selected_node_ids: Annotated[List[str], Field(min_length=1)]
+    scenarios: Annotated[List[BatchScenario], Field(min_length=1)]
+    construct_method: Optional[
+        Literal["portfolio", "greedy", "savings", "sweep", "random_greedy"]
+    ] = None
+    priority: Optional[Literal["interactive", "batch"]] = Field(
+        default=None, description="Kelas antrian solver; default batch"
+    )
+    max_time_sec: Optional[float] = Field(default=None, gt=0)
+    target_gap: Optional[float] = Field(default=None, ge=0, lt=1)
+    include_routes: bool = Field(
+        default=False, description="Sertakan OptimizeResponse lengkap per skenario"
+    )
 
 
 class RouteResult(BaseModel):
@@ -27,4 +87,44 @@ class OptimizeResponse(BaseModel):
     objective_time_min: float
     vehicle_used: int
     routes: List[RouteResult]
+    dataset_version: Optional[str] = None
     diagnostics: Dict[str, Any] = Field(default_factory=dict)
+
+
+class OptimizeJobOut(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed", "cancelled"]
+    priority: Literal["interactive", "batch"]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_position: Optional[int] = None  # jumlah job antri di depan
+    estimated_wait_sec: Optional[float] = None
+    progress: Dict[str, Any] = Field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None  # OptimizeResponse (+ job_id DB)
+    error: Optional[Dict[str, Any]] = None
+
+
+class BatchScenarioResult(BaseModel):
+    index: int
+    label: Optional[str] = None
+    num_vehicles: int
+    vehicle_capacity_liters: float
+    status: Literal["ok", "failed"]
+    makespan_min: Optional[float] = None
+    total_time_min: Optional[float] = None
+    vehicle_used: Optional[int] = None
+    refill_count: Optional[int] = None
+    split_parts: Optional[int] = None  # titik layanan setelah split delivery
+    solve_time_sec: Optional[float] = None
+    error: Optional[Dict[str, Any]] = None
+    result: Optional[OptimizeResponse] = None
+
+
+class OptimizeBatchResponse(BaseModel):
+    scenarios: List[BatchScenarioResult]
+    best_index: Optional[int] = (
+        None  # makespan terkecil (seri → kendaraan lebih sedikit)
+    )
+    prepare_time_sec: float
+    total_time_sec: float
@@ -70,6 +70,23 @@ class StepStatusOut(BaseModel):
     author: Optional[str]
 
 
+class StepStatusBulkItem(BaseModel):
+    vehicle_id: int
+    sequence_index: int
+    status: str  # planned|visited|skipped|failed
+    reason: Optional[str] = None
+
+
+class StepStatusBulkUpdate(BaseModel):
+    updates: List[StepStatusBulkItem] = Field(..., min_length=1)
+
+
+class StepStatusBulkOut(BaseModel):
+    job_id: str
+    updated: int
+    ts: datetime
+
+
 # ---------- History ----------
 class JobListItem(BaseModel):
     job_id: str
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Tuple
 
 
 @dataclass
@@ -17,6 +18,57 @@ class Settings:
     LAMBDA_USE_MIN: float = 24.0  # penalti aktivasi kendaraan (menit ekv.)
     TIME_LIMIT_SEC: float = 30.0  # total waktu solver (construct+ALNS+improve)
 
+    # jumlah solve yang boleh jalan bersamaan (engine re-entrant, state per-run)
+    SOLVER_MAX_WORKERS: int = 2
+    # admission control: antrian maksimum per kelas (lebih → 429)
+    SOLVER_QUEUE_MAX_INTERACTIVE: int = 8
+    SOLVER_QUEUE_MAX_BATCH: int = 32
+    # saat antrian panjang budget = TIME_LIMIT_SEC × workers/(workers+antri),
+    # tapi tidak kurang dari fraksi ini
+    SOLVER_MIN_TIME_FRAC: float = 0.25
+    # solve dijalankan di proses worker (forkserver; di-kill & diganti kalau lewat
+    # budget + grace); False = thread di proses API
+    SOLVER_PROCESS_POOL: bool = True
+    SOLVER_KILL_GRACE_SEC: float = 10.0
+    SOLVER_WORKER_MAX_TASKS: int = 200  # recycle worker setelah N solve (0 = off)
+    # job async (/optimize/jobs) yang sudah selesai disimpan selama ini
+    JOB_RETENTION_SEC: float = 3600.0
+    # jumlah skenario maksimum per request /optimize/batch
+    BATCH_MAX_SCENARIOS: int = 16
+
+    # === budget waktu adaptif ===
+    # True: budget = min(TIME_LIMIT_SEC, MIN + PER_NODE × titik layanan) dan
+    # ALNS/improve berhenti begitu konvergen (sisa waktu ALNS dipakai improve);
+    # False: budget tetap TIME_LIMIT_SEC dibagi ALNS_TIME_FRAC
+    ADAPTIVE_TIME_BUDGET: bool = True
+    BUDGET_MIN_SEC: float = 0.5
+    BUDGET_SEC_PER_NODE: float = 0.2
+    # target iterasi ALNS per titik layanan; batas waktu ALNS dipersempit ke
+    # target / laju iterasi terukur
+    ALNS_ITERS_PER_NODE: int = 200
+    # konvergen = perbaikan relatif best < MIN_IMPROVE_RATE dalam jendela
+    # terakhir max(STALL_MIN_SEC, STALL_FRAC × waktu tahap berjalan)
+    BUDGET_MIN_IMPROVE_RATE: float = 0.001
+    BUDGET_STALL_FRAC: float = 0.25
+    BUDGET_STALL_MIN_SEC: float = 0.2
+
+    # === konstruksi solusi awal ===
+    # "portfolio" | "greedy" | "savings" | "sweep" | "random_greedy"
+    CONSTRUCT_METHOD: str = "portfolio"
+    # heuristik yang dijalankan paralel saat CONSTRUCT_METHOD = "portfolio"
+    CONSTRUCT_PORTFOLIO: Tuple[str, ...] = (
+        "greedy",
+        "savings",
+        "sweep",
+        "random_greedy",
+    )
+    CONSTRUCT_TIME_CAP_SEC: float = 2.0  # batas tunggu portfolio
+    CONSTRUCT_WORKERS: int = 4  # pool portfolio & ALNS paralel
+    # jumlah solusi awal terbaik yang masing-masing dijalankan ALNS (1 = best saja)
+    ALNS_PORTFOLIO_SIZE: int = 1
+    # objective Split giant tour → K rute: "makespan" | "total"
+    SPLIT_OBJECTIVE: str = "makespan"
+
     # === ALNS master switch & tuning ===
     USE_ALNS: bool = True  # aktifkan / matikan ALNS
     # proporsi waktu total utk ALNS (sisanya improve)
@@ -42,8 +94,45 @@ class Settings:
     ALNS_USE_CONSTRUCT_AS_REPAIR: bool = (
         False  # True = pakai greedy_construct utk repair
     )
+    # decoder Split di loop ALNS: tiap N iterasi (0 = off)
+    ALNS_SPLIT_PERIOD: int = 50
 
     IMPROVE_MAX_NO_IMPROVE: int = 10000
+    ALNS_MAX_NO_IMPROVE: int = 10000
+
+    # early stop berbasis lower bound makespan: stop kalau
+    # (makespan - LB) / makespan <= gap ini (0 = off)
+    LB_TARGET_GAP: float = 0.01
+
+    # simpan diagnostics /optimize (termasuk telemetry ALNS) ke vrp_job_diagnostics
+    PERSIST_DIAGNOSTICS: bool = False
+    # isi diagnostics response /optimize: "none" | "summary" | "full"
+    DIAGNOSTICS_LEVEL: str = "full"
+    # hasil /optimize ditulis thread background (bulk insert / COPY); False =
+    # ditulis sinkron sebelum response
+    PERSIST_WRITE_BEHIND: bool = True
+    PERSIST_QUEUE_MAX: int = 256  # penuh → ditulis langsung di thread request
+    PERSIST_BATCH_MAX: int = 32  # job per transaksi writer
+    # PATCH /jobs/{id}/steps: maksimum update step per request (satu transaksi)
+    STEP_STATUS_BULK_MAX: int = 2000
+    # SSE /jobs/{id}/status/stream: keepalive (detik) & antrian per subscriber
+    STATUS_STREAM_KEEPALIVE_SEC: float = 15.0
+    STATUS_STREAM_QUEUE_MAX: int = 1000
+
+    # === async database (router yang sudah pakai get_async_db) ===
+    # pool engine async (PostgreSQL/asyncpg); engine sync tetap untuk writer
+    # hasil solver & router yang belum dimigrasi
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SEC: float = 10.0
+    DB_POOL_RECYCLE_SEC: int = 1800
+    # prepared statement per koneksi asyncpg & cache SQL terkompilasi SQLAlchemy
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    DB_QUERY_CACHE_SIZE: int = 1000
+
+    # cache in-memory GET /groups (diinvalidasi create/update/delete di proses
+    # yang sama; TTL membatasi basi antar worker)
+    GROUPS_CACHE_TTL_SEC: float = 60.0
 
 
 settings = Settings()
@@ -0,0 +1,287 @@
+# solver_jobs.py
+# Scheduler solver (prioritas + admission control) dan registry job optimasi
+# asinkron: POST /optimize/jobs langsung balik job_id, solve jalan di worker
+# scheduler, client polling GET /optimize/jobs/{id}.
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from .engine.context import CancelToken
+
+log = logging.getLogger("meta-vrp.jobs")
+
+# run_fn(job, time_limit_sec) -> result dict; job.token & job.on_incumbent
+# dipakai solver
+RunFn = Callable[["SolveJob", float], dict]
+# task scheduler: fn(time_limit_sec) -> hasil
+TaskFn = Callable[[float], object]
+
+# kelas prioritas (kecil = duluan)
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class QueueFull(Exception):
+    """Antrian kelas prioritas penuh; retry_after = estimasi detik sampai lega."""
+
+    def __init__(self, priority: str, retry_after: float):
+        super().__init__(f"solver queue full for {priority!r}")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class SolverScheduler:
+    """
+    Worker solver dengan antrian prioritas ber-batas:
+    - `workers` thread mengambil task prioritas tertinggi (FIFO di dalam kelas)
+    - antrian per kelas dibatasi `max_queue`; lebih dari itu → QueueFull (429)
+    - estimasi tunggu = EWMA durasi solve × antrian di depan / workers
+    - budget waktu dihitung saat task mulai: base × workers / (workers + antri),
+      minimal base × min_time_frac, jadi antrian panjang terkuras lebih cepat
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: Dict[str, int],
+        base_time_sec: float,
+        min_time_frac: float = 0.25,
+    ):
+        self.workers = max(1, int(workers))
+        self.max_queue = dict(max_queue)
+        self.base_time_sec = base_time_sec
+        self.min_time_frac = min_time_frac
+        self.ewma_sec = base_time_sec  # durasi solve rata-rata (EWMA)
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._running = 0
+        self._stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        for i in range(self.workers):
+            threading.Thread(
+                target=self._worker, name=f"solver-{i}", daemon=True
+            ).start()
+
+    # --- API ---
+    def submit(self, fn: TaskFn, priority: str = "interactive") -> Future:
+        prio = PRIORITIES.get(priority, PRIORITIES["batch"])
+        fut: Future = Future()
+        with self._cv:
+            if self._depth(prio) >= self.max_queue.get(priority, 0):
+                self._stats["rejected"] += 1
+                raise QueueFull(priority, max(1.0, self._wait_for(len(self._heap))))
+            heapq.heappush(self._heap, (prio, next(self._seq), fut, fn))
+            self._stats["accepted"] += 1
+            self._cv.notify()
+        return fut
+
+    def cancel(self, fut: Future) -> bool:
+        """Batalkan task yang masih antri (dan keluarkan dari antrian)."""
+        with self._cv:
+            if not fut.cancel():
+                return False
+            self._heap = [e for e in self._heap if e[2] is not fut]
+            heapq.heapify(self._heap)
+            return True
+
+    def position(self, fut: Future) -> Optional[int]:
+        """Jumlah task di depan fut (None kalau sudah jalan/selesai)."""
+        with self._cv:
+            mine = next((e[:2] for e in self._heap if e[2] is fut), None)
+            if mine is None:
+                return None
+            return sum(1 for e in self._heap if e[:2] < mine)
+
+    def estimated_wait(self, fut: Optional[Future] = None) -> float:
+        """Estimasi detik sampai fut (atau task baru interactive) mulai jalan."""
+        ahead = self.position(fut) if fut is not None else None
+        with self._cv:
+            if ahead is None:
+                if fut is not None:
+                    return 0.0
+                ahead = self._depth(PRIORITIES["interactive"], inclusive=True)
+            return self._wait_for(ahead)
+
+    def time_budget(self) -> float:
+        with self._cv:
+            return self._budget()
+
+    def metrics(self) -> dict:
+        with self._cv:
+            depth = {
+                name: sum(1 for e in self._heap if e[0] == prio)
+                for name, prio in PRIORITIES.items()
+            }
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": depth,
+                "max_queue": self.max_queue,
+                "ewma_solve_sec": round(self.ewma_sec, 3),
+                "estimated_wait_sec": round(self._wait_for(len(self._heap)), 3),
+                "time_budget_sec": round(self._budget(), 3),
+                **self._stats,
+            }
+
+    # --- internal (panggil dengan _cv terkunci) ---
+    def _depth(self, prio: int, inclusive: bool = False) -> int:
+        if inclusive:
+            return sum(1 for e in self._heap if e[0] <= prio)
+        return sum(1 for e in self._heap if e[0] == prio)
+
+    def _wait_for(self, ahead: int) -> float:
+        busy = max(0, self._running + ahead - self.workers + 1)
+        return self.ewma_sec * busy / self.workers
+
+    def _budget(self) -> float:
+        frac = self.workers / (self.workers + len(self._heap))
+        return self.base_time_sec * max(self.min_time_frac, frac)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cv:
+                while not self._heap:
+                    self._cv.wait()
+                _, _, fut, fn = heapq.heappop(self._heap)
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                budget = self._budget()
+                self._running += 1
+            t0 = time.perf_counter()
+            ok = True
+            try:
+                fut.set_result(fn(budget))
+            except BaseException as e:
+                ok = False
+                fut.set_exception(e)
+            finally:
+                dt = time.perf_counter() - t0
+                with self._cv:
+                    self._running -= 1
+                    self.ewma_sec = 0.8 * self.ewma_sec + 0.2 * dt
+                    self._stats["completed" if ok else "failed"] += 1
+
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+@dataclass
+class SolveJob:
+    id: str
+    request: object  # OptimizeRequest
+    priority: str = "batch"
+    status: str = "queued"  # queued | running | done | failed | cancelled
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: Dict[str, object] = field(default_factory=dict)
+    result: Optional[dict] = None
+    error: Optional[dict] = None  # {status_code, detail}
+    token: CancelToken = field(default_factory=CancelToken, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def on_incumbent(self, stage: str, routes: List[List[str]], makespan: float):
+        started = self.started_at or self.created_at
+        self.progress = {
+            **self.progress,
+            "stage": stage,
+            "makespan_min": round(makespan, 4),
+            "elapsed_sec": round(
+                (datetime.now(timezone.utc) - started).total_seconds(), 3
+            ),
+            "incumbents": int(self.progress.get("incumbents", 0)) + 1,
+        }
+
+
+class SolveJobManager:
+    """
+    Registry job di atas SolverScheduler app, jadi jumlah solve paralel tetap
+    dibatasi SOLVER_MAX_WORKERS. Job selesai disimpan `retention_sec` detik
+    lalu dibuang.
+    """
+
+    def __init__(self, scheduler: SolverScheduler, run_fn: RunFn, retention_sec: float):
+        self.scheduler = scheduler
+        self.run_fn = run_fn
+        self.retention_sec = retention_sec
+        self._jobs: Dict[str, SolveJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request, priority: str = "batch") -> SolveJob:
+        """Raise QueueFull kalau antrian kelas `priority` penuh."""
+        job = SolveJob(id=str(uuid4()), request=request, priority=priority)
+        job.future = self.scheduler.submit(
+            lambda budget: self._run(job, budget), priority
+        )
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[SolveJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[SolveJob]:
+        """Queued → dibatalkan langsung; running → token batal, solver berhenti."""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        job.token.cancel()
+        if job.future is not None and self.scheduler.cancel(job.future):
+            self._finish(job, "cancelled")
+        return job
+
+    def queue_position(self, job: SolveJob) -> Optional[int]:
+        if job.status != "queued" or job.future is None:
+            return None
+        return self.scheduler.position(job.future)
+
+    def estimated_wait(self, job: SolveJob) -> Optional[float]:
+        if job.status != "queued" or job.future is None:
+            return None
+        return round(self.scheduler.estimated_wait(job.future), 3)
+
+    def _run(self, job: SolveJob, time_limit_sec: float) -> None:
+        if job.token.cancelled():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        job.progress = {"time_budget_sec": round(time_limit_sec, 3)}
+        t0 = time.perf_counter()
+        try:
+            job.result = self.run_fn(job, time_limit_sec)
+            status = "cancelled" if job.token.cancelled() else "done"
+        except Exception as e:
+            status = "failed"
+            job.error = {
+                "status_code": getattr(e, "status_code", 500),
+                "detail": getattr(e, "detail", f"{type(e).__name__}: {e}"),
+            }
+            if not hasattr(e, "status_code"):
+                log.exception("job %s failed", job.id)
+        self._finish(job, status)
+        log.info("job %s %s in %.3fs", job.id, status, time.perf_counter() - t0)
+
+    def _finish(self, job: SolveJob, status: str) -> None:
+        job.status = status
+        job.finished_at = datetime.now(timezone.utc)
+
+    def _purge(self) -> None:
+        now = datetime.now(timezone.utc)
+        for jid in [
+            jid
+            for jid, j in self._jobs.items()
+            if j.finished_at is not None
+            and (now - j.finished_at).total_seconds() > self.retention_sec
+        ]:
+            del self._jobs[jid]
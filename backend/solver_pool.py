@@ -0,0 +1,238 @@
+# solver_pool.py
+# Pool proses solver: worker di-fork dari forkserver yang bersih (tanpa thread
+# scheduler/writer/event loop API dan tanpa FD pipe worker lain); modul
+# `preload` (mis. yang me-load dataset) di-import sekali di forkserver sehingga
+# matrix dibagi copy-on-write ke semua worker, termasuk pengganti. Worker jalan
+# di luar GIL dan bisa di-kill + diganti kalau melewati deadline. Dipakai dari
+# thread SolverScheduler (satu thread memegang satu worker selama solve).
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+log = logging.getLogger("meta-vrp.pool")
+
+# solve_fn(req, on_incumbent, stop, time_limit_sec, **kwargs) -> dict
+# (picklable by reference); stop = multiprocessing.Event yang di-set saat token
+# caller batal, on_incumbent = None kalau caller tidak mendengarkan incumbent,
+# kwargs = argumen tambahan dari run() (harus kecil: dikirim lewat pipe)
+SolveFn = Callable[..., dict]
+
+
+class SolverWorkerError(Exception):
+    """Error dari proses worker; kind = http | runtime | internal | crashed."""
+
+    def __init__(self, kind: str, status_code: Optional[int], detail):
+        super().__init__(detail)
+        self.kind = kind
+        self.status_code = status_code
+        self.detail = detail
+
+
+class SolverTimeout(Exception):
+    """Worker melewati deadline dan sudah di-kill (slot di-recycle)."""
+
+
+def _worker_main(conn, stop, solve_fn: SolveFn, initializer, initargs) -> None:
+    # Ctrl-C ke process group ditangani parent (shutdown), bukan worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer(*initargs)
+
+    def on_incumbent(stage, routes, makespan):
+        conn.send(("incumbent", stage, routes, makespan))
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        req, time_limit_sec, kwargs, stream = msg
+        try:
+            result = solve_fn(
+                req,
+                on_incumbent if stream else None,
+                stop,
+                time_limit_sec,
+                **kwargs,
+            )
+            conn.send(("result", result))
+        except RuntimeError as e:
+            conn.send(("error", "runtime", None, str(e)))
+        except Exception as e:
+            if hasattr(e, "status_code"):  # HTTPException dari validasi _solve
+                conn.send(("error", "http", e.status_code, getattr(e, "detail", "")))
+            else:
+                conn.send(("error", "internal", None, f"{type(e).__name__}: {e}"))
+
+
+@dataclass
+class _Worker:
+    slot: int
+    proc: mp.process.BaseProcess
+    conn: object
+    stop: object  # mp.Event
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    tasks: int = 0
+    busy: bool = False
+
+
+class ProcessSolverPool:
+    """
+    `size` proses worker persisten. run() meminjam satu worker (blocking),
+    meneruskan incumbent & pembatalan token, dan me-recycle worker yang timeout,
+    crash, atau sudah melayani `max_tasks` solve.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        solve_fn: SolveFn,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: tuple = (),
+        max_tasks: int = 0,
+        start_method: str = "forkserver",
+        preload: Sequence[str] = (),
+    ):
+        self.size = max(1, int(size))
+        self.solve_fn = solve_fn
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.max_tasks = max_tasks
+        self._ctx = mp.get_context(start_method)
+        if start_method == "forkserver" and preload:
+            # harus sebelum proses pertama (forkserver dijalankan saat itu)
+            self._ctx.set_forkserver_preload(list(preload))
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: Dict[int, _Worker] = {}
+        self._lock = threading.Lock()
+        self.recycles: Dict[str, int] = {"timeout": 0, "crashed": 0, "max_tasks": 0}
+
+    # --- lifecycle ---
+    def start(self) -> None:
+        for slot in range(self.size):
+            self._idle.put(self._spawn(slot))
+        log.info("solver pool started: %d workers", self.size)
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for w in workers:
+            try:
+                w.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for w in workers:
+            w.proc.join(timeout)
+            if w.proc.is_alive():
+                w.proc.kill()
+                w.proc.join(1.0)
+
+    def _spawn(self, slot: int) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        stop = self._ctx.Event()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, stop, self.solve_fn, self.initializer, self.initargs),
+            name=f"solver-proc-{slot}",
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        w = _Worker(slot=slot, proc=proc, conn=parent_conn, stop=stop)
+        with self._lock:
+            self._workers[slot] = w
+        return w
+
+    def _recycle(self, w: _Worker, reason: str) -> _Worker:
+        log.warning(
+            "recycling solver worker %d (pid=%s): %s", w.slot, w.proc.pid, reason
+        )
+        if w.proc.is_alive():
+            w.proc.kill()
+        w.proc.join(1.0)
+        w.conn.close()
+        with self._lock:
+            self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        return self._spawn(w.slot)
+
+    # --- solve ---
+    def run(
+        self,
+        req,
+        time_limit_sec: float,
+        on_incumbent: Optional[Callable] = None,
+        token=None,
+        timeout: Optional[float] = None,
+        **solve_kwargs,
+    ) -> dict:
+        w = self._idle.get()
+        if not w.proc.is_alive():
+            w = self._recycle(w, "crashed")
+        w.busy = True
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            w.stop.clear()
+            w.conn.send((req, time_limit_sec, solve_kwargs, on_incumbent is not None))
+            while True:
+                if token is not None and token.cancelled():
+                    w.stop.set()
+                if deadline is not None and time.monotonic() > deadline:
+                    w = self._recycle(w, "timeout")
+                    raise SolverTimeout(f"solver worker killed after {timeout:.1f}s")
+                if not w.conn.poll(0.05):
+                    if not w.proc.is_alive():
+                        w = self._recycle(w, "crashed")
+                        raise SolverWorkerError("crashed", 500, "solver worker died")
+                    continue
+                try:
+                    msg = w.conn.recv()
+                except (EOFError, OSError):
+                    w = self._recycle(w, "crashed")
+                    raise SolverWorkerError("crashed", 500, "solver worker died")
+                if msg[0] == "incumbent":
+                    if on_incumbent is not None:
+                        on_incumbent(*msg[1:])
+                    continue
+                w.tasks += 1
+                if msg[0] == "result":
+                    return msg[1]
+                raise SolverWorkerError(*msg[1:])
+        finally:
+            w.busy = False
+            if self.max_tasks and w.tasks >= self.max_tasks:
+                w = self._recycle(w, "max_tasks")
+            self._idle.put(w)
+
+    def health(self) -> dict:
+        with self._lock:
+            workers: List[dict] = [
+                {
+                    "slot": w.slot,
+                    "pid": w.proc.pid,
+                    "alive": w.proc.is_alive(),
+                    "busy": w.busy,
+                    "tasks": w.tasks,
+                    "started_at": w.started_at.isoformat(),
+                }
+                for w in sorted(self._workers.values(), key=lambda w: w.slot)
+            ]
+            return {
+                "mode": "process",
+                "size": self.size,
+                "alive": sum(1 for w in workers if w["alive"]),
+                "busy": sum(1 for w in workers if w["busy"]),
+                "recycles": dict(self.recycles),
+                "recycles_total": sum(self.recycles.values()),
+                "workers": workers,
+            }
@@ -0,0 +1,15 @@
+# solver_preload.py
+# Di-import sekali oleh forkserver pool solver (ProcessSolverPool preload):
+# dataset di-load di sini, sebelum worker di-fork, supaya nodes & matrix
+# dibagi copy-on-write ke semua worker. Modul ini sengaja tidak meng-import
+# app.py (yang menyalakan thread scheduler saat import).
+import logging
+
+from .dataset import DATASETS
+
+try:
+    DATASETS.get()
+except Exception:  # path belum valid di sini → worker me-load sendiri
+    logging.getLogger("meta-vrp.pool").warning(
+        "dataset preload failed; workers will load it", exc_info=True
+    )
@@ -0,0 +1,92 @@
+# status_events.py
+# Pub/sub perubahan status eksekusi per job untuk SSE /jobs/{id}/status/stream.
+# Router (sync, jalan di threadpool) memanggil publish() setelah commit; tiap
+# subscriber punya asyncio.Queue sendiri yang diisi lewat call_soon_threadsafe
+# di event loop-nya, jadi generator SSE cukup await tanpa memegang thread.
+# Broker ini lokal per proses: deployment multi-worker butuh fan-out eksternal
+# (mis. LISTEN/NOTIFY PostgreSQL) yang memanggil publish() di tiap worker.
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from .settings import settings
+
+log = logging.getLogger("meta-vrp.status")
+
+StatusEvent = Tuple[str, dict]
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    """Antrian event satu klien SSE; dibuat & dibaca di event loop yang sama."""
+
+    def __init__(self, job_id: str, max_queue: int):
+        self.job_id = job_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[StatusEvent]" = asyncio.Queue(maxsize=max_queue)
+
+    def deliver(self, event: str, data: dict) -> None:
+        # jalan di thread event loop, jadi drain + put tidak bisa balapan
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            # subscriber terlalu lambat: minta dia muat ulang snapshot
+            log.warning("status stream for job %s lagging; sending resync", self.job_id)
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("resync", {"job_id": self.job_id}))
+
+    async def get(self, timeout: float) -> Optional[StatusEvent]:
+        """Event berikutnya, atau None kalau `timeout` detik tidak ada event."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class StatusBroker:
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max(1, int(max_queue))
+        self._lock = threading.Lock()
+        self._subs: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, job_id: str) -> Subscription:
+        """Harus dipanggil dari event loop (endpoint async)."""
+        sub = Subscription(job_id, self.max_queue)
+        with self._lock:
+            self._subs.setdefault(job_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.job_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subs[sub.job_id]
+
+    def publish(self, job_id: str, event: str, data: dict) -> int:
+        """Kirim event ke semua subscriber job (aman dari thread mana pun)."""
+        with self._lock:
+            subs = list(self._subs.get(job_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, event, data)
+            except RuntimeError:  # event loop sudah ditutup (shutdown)
+                pass
+        return len(subs)
+
+    def subscriber_count(self, job_id: str) -> int:
+        with self._lock:
+            return len(self._subs.get(job_id, ()))
+
+
+STATUS_EVENTS = StatusBroker(settings.STATUS_STREAM_QUEUE_MAX)
@@ -0,0 +1,59 @@
+# conftest.py
+# DATABASE_URL wajib ada sebelum backend.database di-import; test memakai
+# SQLite sementara. Instance sintetis kecil dibangun tanpa file dataset.
+import os
+import tempfile
+
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+)
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from backend.engine.data import Node, TimeMatrix  # noqa: E402
+
+DEPOT = "0"
+
+
+def build_instance(
+    n_parks: int,
+    seed: int = 0,
+    n_refills: int = 3,
+    split_every: int = 0,
+    zero_work: bool = False,
+):
+    """
+    Instance sintetis: depot "0", refill "r0..", park "1..n". Tiap park ke-
+    `split_every` dipecah jadi dua part "i#1"/"i#2" di lokasi yang sama (seperti
+    expand_split_delivery). zero_work → semua park berimpit dengan depot,
+    service & travel 0.
+    Return (nodes, tm, parks, refill_ids, groups).
+    """
+    rng = np.random.default_rng(seed)
+    nodes = {DEPOT: Node(DEPOT, "depot", 0.0, 0.0, "depot", 0.0, 0.0)}
+    for i in range(n_refills):
+        lat, lon = rng.normal(scale=0.05, size=2)
+        nodes[f"r{i}"] = Node(f"r{i}", "refill", lat, lon, "refill", 0.0, 5.0)
+    groups = {}
+    for i in range(1, n_parks + 1):
+        lat, lon = (0.0, 0.0) if zero_work else rng.normal(scale=0.05, size=2)
+        demand = 0.0 if zero_work else float(rng.integers(500, 4000))
+        service = 0.0 if zero_work else float(rng.integers(5, 30))
+        ids = [f"{i}#1", f"{i}#2"] if split_every and i % split_every == 0 else [str(i)]
+        for pid in ids:
+            nodes[pid] = Node(
+                pid, "park", lat, lon, "park", demand / len(ids), service / len(ids)
+            )
+        groups[str(i)] = ids
+    ids = list(nodes)
+    xy = np.array([[nodes[i].lat, nodes[i].lon] for i in ids])
+    M = np.linalg.norm(xy[:, None] - xy[None], axis=2) * 1000.0
+    parks = [p for members in groups.values() for p in members]
+    refills = [f"r{i}" for i in range(n_refills)]
+    return nodes, TimeMatrix(ids, M), parks, refills, groups
+
+
+@pytest.fixture
+def instance():
+    return build_instance
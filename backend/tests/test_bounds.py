@@ -0,0 +1,58 @@
+import itertools
+
+import pytest
+
+from backend.engine.bounds import makespan_lower_bound
+from backend.engine.construct import CONSTRUCTORS
+from backend.engine.evaluation import makespan_minutes, route_time_minutes
+from backend.engine.utils import ensure_capacity_with_refills
+
+CAPACITY = 5000.0
+
+
+def _bound(nodes, tm, refills, groups, k):
+    return makespan_lower_bound(nodes, tm, groups, "0", refills, k, CAPACITY)
+
+
+@pytest.mark.parametrize("method", sorted(CONSTRUCTORS))
+@pytest.mark.parametrize("seed,k", [(0, 2), (1, 3), (2, 5)])
+def test_bound_below_constructed_makespan(instance, method, seed, k):
+    nodes, tm, parks, refills, groups = instance(25, seed=seed, split_every=4)
+    routes = CONSTRUCTORS[method](
+        nodes=nodes,
+        tm=tm,
+        selected_parks=parks,
+        depot_id="0",
+        num_vehicles=k,
+        vehicle_capacity=CAPACITY,
+        allow_refill=True,
+        refill_ids=refills,
+    )
+    lb = _bound(nodes, tm, refills, groups, k)
+    assert lb.value <= makespan_minutes(routes, nodes, tm) + 1e-6
+
+
+def test_bound_below_brute_force_optimum(instance):
+    nodes, tm, parks, refills, groups = instance(4, seed=3)
+    k = 2
+    best = float("inf")
+    for assign in itertools.product(range(k), repeat=len(parks)):
+        per_vehicle = [[p for p, v in zip(parks, assign) if v == i] for i in range(k)]
+        makespan = 0.0
+        for members in per_vehicle:
+            shortest = min(
+                route_time_minutes(
+                    ensure_capacity_with_refills(
+                        ["0", *order, "0"], nodes, CAPACITY, refills, tm, "0"
+                    )[0],
+                    nodes,
+                    tm,
+                )
+                for order in itertools.permutations(members)
+            )
+            makespan = max(makespan, shortest)
+        best = min(best, makespan)
+
+    lb = _bound(nodes, tm, refills, groups, k)
+    assert 0 < lb.value <= best + 1e-6
+    assert lb.gap(best) < 1.0
@@ -0,0 +1,87 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.engine.construct import (
+    random_restart_greedy,
+    savings_construct,
+    sweep_construct,
+)
+from backend.engine.context import CancelToken
+from backend.engine.portfolio import construct_portfolio
+
+CAPACITY = 5000.0
+CONSTRUCTORS = [sweep_construct, savings_construct, random_restart_greedy]
+
+
+def _run(fn, nodes, tm, parks, refills, k, **kw):
+    return fn(
+        nodes=nodes,
+        tm=tm,
+        selected_parks=parks,
+        depot_id="0",
+        num_vehicles=k,
+        vehicle_capacity=CAPACITY,
+        allow_refill=True,
+        refill_ids=refills,
+        **kw,
+    )
+
+
+def _assert_serves_each_once(routes, nodes, parks, groups, k):
+    served = Counter(p for r in routes for p in r if nodes[p].type == "park")
+    assert served == Counter(parks)
+    assert len(routes) == k
+    assert all(r[0] == "0" and r[-1] == "0" for r in routes)
+    # part satu grup selalu di kendaraan yang sama
+    vehicle_of = {p: i for i, r in enumerate(routes) for p in r}
+    for members in groups.values():
+        assert len({vehicle_of[p] for p in members}) == 1
+
+
+@pytest.mark.parametrize("fn", CONSTRUCTORS, ids=lambda f: f.__name__)
+@pytest.mark.parametrize("n,k,seed", [(1, 3, 0), (12, 1, 1), (40, 4, 2), (60, 7, 3)])
+def test_constructor_serves_every_park_once(instance, fn, n, k, seed):
+    nodes, tm, parks, refills, groups = instance(n, seed=seed, split_every=3)
+    routes = _run(fn, nodes, tm, parks, refills, k)
+    _assert_serves_each_once(routes, nodes, parks, groups, k)
+
+
+@pytest.mark.parametrize("fn", CONSTRUCTORS, ids=lambda f: f.__name__)
+def test_constructor_zero_work(instance, fn):
+    # park berimpit dengan depot, service 0: sweep dulu menghasilkan NaN sektor
+    nodes, tm, parks, refills, groups = instance(10, zero_work=True)
+    routes = _run(fn, nodes, tm, parks, refills, 3)
+    _assert_serves_each_once(routes, nodes, parks, groups, 3)
+
+
+@pytest.mark.parametrize("fn", CONSTRUCTORS, ids=lambda f: f.__name__)
+def test_constructor_cancelled_token_still_complete(instance, fn):
+    nodes, tm, parks, refills, groups = instance(40, seed=4, split_every=5)
+    token = CancelToken()
+    token.cancel()
+    routes = _run(fn, nodes, tm, parks, refills, 4, token=token)
+    _assert_serves_each_once(routes, nodes, parks, groups, 4)
+
+
+def test_portfolio_candidates_serve_every_park(instance):
+    nodes, tm, parks, refills, groups = instance(30, seed=5, split_every=4)
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        out = construct_portfolio(
+            ["savings", "sweep", "random_greedy", "greedy"],
+            ex,
+            30.0,
+            nodes,
+            tm,
+            parks,
+            "0",
+            3,
+            CAPACITY,
+            True,
+            refills,
+        )
+    assert [c.status for c in out] == ["ok"] * 4
+    assert out == sorted(out, key=lambda c: c.cost)
+    for c in out:
+        _assert_serves_each_once(c.routes, nodes, parks, groups, 3)
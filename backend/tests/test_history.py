@@ -0,0 +1,83 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import MetaData, create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.database import get_async_db
+from backend.models import Job
+from backend.routers import routes_history
+
+T1 = datetime(2025, 1, 2, 8, 0)
+T2 = datetime(2025, 1, 1, 8, 0)
+# (job_id, created_at): dua job dengan timestamp sama, dua job created_at NULL
+JOBS = [
+    ("a", T2),
+    ("b", T1),
+    ("c", None),
+    ("d", T1),
+    ("e", T2),
+    ("f", None),
+    ("g", datetime(2024, 12, 31)),
+]
+EXPECTED = ["d", "b", "e", "a", "g", "f", "c"]
+
+
+@pytest.fixture
+def client():
+    path = os.path.join(tempfile.mkdtemp(), "history.db")
+    # salinan vrp_jobs dengan created_at nullable (baris lama/impor)
+    meta = MetaData()
+    table = Job.__table__.to_metadata(meta)
+    table.c.created_at.nullable = True
+    sync = create_engine(f"sqlite:///{path}")
+    meta.create_all(sync)
+    with sync.begin() as conn:
+        conn.execute(
+            insert(table),
+            [{"job_id": j, "created_at": at, "status": "planned"} for j, at in JOBS],
+        )
+    sync.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def db_override():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routes_history.router)
+    app.dependency_overrides[get_async_db] = db_override
+    with TestClient(app) as c:
+        yield c
+
+
+def test_cursor_pages_cover_null_created_at(client):
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/jobs", params=params)
+        assert r.status_code == 200
+        body = r.json()
+        seen += [item["job_id"] for item in body["items"]]
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == EXPECTED
+    assert pages == 4
+
+
+def test_unpaged_and_latest_order(client):
+    assert [j["job_id"] for j in client.get("/jobs").json()] == EXPECTED
+    assert client.get("/jobs/latest").json() == {"latest_job_id": "d"}
+
+
+def test_invalid_cursor(client):
+    assert client.get("/jobs", params={"cursor": "!!"}).status_code == 400
@@ -0,0 +1,50 @@
+import pytest
+
+from backend.http_cache import accepts_gzip, etag_matches, make_etag
+
+ETAG = make_etag(b"[]")
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (ETAG, True),
+        ("W/" + ETAG, True),
+        ('"aaa", ' + ETAG, True),
+        ('W/"aaa",W/' + ETAG, True),
+        ("*", True),
+        ('"aaa", "bbb"', False),
+        ('W/"aaa"', False),
+        (ETAG.strip('"'), False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("gzip, deflate, br", True),
+        ("x-gzip", True),
+        ("gzip;q=0", False),
+        ("GZIP ; Q=0.0", False),
+        ("gzip;q=0.001", True),
+        ("gzip;q=bad", False),
+        ("deflate, gzip;q=0.5", True),
+        ("br", False),
+        ("identity", False),
+        ("*", True),
+        ("*;q=0", False),
+        # gzip disebut eksplisit → `*` tidak berlaku
+        ("gzip;q=0, *", False),
+        ("*;q=0, x-gzip", True),
+    ],
+)
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from backend.solver_jobs import QueueFull, SolverScheduler
+
+
+@pytest.fixture
+def busy_scheduler():
+    """Scheduler 1 worker yang sedang memegang task blocking."""
+    sched = SolverScheduler(1, {"interactive": 2, "batch": 0}, base_time_sec=10.0)
+    started, release = threading.Event(), threading.Event()
+
+    def block(budget):
+        started.set()
+        release.wait(5)
+        return budget
+
+    running = sched.submit(block)
+    assert started.wait(5)
+    yield sched
+    release.set()
+    running.result(5)
+
+
+def test_queue_full_at_capacity(busy_scheduler):
+    sched = busy_scheduler
+    queued = [sched.submit(lambda b: b) for _ in range(2)]
+    assert [sched.position(f) for f in queued] == [0, 1]
+
+    with pytest.raises(QueueFull) as exc:
+        sched.submit(lambda b: b)
+    assert exc.value.priority == "interactive"
+    assert exc.value.retry_after >= 1.0
+
+    m = sched.metrics()
+    assert m["running"] == 1
+    assert m["queued"]["interactive"] == 2
+    assert (m["accepted"], m["rejected"]) == (3, 1)
+
+    # slot yang dibatalkan bisa dipakai lagi
+    assert sched.cancel(queued[1])
+    sched.submit(lambda b: b)
+
+
+def test_batch_rejected_when_limit_zero(busy_scheduler):
+    with pytest.raises(QueueFull) as exc:
+        busy_scheduler.submit(lambda b: b, "batch")
+    assert exc.value.priority == "batch"
+    assert busy_scheduler.metrics()["rejected"] == 1
+
+
+def test_time_budget_shrinks_with_queue(busy_scheduler):
+    sched = busy_scheduler
+    assert sched.time_budget() == pytest.approx(10.0)
+    sched.submit(lambda b: b)
+    sched.submit(lambda b: b)
+    # workers / (workers + antri) = 1/3, masih di atas min_time_frac 0.25
+    assert sched.time_budget() == pytest.approx(10.0 / 3)
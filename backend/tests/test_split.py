@@ -0,0 +1,92 @@
+import itertools
+
+import pytest
+
+from backend.engine.evaluation import route_time_minutes
+from backend.engine.split import giant_tour, split_giant_tour, split_routes
+from backend.engine.utils import ensure_capacity_with_refills
+
+CAPACITY = 5000.0
+
+
+def _units(tour):
+    units = {}
+    for p in tour:
+        units.setdefault(p.split("#")[0], []).append(p)
+    return list(units.values())
+
+
+def _all_splits(units, k, nodes, tm, refills):
+    """Durasi rute untuk semua partisi kontigu units ke 1..k rute."""
+    n = len(units)
+    for r in range(1, min(k, n) + 1):
+        for inner in itertools.combinations(range(1, n), r - 1):
+            cuts = [0, *inner, n]
+            durs = []
+            for a, b in zip(cuts, cuts[1:]):
+                route = ["0"] + [p for u in units[a:b] for p in u] + ["0"]
+                fixed, _ = ensure_capacity_with_refills(
+                    route, nodes, CAPACITY, refills, tm, "0"
+                )
+                durs.append(route_time_minutes(fixed, nodes, tm))
+            yield durs
+
+
+def _durations(routes, nodes, tm):
+    return [route_time_minutes(r, nodes, tm) for r in routes if len(r) > 2]
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("k", [2, 3])
+def test_split_makespan_matches_brute_force(instance, seed, k):
+    nodes, tm, tour, refills, _ = instance(8, seed=seed, split_every=3)
+    opt = min(max(d) for d in _all_splits(_units(tour), k, nodes, tm, refills))
+    routes = split_giant_tour(tour, nodes, tm, "0", k, CAPACITY, refills)
+    assert len(routes) == k
+    # bisection berhenti pada toleransi relatif 1e-4
+    assert max(_durations(routes, nodes, tm)) == pytest.approx(opt, rel=2e-4)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("k", [2, 3])
+def test_split_total_matches_brute_force(instance, seed, k):
+    nodes, tm, tour, refills, _ = instance(8, seed=seed, split_every=3)
+    splits = list(_all_splits(_units(tour), k, nodes, tm, refills))
+
+    unbounded = split_giant_tour(
+        tour,
+        nodes,
+        tm,
+        "0",
+        k,
+        CAPACITY,
+        refills,
+        objective="total",
+        max_route_min=float("inf"),
+    )
+    assert sum(_durations(unbounded, nodes, tm)) == pytest.approx(
+        min(sum(d) for d in splits)
+    )
+
+    # tanpa max_route_min jendela DP dibatasi 1.5 × makespan minimum
+    cap = 1.5 * min(max(d) for d in splits)
+    bounded = split_giant_tour(
+        tour, nodes, tm, "0", k, CAPACITY, refills, objective="total"
+    )
+    assert sum(_durations(bounded, nodes, tm)) == pytest.approx(
+        min(sum(d) for d in splits if max(d) <= cap), rel=1e-6
+    )
+
+
+def test_split_keeps_groups_and_parks(instance):
+    nodes, tm, tour, refills, groups = instance(20, seed=7, split_every=2)
+    routes = split_giant_tour(tour, nodes, tm, "0", 4, CAPACITY, refills)
+    assert giant_tour(routes, nodes) == tour
+    vehicle_of = {p: i for i, r in enumerate(routes) for p in r}
+    for members in groups.values():
+        assert len({vehicle_of[p] for p in members}) == 1
+    # decoder: hasil split di-split ulang tidak memburuk
+    again = split_routes(routes, nodes, tm, "0", 4, CAPACITY, refills)
+    assert max(_durations(again, nodes, tm)) <= max(_durations(routes, nodes, tm)) * (
+        1 + 2e-4
+    )
@@ -59,11 +59,13 @@ export const Api = {
   },
   deleteGroup: (id: string) => api.delete(`/groups/${id}`).then(() => true),
 
-  // Fungsi listNodes (dari sebelumnya, sudah benar)
+  // Katalog node dari backend (/nodes: gzip + ETag, revalidasi 304 oleh browser).
+  // Backend belum menyimpan geometri taman, jadi geometry diambil dari
+  // LOCAL_NODES per id; data lain (nama, koordinat, demand) dari server.
   listNodes: async (): Promise<Node[]> => {
-    console.log("✅ [API INTERCEPT] Mengembalikan data dari 'nodes.data.ts' (bukan backend)")
-    await new Promise((res) => setTimeout(res, 50))
-    return LOCAL_NODES
+    const nodes = await getJSON<Node[]>('/nodes')
+    const geometryById = new Map(LOCAL_NODES.map((n) => [n.id, n.geometry ?? null]))
+    return nodes.map((n) => ({ ...n, geometry: geometryById.get(n.id) ?? null }))
   },
 
   // ==========================================================